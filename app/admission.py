@@ -0,0 +1,174 @@
+import threading
+import time
+
+from flask import Flask, Response, g, jsonify, request
+
+from app.metrics import register_metrics
+
+# Endpoints grouped by cost. Writes are bound by bcrypt, lists scale with the
+# table size and lookups are single-row primary key operations.
+ENDPOINT_CLASSES = {
+    ("users.create_user", "POST"): "write",
+    ("users.update_user", "PUT"): "write",
+    ("users.batch_users", "POST"): "write",
+    ("users.get_users", "GET"): "list",
+    ("users.get_user_changes", "GET"): "list",
+    ("users.lookup_users", "POST"): "list",
+    ("users.delete_users", "DELETE"): "list",
+    ("users.get_user", "GET"): "lookup",
+    ("users.check_email_availability", "GET"): "lookup",
+    ("users.delete_user", "DELETE"): "lookup",
+    ("api_docs.users_user_list", "POST"): "write",
+    ("api_docs.users_user_resource", "PUT"): "write",
+    ("api_docs.users_user_batch", "POST"): "write",
+    ("api_docs.users_user_list", "GET"): "list",
+    ("api_docs.users_user_changes", "GET"): "list",
+    ("api_docs.users_user_lookup", "POST"): "list",
+    ("api_docs.users_user_list", "DELETE"): "list",
+    ("api_docs.users_user_resource", "GET"): "lookup",
+    ("api_docs.users_email_availability", "GET"): "lookup",
+    ("api_docs.users_user_resource", "DELETE"): "lookup",
+}
+
+
+class ConcurrencyLimiter:
+    """
+    Bound the number of requests of one class that run at the same time.
+
+    Requests over the limit wait up to ``queue_timeout`` seconds for a free
+    slot and are rejected afterwards. With ``adaptive`` enabled the limit
+    follows the observed latency (additive increase, multiplicative decrease):
+    it shrinks while requests are slower than ``target_latency`` and grows back
+    towards ``max_limit`` while they are faster.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        queue_timeout: float,
+        adaptive: bool = False,
+        target_latency: float | None = None,
+        min_limit: int = 1,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive and target_latency is not None
+        self.target_latency = target_latency
+        self._limit = float(max_limit)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed to run concurrently."""
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self) -> bool:
+        """Wait for a free slot and return whether the request was admitted."""
+        deadline = time.monotonic() + self.queue_timeout
+
+        with self._condition:
+            while self._in_flight >= self.limit:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    self._rejected += 1
+                    return False
+
+                self._condition.wait(remaining)
+
+            self._in_flight += 1
+            self._admitted += 1
+            return True
+
+    def release(self, latency: float) -> None:
+        """Free a slot and feed the latency of the finished request back."""
+        with self._condition:
+            self._in_flight -= 1
+
+            if self.adaptive:
+                self._adapt(latency)
+
+            self._condition.notify()
+
+    def _adapt(self, latency: float) -> None:
+        """Adjust the limit to the latency of the last request."""
+        if latency > self.target_latency:
+            self._limit = max(self.min_limit, self._limit * 0.9)
+        else:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def stats(self) -> dict[str, int]:
+        """Return the current limit and request counters."""
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+            }
+
+
+class AdmissionController:
+    """Shed load on expensive endpoints before it backs up every worker."""
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self.limiters: dict[str, ConcurrencyLimiter] = {}
+        self.retry_after = 1
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Create the limiters and register the request hooks."""
+        app.extensions["admission"] = self
+
+        if not app.config["ADMISSION_CONTROL_ENABLED"]:
+            return
+
+        self.retry_after = app.config["ADMISSION_RETRY_AFTER"]
+        self.limiters = {
+            name: ConcurrencyLimiter(
+                max_limit=limit,
+                queue_timeout=app.config["ADMISSION_QUEUE_TIMEOUT"],
+                adaptive=app.config["ADMISSION_ADAPTIVE"],
+                target_latency=app.config["ADMISSION_TARGET_LATENCIES"].get(name),
+            )
+            for name, limit in app.config["ADMISSION_LIMITS"].items()
+        }
+
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+        register_metrics(app, "admission", self.stats)
+
+    def _admit(self) -> Response | None:
+        """Reject the request with 503 if its class has no free slot."""
+        endpoint_class = ENDPOINT_CLASSES.get((request.endpoint, request.method))
+        limiter = self.limiters.get(endpoint_class)
+
+        if limiter is None:
+            return None
+
+        if not limiter.acquire():
+            response = jsonify({"message": "Server is busy, please retry later"})
+            response.status_code = 503
+            response.headers["Retry-After"] = str(self.retry_after)
+            return response
+
+        g.admission = (limiter, time.monotonic())
+        return None
+
+    def _release(self, error: BaseException | None = None) -> None:
+        """Give the slot of an admitted request back."""
+        admission = g.pop("admission", None)
+
+        if admission is not None:
+            limiter, started_at = admission
+            limiter.release(time.monotonic() - started_at)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Return the limiter counters per endpoint class."""
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
@@ -1,15 +1,53 @@
-from flask import Blueprint, request
+from pathlib import Path
+
+from flask import Blueprint, Response, abort, current_app, request, send_file, url_for
 from flask_restx import Api, Resource, fields
-from marshmallow import ValidationError
+from marshmallow import ValidationError, validate
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from app.app import db
-from app.models import User
-from app.schemas import UserUpdateSchema, user_create_schema, user_schema, users_schema
+from app.app import db, single_flight
+from app.batch import BatchRequestError, apply_operations, parse_operations
+from app.bloom import email_filter
+from app.idempotency import IDEMPOTENCY_HEADER, idempotent
+from app.models import User, UserChange
+from app.params import parse_datetime, parse_id_list, parse_int, parse_lookup_keys
+from app.read_models import get_user_page, get_user_rows, lookup_user_rows
+from app.schemas import (
+    user_changes_schema,
+    user_create_schema,
+    user_schema,
+    user_update_schema,
+    users_schema,
+)
+from app.sharding import relocate
+from app.singleflight import SingleFlightTimeout
+from app.tracing import span
 
 docs_bp = Blueprint("api_docs", __name__)
 
-api = Api(
+
+def _prerendered_spec_path() -> Path | None:
+    """File rendered by ``flask docs export-spec`` at ``API_SPEC_PATH``, if any."""
+    spec_path = current_app.config["API_SPEC_PATH"]
+
+    if spec_path and Path(spec_path).is_file():
+        return Path(spec_path)
+
+    return None
+
+
+class DocsApi(Api):
+    """Api whose Swagger UI loads the spec rendered at build time when present."""
+
+    @property
+    def specs_url(self) -> str:
+        if _prerendered_spec_path() is not None:
+            return url_for("api_docs.prerendered_spec")
+
+        return super().specs_url
+
+
+api = DocsApi(
     docs_bp,
     version="1.0",
     title="User Management API",
@@ -17,6 +55,38 @@ api = Api(
     doc="/",
 )
 
+
+@docs_bp.route("/openapi.json")
+def prerendered_spec() -> Response:
+    """
+    Serve the spec rendered at build time instead of building it from models.
+
+    The file is sent with the same caching headers as the built spec.
+    """
+    spec_path = _prerendered_spec_path()
+
+    if spec_path is None:
+        abort(404)
+
+    return send_file(
+        spec_path.resolve(),
+        mimetype="application/json",
+        max_age=current_app.config["API_SPEC_MAX_AGE"],
+    )
+
+
+@docs_bp.after_request
+def cache_spec(response: Response) -> Response:
+    """Let clients and proxies cache the spec, revalidating it with an ETag."""
+    if request.endpoint == "api_docs.specs" and response.status_code == 200:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config["API_SPEC_MAX_AGE"]
+        response.add_etag()
+        response.make_conditional(request)
+
+    return response
+
+
 ns_users = api.namespace("users", description="User operations", path="/api/v1/users")
 
 user_model = api.model(
@@ -57,38 +127,233 @@ error_model = api.model(
     },
 )
 
+user_change_model = api.model(
+    "UserChange",
+    {
+        "seq": fields.Integer(description="Monotonically increasing change number"),
+        "op": fields.String(
+            enum=["insert", "update", "delete"], description="Change type"
+        ),
+        "user_id": fields.Integer(description="User unique identifier"),
+        "changed_at": fields.DateTime(description="Change timestamp"),
+        "user": fields.Nested(
+            user_model,
+            allow_null=True,
+            description="Current user state, null for deleted users",
+        ),
+    },
+)
+
+user_changes_model = api.model(
+    "UserChanges",
+    {
+        "changes": fields.List(fields.Nested(user_change_model)),
+        "next_cursor": fields.Integer(description="Cursor for the next request"),
+        "has_more": fields.Boolean(description="Whether more changes may follow"),
+    },
+)
+
+user_page_model = api.model(
+    "UserPage",
+    {
+        "users": fields.List(fields.Nested(user_model)),
+        "next_cursor": fields.Integer(description="Cursor for the next request"),
+        "has_more": fields.Boolean(description="Whether more users may follow"),
+    },
+)
+
+bulk_delete_result_model = api.model(
+    "BulkDeleteResult",
+    {"deleted": fields.Integer(description="Number of deleted users")},
+)
+
+lookup_input_model = api.model(
+    "LookupInput",
+    {
+        "ids": fields.List(fields.Integer, description="User identifiers"),
+        "emails": fields.List(fields.String, description="User emails"),
+    },
+)
+
+lookup_result_model = api.model(
+    "LookupResult",
+    {
+        "users": fields.List(
+            fields.Nested(user_model), description="Found users in request order"
+        ),
+        "missing": fields.Nested(
+            api.model(
+                "LookupMissing",
+                {
+                    "ids": fields.List(fields.Integer),
+                    "emails": fields.List(fields.String),
+                },
+            ),
+            description="Keys that matched no user",
+        ),
+    },
+)
+
+email_availability_model = api.model(
+    "EmailAvailability",
+    {
+        "email": fields.String(description="Checked email"),
+        "available": fields.Boolean(description="Whether no user has this email"),
+    },
+)
+
+batch_operation_model = api.model(
+    "BatchOperation",
+    {
+        "op": fields.String(
+            required=True,
+            enum=["create", "update", "delete"],
+            description="Operation type",
+        ),
+        "id": fields.Integer(description="User identifier for update and delete"),
+        "data": fields.Nested(
+            user_input_model, description="User data for create and update"
+        ),
+    },
+)
+
+batch_input_model = api.model(
+    "BatchInput",
+    {
+        "operations": fields.List(
+            fields.Nested(batch_operation_model),
+            required=True,
+            description="Operations applied in order",
+        ),
+        "atomic": fields.Boolean(
+            default=True,
+            description="Roll back the whole batch if any operation fails",
+        ),
+    },
+)
+
+batch_result_model = api.model(
+    "BatchResult",
+    {
+        "atomic": fields.Boolean(description="Whether the batch was atomic"),
+        "committed": fields.Boolean(description="Whether any changes were saved"),
+        "results": fields.List(
+            fields.Raw, description="Per-operation status, user or errors"
+        ),
+    },
+)
+
+
+def _load_user_data(user_id: int) -> dict | None:
+    """Load a user and serialize it, so the result can be shared across requests."""
+    user = User.get_by_id(user_id)
+    return user_schema.dump(user) if user else None
+
+
+def _lookup(user_ids: list[int], emails: list[str]) -> dict:
+    """Resolve users by keys and report the keys that were not found."""
+    users, missing_ids, missing_emails = lookup_user_rows(user_ids, emails)
+
+    return {
+        "users": users_schema.dump(users),
+        "missing": {"ids": missing_ids, "emails": missing_emails},
+    }
+
 
 @ns_users.route("/")
 class UserList(Resource):
     @ns_users.doc("list_users")
-    @ns_users.marshal_list_with(user_model)
-    def get(self) -> list:
-        """List all users."""
-        users = User.get_all()
-        return users_schema.dump(users)
+    @ns_users.param(
+        "ids",
+        "Comma-separated user IDs to fetch instead of all users. "
+        "The response is then a LookupResult.",
+    )
+    @ns_users.param(
+        "after",
+        "Return users with IDs after this cursor. The response is then a UserPage.",
+    )
+    @ns_users.param(
+        "limit",
+        "Maximum number of users per page (default: 100). "
+        "The response is then a UserPage.",
+    )
+    @ns_users.response(200, "List of users", [user_model])
+    @ns_users.response(400, "Invalid IDs, cursor or limit", error_model)
+    def get(self) -> tuple:
+        """List all users, a page of users, or only the users with the given IDs."""
+        ids = request.args.get("ids")
+
+        if ids is not None:
+            try:
+                user_ids = parse_id_list(ids, current_app.config["LOOKUP_MAX_KEYS"])
+            except ValueError as error:
+                return {"message": str(error)}, 400
+
+            return _lookup(user_ids, []), 200
+
+        if "limit" not in request.args and "after" not in request.args:
+            users = get_user_rows()
+            return users_schema.dump(users), 200
+
+        try:
+            after = parse_int(request.args.get("after"), "after", default=0, minimum=0)
+            limit = parse_int(
+                request.args.get("limit"),
+                "limit",
+                default=100,
+                minimum=1,
+                maximum=current_app.config["LIST_PAGE_MAX_LIMIT"],
+            )
+        except ValueError as error:
+            return {"message": str(error)}, 400
+
+        users = get_user_page(after, limit)
+
+        return {
+            "users": users_schema.dump(users),
+            "next_cursor": users[-1].id if users else after,
+            "has_more": len(users) == limit,
+        }, 200
 
     @ns_users.doc("create_user")
     @ns_users.expect(user_input_model)
+    @ns_users.param(
+        IDEMPOTENCY_HEADER,
+        "Unique key that makes retries of this request safe",
+        _in="header",
+    )
     @ns_users.response(201, "User created", user_model)
     @ns_users.response(400, "Validation error", error_model)
     @ns_users.response(409, "Email already exists", error_model)
+    @ns_users.response(422, "Idempotency key reused for another request", error_model)
+    @idempotent
     def post(self) -> tuple:
         """Create a new user."""
         try:
-            json_data = request.get_json()
+            with span("parse_json"):
+                json_data = request.get_json()
 
             if not json_data:
                 return {"message": "No input data provided"}, 400
 
-            user = user_create_schema.load(json_data, session=db.session)
+            with span("validate"):
+                user = user_create_schema.load(json_data, session=db.session)
+
             new_user = User.create(
-                name=user.name, email=user.email, password=json_data.get("password")
+                name=user["name"], email=user["email"], password=user["password"]
             )
 
-            db.session.add(new_user)
-            db.session.commit()
+            with span("insert"):
+                db.session.add(new_user)
+                db.session.flush()
 
-            return user_schema.dump(new_user), 201
+            with span("commit"):
+                db.session.commit()
+
+            with span("serialize"):
+                body = user_schema.dump(new_user)
+
+            return body, 201
 
         except ValidationError as error:
             return {"message": "Validation error", "errors": error.messages}, 400
@@ -99,6 +364,140 @@ class UserList(Resource):
             db.session.rollback()
             return {"message": "Database error occurred"}, 500
 
+    @ns_users.doc("delete_users")
+    @ns_users.param("ids", "Comma-separated list of user identifiers")
+    @ns_users.param(
+        "created_before", "Delete users created before this ISO 8601 timestamp"
+    )
+    @ns_users.response(200, "Users deleted", bulk_delete_result_model)
+    @ns_users.response(400, "Invalid filter", error_model)
+    def delete(self) -> tuple:
+        """Delete users by a list of IDs and/or a creation time filter."""
+        ids = request.args.get("ids")
+        created_before = request.args.get("created_before")
+
+        if ids is None and created_before is None:
+            return {"message": "Either ids or created_before must be provided"}, 400
+
+        try:
+            user_ids = (
+                parse_id_list(ids, current_app.config["BULK_DELETE_MAX_IDS"])
+                if ids is not None
+                else None
+            )
+            before = (
+                parse_datetime(created_before) if created_before is not None else None
+            )
+        except ValueError as error:
+            return {"message": str(error)}, 400
+
+        try:
+            deleted = User.bulk_delete(
+                user_ids=user_ids,
+                created_before=before,
+                chunk_size=current_app.config["BULK_DELETE_CHUNK_SIZE"],
+            )
+            return {"deleted": deleted}, 200
+
+        except SQLAlchemyError:
+            db.session.rollback()
+            return {"message": "Database error occurred"}, 500
+
+
+@ns_users.route("/changes")
+class UserChanges(Resource):
+    @ns_users.doc("get_user_changes")
+    @ns_users.param("since", "Return changes after this cursor (default: 0)")
+    @ns_users.param("limit", "Maximum number of changes to return (default: 100)")
+    @ns_users.response(200, "User changes", user_changes_model)
+    @ns_users.response(400, "Invalid cursor or limit", error_model)
+    def get(self) -> tuple:
+        """Get user changes after a cursor, oldest first."""
+        try:
+            since = parse_int(request.args.get("since"), "since", default=0, minimum=0)
+            limit = parse_int(
+                request.args.get("limit"),
+                "limit",
+                default=100,
+                minimum=1,
+                maximum=current_app.config["CHANGE_FEED_MAX_LIMIT"],
+            )
+        except ValueError as error:
+            return {"message": str(error)}, 400
+
+        changes = UserChange.get_since(
+            since, limit, current_app.config["CHANGE_LOG_GAP_TIMEOUT"]
+        )
+
+        return {
+            "changes": user_changes_schema.dump(changes),
+            "next_cursor": changes[-1].seq if changes else since,
+            "has_more": len(changes) == limit,
+        }, 200
+
+
+@ns_users.route("/lookup")
+class UserLookup(Resource):
+    @ns_users.doc("lookup_users")
+    @ns_users.expect(lookup_input_model)
+    @ns_users.response(200, "Users found by ID or email", lookup_result_model)
+    @ns_users.response(400, "Invalid or too many keys", error_model)
+    def post(self) -> tuple:
+        """Get many users by IDs and/or emails in one call."""
+        try:
+            user_ids, emails = parse_lookup_keys(
+                request.get_json(silent=True), current_app.config["LOOKUP_MAX_KEYS"]
+            )
+        except ValueError as error:
+            return {"message": str(error)}, 400
+
+        return _lookup(user_ids, emails), 200
+
+
+@ns_users.route("/email-availability")
+class EmailAvailability(Resource):
+    @ns_users.doc("check_email_availability")
+    @ns_users.param("email", "Email to check")
+    @ns_users.response(200, "Email availability", email_availability_model)
+    @ns_users.response(400, "Invalid email", error_model)
+    def get(self) -> tuple:
+        """Check whether an email can still be used for a new account."""
+        email = request.args.get("email", "")
+
+        try:
+            validate.Email()(email)
+        except ValidationError:
+            return {"message": "A valid email is required"}, 400
+
+        available = (
+            not email_filter.might_exist(email) or User.get_by_email(email) is None
+        )
+        return {"email": email, "available": available}, 200
+
+
+@ns_users.route("/batch")
+class UserBatch(Resource):
+    @ns_users.doc("batch_users")
+    @ns_users.expect(batch_input_model)
+    @ns_users.response(200, "Batch applied", batch_result_model)
+    @ns_users.response(400, "Invalid batch or atomic batch rolled back", error_model)
+    def post(self) -> tuple:
+        """Apply a batch of create, update and delete operations."""
+        try:
+            operations, atomic = parse_operations(request.get_json(silent=True))
+            result = apply_operations(operations, atomic=atomic)
+
+            return result, 200 if result["committed"] else 400
+
+        except BatchRequestError as error:
+            response = {"message": error.message}
+            if error.errors:
+                response["errors"] = error.errors
+            return response, 400
+        except SQLAlchemyError:
+            db.session.rollback()
+            return {"message": "Database error occurred"}, 500
+
 
 @ns_users.route("/<int:user_id>")
 @ns_users.param("user_id", "The user identifier")
@@ -108,10 +507,16 @@ class UserResource(Resource):
     @ns_users.marshal_with(user_model)
     def get(self, user_id: int) -> dict:
         """Get a user by ID."""
-        user = User.get_by_id(user_id)
-        if not user:
+        try:
+            user_data = single_flight.do(
+                ("user", user_id), lambda: _load_user_data(user_id)
+            )
+        except SingleFlightTimeout:
+            api.abort(503, "Service temporarily unavailable")
+
+        if not user_data:
             api.abort(404, f"User with id {user_id} not found")
-        return user_schema.dump(user)
+        return user_data
 
     @ns_users.doc("update_user")
     @ns_users.expect(user_update_model)
@@ -138,12 +543,12 @@ class UserResource(Resource):
                     "required": list(required_fields),
                 }, 400
 
-            schema = UserUpdateSchema(context={"user": user})
-            updated_data = schema.load(json_data, session=db.session)
+            updated_data = user_update_schema.load(json_data, user=user)
 
-            user.name = updated_data.name
-            user.email = updated_data.email
+            user.name = updated_data["name"]
+            user.email = updated_data["email"]
             user.password = json_data["password"]
+            user = relocate(user)
 
             db.session.commit()
 
@@ -168,7 +573,7 @@ class UserResource(Resource):
             if not user:
                 return {"message": f"User with id {user_id} not found"}, 404
 
-            db.session.delete(user)
+            user.soft_delete()
             db.session.commit()
 
             return "", 204
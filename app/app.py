@@ -1,25 +1,62 @@
 from pathlib import Path
 
+import click
 from dotenv import load_dotenv
 from flask import Flask
 from flask_bcrypt import Bcrypt
 from flask_marshmallow import Marshmallow
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from app.admission import AdmissionController
+from app.compression import Compression
+from app.sharding import RoutingSession, Sharding
+from app.singleflight import SingleFlight
+from app.tracing import Tracing
+
 env_path = Path(".") / ".env"
 load_dotenv(dotenv_path=env_path)
 
-db = SQLAlchemy()
-migrate = Migrate()
+# Sessions are scoped to the app context and removed at teardown, so objects
+# never outlive the request that loaded them. Keeping their state after commit
+# lets views serialize freshly written rows without a refresh SELECT.
+db = SQLAlchemy(session_options={"expire_on_commit": False, "class_": RoutingSession})
 marshmallow = Marshmallow()
 bcrypt = Bcrypt()
+single_flight = SingleFlight()
+admission = AdmissionController()
+compression = Compression()
+sharding = Sharding()
+tracing = Tracing()
+
+
+def _is_cli_context() -> bool:
+    """Check whether the app is being loaded by the ``flask`` command."""
+    return click.get_current_context(silent=True) is not None
+
+
+def _init_migrations(app: Flask) -> None:
+    """
+    Set up Flask-Migrate for the ``flask db`` commands.
 
+    Alembic is only needed by the CLI, so web workers skip importing it.
+    """
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as db_cli
+
+    from app.schema_migrations import lock_report, upgrade_locked
+
+    Migrate(app, db)
+    db_cli.add_command(upgrade_locked)
+    db_cli.add_command(lock_report)
 
-def create_app() -> Flask:
+
+def create_app(config: dict | None = None) -> Flask:
     """
     Create and configure the Flask application.
 
+    Args:
+        config: Optional settings that override the values from ``Config``.
+
     Returns:
         Flask: Configured Flask application instance.
     """
@@ -27,15 +64,61 @@ def create_app() -> Flask:
 
     app.config.from_object("app.config.Config")
 
+    if config:
+        app.config.update(config)
+
+    sharding.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+
+    if _is_cli_context():
+        _init_migrations(app)
+
+    # Registered first, so the request span also covers the other hooks.
+    tracing.init_app(app)
     marshmallow.init_app(app)
     bcrypt.init_app(app)
+    single_flight.init_app(app)
+    admission.init_app(app)
+    compression.init_app(app)
 
-    from app.api import docs_bp
+    from app.audit import audit_log
+    from app.bloom import email_filter
+    from app.commands import docs_cli, idempotency_cli, users_cli
+    from app.health import health_bp
+    from app.metrics import metrics_bp
     from app.routes import users_bp
 
+    email_filter.init_app(app)
+    audit_log.init_app(app)
+
     app.register_blueprint(users_bp, url_prefix="/api/v1/users")
-    app.register_blueprint(docs_bp, url_prefix="/api/docs")
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(health_bp)
+
+    if app.config["API_DOCS_ENABLED"]:
+        from app.api import docs_bp
+
+        app.register_blueprint(docs_bp, url_prefix="/api/docs")
+
+    app.cli.add_command(docs_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(users_cli)
 
     return app
+
+
+def create_spec_app() -> Flask:
+    """
+    Create an app for rendering the OpenAPI spec, e.g. while building an image.
+
+    The spec only needs the routes and models, so the app runs on an in-memory
+    SQLite database instead of the configured one, which may not be set yet.
+    """
+    return create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+            "SHARD_DATABASE_URIS": [],
+            "API_DOCS_ENABLED": True,
+        }
+    )
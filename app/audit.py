@@ -0,0 +1,305 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any, Protocol
+
+from flask import Flask, current_app, has_app_context, has_request_context, request
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.app import db
+from app.metrics import register_metrics
+from app.tracing import current_span
+
+SESSION_KEY = "audit_events"
+# Attempts to write a batch before its events are counted as failed.
+WRITE_ATTEMPTS = 3
+
+
+class _Sink(Protocol):
+    """Durable destination of audit events."""
+
+    def write(self, events: list[dict]) -> None:
+        """Persist a batch of events, raising if it could not."""
+
+
+class TableSink:
+    """Inserts batches into the ``user_audit`` table with one statement each."""
+
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+
+    def write(self, events: list[dict]) -> None:
+        from app.models import UserAudit
+
+        with self.app.app_context():
+            db.session.execute(insert(UserAudit.__table__), events)
+            db.session.commit()
+
+
+class FileSink:
+    """Appends batches to a file as JSON lines, syncing it to disk after each."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def write(self, events: list[dict]) -> None:
+        lines = "".join(json.dumps(item, default=str) + "\n" for item in events)
+
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class _Flush:
+    """Queue marker asking the writer to persist everything queued before it."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+class _AuditQueue:
+    """Bounded queue of committed audit events and the thread that writes them."""
+
+    def __init__(self, app: Flask, sink: _Sink) -> None:
+        self.app = app
+        self.sink = sink
+        self.batch_size = app.config["AUDIT_BATCH_SIZE"]
+        self.flush_interval = app.config["AUDIT_FLUSH_INTERVAL"]
+        self.overflow = app.config["AUDIT_OVERFLOW"]
+        self.enqueue_timeout = app.config["AUDIT_ENQUEUE_TIMEOUT"]
+        self.queue: queue.Queue = queue.Queue(app.config["AUDIT_QUEUE_SIZE"])
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def enqueue(self, events: list[dict]) -> None:
+        """
+        Queue events for the writer, applying the overflow policy when full.
+
+        With ``block`` the caller waits up to ``AUDIT_ENQUEUE_TIMEOUT`` seconds
+        in total for room, however many events there are, slowing writers down
+        to the pace of the sink; with ``drop`` it never waits. Events that do
+        not fit are counted as dropped.
+        """
+        self._ensure_writer()
+        deadline = time.monotonic() + self.enqueue_timeout
+
+        for item in events:
+            try:
+                if self.overflow == "block":
+                    remaining = max(0.0, deadline - time.monotonic())
+                    self.queue.put(item, timeout=remaining)
+                else:
+                    self.queue.put_nowait(item)
+
+                self._enqueued += 1
+            except queue.Full:
+                self._dropped += 1
+
+    def flush(self, timeout: float) -> bool:
+        """Wait until the events queued so far are written; False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return self.queue.empty()
+
+        marker = _Flush()
+
+        try:
+            self.queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+
+        return marker.done.wait(timeout)
+
+    def _ensure_writer(self) -> None:
+        """Start the writer in this process, also after a fork."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="audit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Gather events into batches and write them until the process exits."""
+        while True:
+            batch, markers = self._next_batch()
+
+            if batch:
+                self._write(batch)
+
+            for marker in markers:
+                marker.done.set()
+
+    def _next_batch(self) -> tuple[list[dict], list[_Flush]]:
+        """
+        Wait for an event, then take more until the batch is full or due.
+
+        A flush marker ends the batch early, so it is written right away.
+        """
+        batch, markers = [], []
+        item = self.queue.get()
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            if isinstance(item, _Flush):
+                markers.append(item)
+                return batch, markers
+
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return batch, markers
+
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, markers
+
+    def _write(self, batch: list[dict]) -> None:
+        """Write a batch, retrying with backoff before giving up on it."""
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                self.sink.write(batch)
+                self._written += len(batch)
+                return
+            except Exception:
+                self.app.logger.exception("Failed to write %d audit events", len(batch))
+                time.sleep(0.1 * 2**attempt)
+
+        self._failed += len(batch)
+
+    def stats(self) -> dict[str, int]:
+        """Return the queue depth and event counters."""
+        return {
+            "queued": self.queue.qsize(),
+            "enqueued": self._enqueued,
+            "written": self._written,
+            "dropped": self._dropped,
+            "failed": self._failed,
+        }
+
+
+class AuditLog:
+    """
+    Write-behind audit trail of user creates, updates and deletes.
+
+    Events are collected in the session as users are written and handed to an
+    in-memory queue only when the transaction commits, so rolled-back writes
+    are never audited. A background thread writes them in batches of up to
+    ``AUDIT_BATCH_SIZE`` events, or every ``AUDIT_FLUSH_INTERVAL`` seconds, to
+    the ``user_audit`` table or, with ``AUDIT_SINK=file``, to a JSON lines
+    file. Requests never wait for the audit write itself; what happens when
+    the queue is full is set by ``AUDIT_OVERFLOW``. The queue is flushed when
+    the process exits.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Set up the app's audit queue and its sink."""
+        if not app.config["AUDIT_ENABLED"]:
+            return
+
+        if app.config["AUDIT_SINK"] == "file":
+            sink = FileSink(app.config["AUDIT_FILE_PATH"])
+        else:
+            sink = TableSink(app)
+
+        audit_queue = app.extensions["audit"] = _AuditQueue(app, sink)
+        register_metrics(app, "audit", audit_queue.stats)
+        atexit.register(audit_queue.flush, app.config["AUDIT_SHUTDOWN_TIMEOUT"])
+
+        if not event.contains(Session, "after_commit", _enqueue_committed):
+            event.listen(Session, "after_commit", _enqueue_committed)
+            event.listen(Session, "after_soft_rollback", _discard_rolled_back)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until the audit events committed so far are written."""
+        audit_queue = current_app.extensions.get("audit")
+        return audit_queue is None or audit_queue.flush(timeout)
+
+
+def stage_audit_events(
+    user_ids: list[int], action: str, fields: list[str] | None = None
+) -> None:
+    """
+    Record audit events in the current session until its transaction ends.
+
+    Called from the change log, which every user write path goes through.
+    """
+    if not has_app_context() or "audit" not in current_app.extensions:
+        return
+
+    session = db.session()
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    span = current_span()
+    occurred_at = datetime.now(UTC)
+    remote_addr = request.remote_addr if has_request_context() else None
+
+    session.info.setdefault(SESSION_KEY, []).extend(
+        (
+            transaction,
+            {
+                "user_id": user_id,
+                "action": action,
+                "fields": fields,
+                "trace_id": span.trace_id if span is not None else None,
+                "remote_addr": remote_addr,
+                "occurred_at": occurred_at,
+            },
+        )
+        for user_id in user_ids
+    )
+
+
+def _enqueue_committed(session: Session) -> None:
+    """Hand the events of a committed transaction to the app's queue."""
+    staged = session.info.pop(SESSION_KEY, None)
+
+    if staged and has_app_context() and "audit" in current_app.extensions:
+        current_app.extensions["audit"].enqueue([item for _, item in staged])
+
+
+def _discard_rolled_back(session: Session, previous_transaction: Any) -> None:
+    """Forget the events staged within a rolled-back transaction or savepoint."""
+    staged = session.info.get(SESSION_KEY)
+
+    if not staged:
+        return
+
+    def rolled_back(transaction: Any) -> bool:
+        while transaction is not None:
+            if transaction is previous_transaction:
+                return True
+
+            transaction = transaction.parent
+
+        return False
+
+    session.info[SESSION_KEY] = [
+        (transaction, item)
+        for transaction, item in staged
+        if not rolled_back(transaction)
+    ]
+
+
+audit_log = AuditLog()
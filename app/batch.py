@@ -0,0 +1,186 @@
+from typing import Any
+
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from app.app import db
+from app.models import User
+from app.params import MAX_ID
+from app.schemas import user_create_schema, user_schema, user_update_schema
+from app.sharding import relocate
+
+OPERATIONS = ("create", "update", "delete")
+REQUIRED_UPDATE_FIELDS = ("name", "email", "password")
+
+
+class BatchRequestError(Exception):
+    """Raised when a batch request is malformed as a whole."""
+
+    def __init__(self, message: str, errors: dict | None = None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.errors = errors or {}
+
+
+def parse_operations(json_data: Any) -> tuple[list[dict], bool]:
+    """
+    Validate the envelope of a batch request.
+
+    Returns the list of operations and whether they must be applied atomically.
+    Validation of user data is left to the individual operations.
+    """
+    if not isinstance(json_data, dict):
+        raise BatchRequestError("No input data provided")
+
+    operations = json_data.get("operations")
+    atomic = json_data.get("atomic", True)
+    max_operations = current_app.config["BATCH_MAX_OPERATIONS"]
+
+    if not isinstance(operations, list) or not operations:
+        raise BatchRequestError("Operations must be a non-empty list")
+
+    if len(operations) > max_operations:
+        raise BatchRequestError(
+            f"A batch can contain at most {max_operations} operations"
+        )
+
+    if not isinstance(atomic, bool):
+        raise BatchRequestError("Atomic must be a boolean")
+
+    errors = {}
+
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            errors[index] = f"Operation must be one of: {', '.join(OPERATIONS)}."
+            continue
+
+        user_id = operation.get("id")
+
+        if operation["op"] != "create" and (
+            not isinstance(user_id, int)
+            or isinstance(user_id, bool)
+            or not 1 <= user_id <= MAX_ID
+        ):
+            errors[index] = f"Operation requires a user id between 1 and {MAX_ID}."
+        elif operation["op"] != "delete" and not isinstance(
+            operation.get("data"), dict
+        ):
+            errors[index] = "Operation requires a data object."
+
+    if errors:
+        raise BatchRequestError("Invalid operations", errors)
+
+    return operations, atomic
+
+
+def _create(data: dict) -> dict:
+    """Validate and add a new user, returning the per-operation result."""
+    user = user_create_schema.load(data, session=db.session)
+    new_user = User.create(
+        name=user["name"], email=user["email"], password=user["password"]
+    )
+
+    db.session.add(new_user)
+    db.session.flush()
+
+    return {"status": 201, "user": user_schema.dump(new_user)}
+
+
+def _update(users: dict[int, User], user_id: int, data: dict) -> dict:
+    """Validate and apply an update, returning the per-operation result."""
+    user = users.get(user_id)
+
+    if user is None:
+        return {"status": 404, "message": f"User with id {user_id} not found"}
+
+    if not all(field in data for field in REQUIRED_UPDATE_FIELDS):
+        return {
+            "status": 400,
+            "message": "Missing required fields",
+            "required": list(REQUIRED_UPDATE_FIELDS),
+        }
+
+    updated_data = user_update_schema.load(data, user=user)
+
+    user.name = updated_data["name"]
+    user.email = updated_data["email"]
+    user.password = data["password"]
+    user = users[user_id] = relocate(user)
+    db.session.flush()
+
+    return {"status": 200, "user": user_schema.dump(user)}
+
+
+def _delete(user: User | None, user_id: int) -> dict:
+    """Delete a user, returning the per-operation result."""
+    if user is None:
+        return {"status": 404, "message": f"User with id {user_id} not found"}
+
+    user.soft_delete()
+    db.session.flush()
+
+    return {"status": 204}
+
+
+def _apply(operation: dict, users: dict[int, User]) -> dict:
+    """Apply a single operation and translate failures into a result."""
+    try:
+        if operation["op"] == "create":
+            return _create(operation["data"])
+
+        user_id = operation["id"]
+
+        if operation["op"] == "update":
+            return _update(users, user_id, operation["data"])
+
+        result = _delete(users.get(user_id), user_id)
+
+        if result["status"] == 204:
+            users.pop(user_id)
+
+        return result
+
+    except ValidationError as error:
+        return {"status": 400, "message": "Validation error", "errors": error.messages}
+    except IntegrityError:
+        return {"status": 409, "message": "User with this email already exists"}
+
+
+def apply_operations(operations: list[dict], atomic: bool = True) -> dict:
+    """
+    Apply a list of create/update/delete operations in one transaction.
+
+    All referenced users are loaded up front with a single query. In atomic
+    mode the first failing operation rolls back the whole batch and the
+    remaining operations are skipped. Otherwise every operation runs in its
+    own savepoint, so failures are rolled back individually and the
+    successful operations are committed together.
+    """
+    users = User.get_by_ids(
+        list(
+            {operation["id"] for operation in operations if operation["op"] != "create"}
+        )
+    )
+    results = []
+
+    for index, operation in enumerate(operations):
+        savepoint = None if atomic else db.session.begin_nested()
+        result = _apply(operation, users)
+        failed = result["status"] >= 400
+
+        if savepoint is not None:
+            if failed:
+                savepoint.rollback()
+            else:
+                savepoint.commit()
+
+        results.append({"index": index, "op": operation["op"], **result})
+
+        if atomic and failed:
+            db.session.rollback()
+            return {"atomic": atomic, "committed": False, "results": results}
+
+    db.session.commit()
+
+    return {"atomic": atomic, "committed": True, "results": results}
@@ -0,0 +1,306 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from typing import Iterable
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapper
+
+from app.app import db
+from app.health import register_readiness_check
+from app.metrics import register_metrics
+from app.models import User, UserChange
+
+# Changes before the newest one seen by a build that are synced again, in case
+# their transactions had not committed yet when the users were read.
+BUILD_SYNC_LOOKBACK = 1000
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Membership tests never give false negatives; false positives occur at
+    roughly ``false_positive_rate`` once ``capacity`` items have been added.
+    Items cannot be removed, so the filter is rebuilt to forget them.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(
+            8,
+            math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2),
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """Derive the bit positions of an item from one digest (double hashing)."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter."""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """Check whether the item may have been added."""
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bit array."""
+        return len(self._bits)
+
+
+class _EmailIndex:
+    """Bloom filter of live user emails for one app, and the thread refreshing it."""
+
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.false_positive_rate = app.config["EMAIL_BLOOM_FALSE_POSITIVE_RATE"]
+        self.min_capacity = app.config["EMAIL_BLOOM_MIN_CAPACITY"]
+        self.build_batch_size = app.config["EMAIL_BLOOM_BUILD_BATCH_SIZE"]
+        self.rebuild_interval = app.config["EMAIL_BLOOM_REBUILD_INTERVAL"]
+        self.sync_interval = app.config["EMAIL_BLOOM_SYNC_INTERVAL"]
+        self.gap_timeout = app.config["CHANGE_LOG_GAP_TIMEOUT"]
+        self.bloom: BloomFilter | None = None
+        self.last_seq = 0
+        # Missing sequence numbers below ``last_seq``, with when they were seen.
+        self._gaps: dict[int, float] = {}
+        self.built_at = 0.0
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stopped = threading.Event()
+        self._checks = 0
+        self._negatives = 0
+        self._builds = 0
+
+    def might_exist(self, email: str) -> bool:
+        """Check the current filter; True while it has not been built yet."""
+        self._ensure_refresher()
+        bloom = self.bloom
+        self._checks += 1
+
+        if bloom is None or email in bloom:
+            return True
+
+        self._negatives += 1
+        return False
+
+    def add(self, email: str) -> None:
+        """Record an email written by this worker before other workers see it."""
+        if self.bloom is not None:
+            self.bloom.add(email)
+
+    def warm(self) -> str | None:
+        """Start building the filter if needed, for the readiness probe."""
+        self._ensure_refresher()
+        return "filter is being built" if self.bloom is None else None
+
+    def refresh(self) -> None:
+        """Rebuild or sync the filter if due; needs an app context."""
+        with self._refresh_lock:
+            now = time.monotonic()
+
+            if self.bloom is None or now - self.built_at >= self.rebuild_interval:
+                self._build()
+            elif now - self.synced_at >= self.sync_interval:
+                self._sync()
+
+    def stop(self) -> None:
+        """Stop the refresher thread of this process."""
+        self._stopped.set()
+
+    def _ensure_refresher(self) -> None:
+        """Start the refresher in this process, also after a fork."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="email-filter", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Refresh the filter whenever it is due until the process exits."""
+        while not self._stopped.is_set():
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception:
+                self.app.logger.exception("Failed to refresh the email filter")
+
+            self._stopped.wait(self._next_refresh_in())
+
+    def _next_refresh_in(self) -> float:
+        """Seconds until the next sync or rebuild is due."""
+        if self.bloom is None:
+            return self.sync_interval
+
+        due = min(
+            self.built_at + self.rebuild_interval, self.synced_at + self.sync_interval
+        )
+        return max(0.0, due - time.monotonic())
+
+    def _build(self) -> None:
+        """Build a new filter from all live emails, streaming them in batches."""
+        last_seq = db.session.scalar(select(func.max(UserChange.seq))) or 0
+        live = User.deleted_at.is_(None)
+        # Summed, as sharded sessions return one count per shard.
+        count = sum(db.session.scalars(select(func.count()).where(live)))
+        bloom = BloomFilter(max(self.min_capacity, 2 * count), self.false_positive_rate)
+
+        result = db.session.execute(
+            select(User.email)
+            .where(live)
+            .execution_options(yield_per=self.build_batch_size)
+        )
+
+        for partition in result.scalars().partitions():
+            for email in partition:
+                bloom.add(email)
+
+        self.bloom = bloom
+        self.last_seq = max(0, last_seq - BUILD_SYNC_LOOKBACK)
+        self._gaps = {}
+        self.built_at = self.synced_at = time.monotonic()
+        self._builds += 1
+        self._sync()
+
+    def _sync(self) -> None:
+        """
+        Add emails written by any worker since the last sync, via the change log.
+
+        Sequence numbers are taken before commit, so a change may become
+        visible after later ones. Numbers skipped so far are checked again on
+        every sync until ``CHANGE_LOG_GAP_TIMEOUT`` passes, after which their
+        transaction is assumed to have rolled back.
+        """
+        now = time.monotonic()
+        self._gaps = {
+            seq: seen
+            for seq, seen in self._gaps.items()
+            if now - seen < self.gap_timeout
+        }
+        criteria = UserChange.seq > self.last_seq
+
+        if self._gaps:
+            criteria = or_(criteria, UserChange.seq.in_(list(self._gaps)))
+
+        changes = db.session.execute(
+            select(UserChange.seq, UserChange.user_id, UserChange.op)
+            .where(criteria)
+            .order_by(UserChange.seq)
+        ).all()
+        user_ids = set()
+
+        for seq, user_id, op in changes:
+            if seq > self.last_seq:
+                self._gaps.update(dict.fromkeys(range(self.last_seq + 1, seq), now))
+                self.last_seq = seq
+            else:
+                self._gaps.pop(seq, None)
+
+            if op != UserChange.DELETE:
+                user_ids.add(user_id)
+
+        if user_ids:
+            # Not joined, as in sharded mode users live on other databases.
+            for email in db.session.scalars(
+                select(User.email).where(User._id_in(list(user_ids)))
+            ):
+                self.bloom.add(email)
+
+        self.synced_at = now
+
+    def stats(self) -> dict[str, int | float]:
+        """Return the filter size, check counters and unfilled sequence gaps."""
+        bloom = self.bloom
+        return {
+            "emails": bloom.count if bloom is not None else 0,
+            "memory_bytes": bloom.memory_bytes if bloom is not None else 0,
+            "builds": self._builds,
+            "pending_gaps": len(self._gaps),
+            "checks": self._checks,
+            "negatives": self._negatives,
+        }
+
+
+class EmailFilter:
+    """
+    Per-worker Bloom filter answering "is this email definitely not taken?".
+
+    A background thread of each worker builds the filter from the users table
+    on first use and rebuilds it every ``EMAIL_BLOOM_REBUILD_INTERVAL`` seconds
+    to forget deleted emails. In between, it picks up emails written by other
+    workers from the change log every ``EMAIL_BLOOM_SYNC_INTERVAL`` seconds,
+    and emails written by this worker are added as soon as they are flushed.
+    Requests only read the current filter: a negative answer is served without
+    touching the database; a positive one, or any answer before the first
+    build, must be confirmed by a query.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Set up the filter for the app and keep it updated on writes."""
+        if not app.config["EMAIL_BLOOM_ENABLED"]:
+            return
+
+        index = app.extensions["email_filter"] = _EmailIndex(app)
+        register_metrics(app, "email_filter", index.stats)
+        register_readiness_check(app, "email_filter", index.warm)
+
+        if not event.contains(User, "after_insert", _record_email):
+            event.listen(User, "after_insert", _record_email)
+            event.listen(User, "after_update", _record_email)
+
+    def might_exist(self, email: str) -> bool:
+        """
+        Check whether a live user may have the given email.
+
+        Returns True when the filter is disabled, so callers fall back to a
+        database query.
+        """
+        index = current_app.extensions.get("email_filter")
+        return index is None or index.might_exist(email)
+
+
+def _record_email(mapper: Mapper, connection: Connection, user: User) -> None:
+    """Add the email of a user written through the ORM to the app's filter."""
+    if not has_app_context():
+        return
+
+    index = current_app.extensions.get("email_filter")
+
+    if index is not None:
+        index.add(user.email)
+
+
+email_filter = EmailFilter()
@@ -0,0 +1,220 @@
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+docs_cli = AppGroup("docs", help="Manage the OpenAPI documentation.")
+idempotency_cli = AppGroup("idempotency", help="Manage stored idempotency keys.")
+users_cli = AppGroup("users", help="Maintain user records.")
+
+
+@docs_cli.command("export-spec")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="File to write the spec to (defaults to API_SPEC_PATH or openapi.json).",
+)
+def export_spec(output: str | None) -> None:
+    """Render the OpenAPI spec to a static file."""
+    if not current_app.config["API_DOCS_ENABLED"]:
+        raise click.UsageError("API docs are disabled (API_DOCS_ENABLED=false)")
+
+    from app.api import api
+
+    output = output or current_app.config["API_SPEC_PATH"] or "openapi.json"
+
+    with current_app.test_request_context():
+        spec = api.__schema__
+
+    if "error" in spec:
+        raise click.ClickException(spec["error"])
+
+    Path(output).write_text(json.dumps(spec, indent=2, sort_keys=True), "utf-8")
+    click.echo(f"OpenAPI spec written to {output}")
+
+
+@idempotency_cli.command("purge")
+@click.option(
+    "--ttl",
+    type=int,
+    default=None,
+    help="Age in seconds after which keys are removed (defaults to "
+    "IDEMPOTENCY_KEY_TTL).",
+)
+def purge_idempotency_keys(ttl: int | None) -> None:
+    """Delete expired idempotency keys."""
+    from app.idempotency import purge_expired_keys
+
+    ttl = current_app.config["IDEMPOTENCY_KEY_TTL"] if ttl is None else ttl
+    removed = purge_expired_keys(ttl)
+    click.echo(f"Removed {removed} expired idempotency keys")
+
+
+@users_cli.command("delete")
+@click.option("--ids", default=None, help="Comma-separated list of user IDs.")
+@click.option(
+    "--created-before",
+    default=None,
+    help="Delete users created before this ISO 8601 timestamp.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Users deleted per transaction (defaults to BULK_DELETE_CHUNK_SIZE).",
+)
+def delete_users(
+    ids: str | None, created_before: str | None, chunk_size: int | None
+) -> None:
+    """Delete users in chunks by ID list and/or creation time."""
+    from app.models import User
+    from app.params import parse_datetime, parse_id_list
+
+    if ids is None and created_before is None:
+        raise click.UsageError("Either --ids or --created-before must be provided")
+
+    try:
+        user_ids = parse_id_list(ids) if ids is not None else None
+        before = parse_datetime(created_before) if created_before is not None else None
+    except ValueError as error:
+        raise click.BadParameter(str(error)) from None
+
+    deleted = User.bulk_delete(
+        user_ids=user_ids,
+        created_before=before,
+        chunk_size=chunk_size or current_app.config["BULK_DELETE_CHUNK_SIZE"],
+        progress=lambda total: click.echo(f"Deleted {total} users so far..."),
+    )
+    click.echo(f"Deleted {deleted} users")
+
+
+@users_cli.command("purge-deleted")
+@click.option(
+    "--older-than-days",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Purge users deleted more than this many days ago (defaults to "
+    "SOFT_DELETE_RETENTION_DAYS).",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Tombstones removed per transaction (defaults to PURGE_BATCH_SIZE).",
+)
+def purge_deleted_users(older_than_days: int | None, batch_size: int | None) -> None:
+    """Permanently remove old tombstones of deleted users."""
+    from app.models import User
+
+    if older_than_days is None:
+        older_than_days = current_app.config["SOFT_DELETE_RETENTION_DAYS"]
+
+    purged = User.purge_deleted(
+        deleted_before=datetime.now(UTC) - timedelta(days=older_than_days),
+        batch_size=batch_size or current_app.config["PURGE_BATCH_SIZE"],
+        progress=lambda total: click.echo(f"Purged {total} users so far..."),
+    )
+    click.echo(f"Purged {purged} deleted users")
+
+
+@users_cli.command("export")
+@click.argument("output", type=click.File("wb"))
+def export_users(output) -> None:
+    """Export live users to OUTPUT ("-" for stdout) with binary COPY."""
+    from app.postgres import UnsupportedDriverError, copy_users_out
+
+    try:
+        exported = copy_users_out(output)
+    except UnsupportedDriverError as error:
+        raise click.UsageError(str(error)) from None
+
+    click.echo(f"Exported {exported} users", err=True)
+
+
+@users_cli.command("import")
+@click.argument("source", type=click.File("rb"))
+def import_users(source) -> None:
+    """Import users exported with "flask users export" in one transaction."""
+    from app.app import db
+    from app.postgres import UnsupportedDriverError, copy_users_in
+
+    try:
+        imported = copy_users_in(source)
+    except UnsupportedDriverError as error:
+        raise click.UsageError(str(error)) from None
+
+    db.session.commit()
+    click.echo(f"Imported {imported} users")
+
+
+@users_cli.command("seed")
+@click.option(
+    "--count", type=click.IntRange(min=1), required=True, help="Users to create."
+)
+@click.option(
+    "--start",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Index of the first generated user; pick a new range to add more users.",
+)
+@click.option("--seed", type=int, default=0, help="Seed for names and timestamps.")
+@click.option(
+    "--days",
+    type=click.IntRange(min=1),
+    default=365,
+    help="Days over which creation times are spread.",
+)
+@click.option(
+    "--until",
+    default=None,
+    help="ISO 8601 creation time of the newest user (defaults to the start of "
+    "the current UTC day).",
+)
+@click.option("--password", default="Password123", help="Password shared by all users.")
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="Users inserted per transaction.",
+)
+def seed_synthetic_users(
+    count: int,
+    start: int,
+    seed: int,
+    days: int,
+    until: str | None,
+    password: str,
+    chunk_size: int,
+) -> None:
+    """Create deterministic synthetic users for load testing."""
+    from app.params import parse_datetime
+    from app.seed import seed_users
+
+    try:
+        newest = (
+            parse_datetime(until)
+            if until
+            else datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error)) from None
+
+    try:
+        created = seed_users(
+            count,
+            password,
+            newest,
+            start=start,
+            seed=seed,
+            days=days,
+            chunk_size=chunk_size,
+            progress=lambda total: click.echo(f"Created {total} users so far..."),
+        )
+    except RuntimeError as error:
+        raise click.UsageError(str(error)) from None
+
+    click.echo(f"Created {created} users")
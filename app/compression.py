@@ -0,0 +1,245 @@
+import threading
+import zlib
+from typing import Iterable, Iterator, Protocol
+
+from flask import Flask, Response, request
+
+from app.metrics import register_metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Streamed bodies are flushed to the client whenever this much uncompressed
+# data has been produced since the last flush. Flushing after every small
+# chunk would hurt the compression ratio of row-by-row generators.
+STREAM_FLUSH_SIZE = 16 * 1024
+
+
+class _Encoder(Protocol):
+    """Incremental compressor for one response body."""
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Feed a chunk and return whatever output is ready."""
+
+    def flush(self) -> bytes:
+        """Return all pending output without ending the stream."""
+
+    def finish(self) -> bytes:
+        """End the stream and return the remaining output."""
+
+
+class _GzipEncoder:
+    """Gzip stream built on zlib."""
+
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    """Brotli stream, available when the ``brotli`` package is installed."""
+
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    """Zstandard stream, available when the ``zstandard`` package is installed."""
+
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encoders() -> dict[str, type]:
+    """Return the encoders that can be used, most preferred first."""
+    encoders = {}
+
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+
+    encoders["gzip"] = _GzipEncoder
+    return encoders
+
+
+class Compression:
+    """
+    Compress responses with the best encoding the client accepts.
+
+    Buffered responses smaller than ``COMPRESSION_MIN_SIZE`` are sent as is.
+    Streamed responses are compressed chunk by chunk and flushed regularly,
+    so clients receive data while it is produced and the body is never held
+    in memory as a whole.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self.encoders: dict[str, type] = {}
+        self.levels: dict[str, int] = {}
+        self.min_size = 1024
+        self.mimetypes: set[str] = set()
+        self._lock = threading.Lock()
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._responses: dict[str, int] = {}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Read the settings and register the response hook."""
+        app.extensions["compression"] = self
+
+        if not app.config["COMPRESSION_ENABLED"]:
+            return
+
+        self.encoders = available_encoders()
+        self.levels = app.config["COMPRESSION_LEVELS"]
+        self.min_size = app.config["COMPRESSION_MIN_SIZE"]
+        self.mimetypes = set(app.config["COMPRESSION_MIMETYPES"])
+        self._responses = dict.fromkeys(self.encoders, 0)
+
+        app.after_request(self._compress)
+        register_metrics(app, "compression", self.stats)
+
+    def negotiate(self) -> str | None:
+        """Pick the encoding for the current request, or None to send identity."""
+        accepted = request.accept_encodings
+        best, best_quality = None, 0.0
+
+        for encoding in self.encoders:
+            quality = accepted[encoding]
+
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+
+        return best
+
+    def _is_compressible(self, response: Response) -> bool:
+        """Check whether the response may be encoded at all."""
+        return (
+            request.method != "HEAD"
+            and 200 <= response.status_code < 300
+            and response.status_code not in (204, 206)
+            and not response.direct_passthrough
+            and "Content-Encoding" not in response.headers
+            and response.mimetype in self.mimetypes
+        )
+
+    def _compress(self, response: Response) -> Response:
+        """Encode the response body if the client accepts a known encoding."""
+        if not self._is_compressible(response):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        if not response.is_streamed and len(response.get_data()) < self.min_size:
+            return response
+
+        encoding = self.negotiate()
+
+        if encoding is None:
+            return response
+
+        encoder = self.encoders[encoding](self.levels[encoding])
+
+        if response.is_streamed:
+            response.response = self._stream(encoding, encoder, response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            compressed = encoder.compress(body) + encoder.finish()
+            response.set_data(compressed)
+            self._count(encoding, len(body), len(compressed))
+
+        response.headers["Content-Encoding"] = encoding
+
+        # The encoded body is a different representation of the resource.
+        etag, weak = response.get_etag()
+
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def _stream(
+        self, encoding: str, encoder: _Encoder, chunks: Iterable
+    ) -> Iterator[bytes]:
+        """Compress a streamed body chunk by chunk."""
+        bytes_in = bytes_out = pending = 0
+
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+
+                data = encoder.compress(chunk)
+                bytes_in += len(chunk)
+                pending += len(chunk)
+
+                if pending >= STREAM_FLUSH_SIZE:
+                    data += encoder.flush()
+                    pending = 0
+
+                if data:
+                    bytes_out += len(data)
+                    yield data
+
+            data = encoder.finish()
+            bytes_out += len(data)
+            yield data
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+            self._count(encoding, bytes_in, bytes_out)
+
+    def _count(self, encoding: str, bytes_in: int, bytes_out: int) -> None:
+        """Track an encoded response and its body size before and after."""
+        with self._lock:
+            self._responses[encoding] += 1
+            self._bytes_in += bytes_in
+            self._bytes_out += bytes_out
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        """Return the number of encoded responses and the body sizes."""
+        with self._lock:
+            return {
+                "responses": dict(self._responses),
+                "bytes_in": self._bytes_in,
+                "bytes_out": self._bytes_out,
+            }
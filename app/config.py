@@ -11,11 +11,133 @@ class Config:
     DB_HOST: str = os.getenv("POSTGRES_HOST")
     DB_PORT: str = os.getenv("POSTGRES_PORT")
     DB_NAME: str = os.getenv("POSTGRES_DB")
+    # "psycopg2" or "psycopg" (psycopg 3, with server-side prepared statements).
+    DB_DRIVER: str = os.getenv("POSTGRES_DRIVER", "psycopg2")
+    # Executions of the same query before psycopg 3 prepares it on the server;
+    # "none" disables prepared statements, e.g. behind PgBouncer in
+    # transaction pooling mode.
+    DB_PREPARE_THRESHOLD: int | None = (
+        None
+        if os.getenv("POSTGRES_PREPARE_THRESHOLD", "5").lower() == "none"
+        else int(os.getenv("POSTGRES_PREPARE_THRESHOLD", "5"))
+    )
 
     SQLALCHEMY_DATABASE_URI: str = (
-        f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        f"postgresql+{DB_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}"
+        f"/{DB_NAME}"
+    )
+    SQLALCHEMY_ENGINE_OPTIONS: dict = (
+        {"connect_args": {"prepare_threshold": DB_PREPARE_THRESHOLD}}
+        if DB_DRIVER == "psycopg"
+        else {}
     )
     SQLALCHEMY_TRACK_MODIFICATIONS: bool = False
 
+    API_DOCS_ENABLED: bool = os.getenv("API_DOCS_ENABLED", "True").lower() == "true"
+    API_SPEC_PATH: str | None = os.getenv("API_SPEC_PATH")
+    API_SPEC_MAX_AGE: int = int(os.getenv("API_SPEC_MAX_AGE", "86400"))
+
+    SHARD_DATABASE_URIS: list[str] = [
+        uri.strip()
+        for uri in os.getenv("SHARD_DATABASE_URIS", "").split(",")
+        if uri.strip()
+    ]
+    SHARD_WORKER_ID: int | None = (
+        int(os.environ["SHARD_WORKER_ID"]) if "SHARD_WORKER_ID" in os.environ else None
+    )
+
+    BATCH_MAX_OPERATIONS: int = int(os.getenv("BATCH_MAX_OPERATIONS", "1000"))
+    BULK_DELETE_CHUNK_SIZE: int = int(os.getenv("BULK_DELETE_CHUNK_SIZE", "1000"))
+    LOOKUP_MAX_KEYS: int = int(os.getenv("LOOKUP_MAX_KEYS", "1000"))
+    LIST_PAGE_MAX_LIMIT: int = int(os.getenv("LIST_PAGE_MAX_LIMIT", "1000"))
+    BULK_DELETE_MAX_IDS: int = int(os.getenv("BULK_DELETE_MAX_IDS", "10000"))
+    SOFT_DELETE_RETENTION_DAYS: int = int(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30"))
+    PURGE_BATCH_SIZE: int = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+    COPY_CHUNK_SIZE: int = int(os.getenv("COPY_CHUNK_SIZE", str(1024 * 1024)))
+    CHANGE_FEED_MAX_LIMIT: int = int(os.getenv("CHANGE_FEED_MAX_LIMIT", "1000"))
+    # Seconds a gap in change sequence numbers may still be filled by a
+    # transaction that took its number earlier but commits later.
+    CHANGE_LOG_GAP_TIMEOUT: float = float(os.getenv("CHANGE_LOG_GAP_TIMEOUT", "60"))
+    SINGLE_FLIGHT_ENABLED: bool = (
+        os.getenv("SINGLE_FLIGHT_ENABLED", "True").lower() == "true"
+    )
+    SINGLE_FLIGHT_TIMEOUT: float = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "5.0"))
+    ADMISSION_CONTROL_ENABLED: bool = (
+        os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"
+    )
+    ADMISSION_LIMITS: dict[str, int] = {
+        "write": int(os.getenv("ADMISSION_WRITE_LIMIT", "8")),
+        "list": int(os.getenv("ADMISSION_LIST_LIMIT", "4")),
+        "lookup": int(os.getenv("ADMISSION_LOOKUP_LIMIT", "64")),
+    }
+    ADMISSION_TARGET_LATENCIES: dict[str, float] = {
+        "write": float(os.getenv("ADMISSION_WRITE_TARGET_LATENCY", "0.5")),
+        "list": float(os.getenv("ADMISSION_LIST_TARGET_LATENCY", "1.0")),
+        "lookup": float(os.getenv("ADMISSION_LOOKUP_TARGET_LATENCY", "0.05")),
+    }
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.1"))
+    ADMISSION_ADAPTIVE: bool = (
+        os.getenv("ADMISSION_ADAPTIVE", "False").lower() == "true"
+    )
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+    EMAIL_BLOOM_ENABLED: bool = (
+        os.getenv("EMAIL_BLOOM_ENABLED", "True").lower() == "true"
+    )
+    EMAIL_BLOOM_FALSE_POSITIVE_RATE: float = float(
+        os.getenv("EMAIL_BLOOM_FALSE_POSITIVE_RATE", "0.01")
+    )
+    EMAIL_BLOOM_MIN_CAPACITY: int = int(os.getenv("EMAIL_BLOOM_MIN_CAPACITY", "100000"))
+    EMAIL_BLOOM_BUILD_BATCH_SIZE: int = int(
+        os.getenv("EMAIL_BLOOM_BUILD_BATCH_SIZE", "10000")
+    )
+    EMAIL_BLOOM_REBUILD_INTERVAL: int = int(
+        os.getenv("EMAIL_BLOOM_REBUILD_INTERVAL", "3600")
+    )
+    EMAIL_BLOOM_SYNC_INTERVAL: float = float(
+        os.getenv("EMAIL_BLOOM_SYNC_INTERVAL", "5")
+    )
+    COMPRESSION_ENABLED: bool = (
+        os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    )
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_LEVELS: dict[str, int] = {
+        "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+        "br": int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")),
+        "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+    }
+    COMPRESSION_MIMETYPES: list[str] = [
+        "application/json",
+        "application/msgpack",
+        "application/x-msgpack",
+        "application/x-ndjson",
+        "text/csv",
+        "text/html",
+        "text/plain",
+    ]
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "console")
+    TRACING_SAMPLE_RATE: float = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    TRACING_SERVICE_NAME: str = os.getenv("OTEL_SERVICE_NAME", "user-management-api")
+    AUDIT_ENABLED: bool = os.getenv("AUDIT_ENABLED", "True").lower() == "true"
+    AUDIT_SINK: str = os.getenv("AUDIT_SINK", "table")
+    AUDIT_FILE_PATH: str = os.getenv("AUDIT_FILE_PATH", "user_audit.jsonl")
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+    AUDIT_OVERFLOW: str = os.getenv("AUDIT_OVERFLOW", "block")
+    AUDIT_ENQUEUE_TIMEOUT: float = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "1.0"))
+    AUDIT_SHUTDOWN_TIMEOUT: float = float(os.getenv("AUDIT_SHUTDOWN_TIMEOUT", "5.0"))
+    IDEMPOTENCY_KEY_TTL: int = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+    IDEMPOTENCY_LOCK_TIMEOUT: int = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60"))
+
     if TESTING:
         SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        # Minimum bcrypt cost, so hashing does not dominate test run time.
+        BCRYPT_LOG_ROUNDS = 4
+        # The writer thread would share the single in-memory SQLite connection.
+        AUDIT_ENABLED = False
+        # So would the thread refreshing the email filter.
+        EMAIL_BLOOM_ENABLED = False
+        # Rolled-back test transactions leave gaps in PostgreSQL sequences.
+        CHANGE_LOG_GAP_TIMEOUT = 0.0
@@ -0,0 +1,96 @@
+from typing import Callable, Iterator
+
+from flask import Blueprint, Flask, current_app, jsonify
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.app import db
+from app.sharding import current_router
+
+health_bp = Blueprint("health", __name__)
+
+
+def register_readiness_check(
+    app: Flask, name: str, check: Callable[[], str | None]
+) -> None:
+    """
+    Run ``check`` on /readyz under ``name``.
+
+    The check returns None when ready, or a short reason why not.
+    """
+    app.extensions.setdefault("readiness_checks", {})[name] = check
+
+
+def _connections() -> Iterator[Connection]:
+    """Connections of the current session to every database the app uses."""
+    router = current_router()
+
+    if router is None:
+        yield db.session.connection()
+        return
+
+    for shard in router.shards:
+        yield db.session.connection(bind_arguments={"shard_id": shard})
+
+
+def _check_database() -> str | None:
+    """Check out a pooled connection to every database and run a trivial query."""
+    try:
+        for connection in _connections():
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError as error:
+        db.session.rollback()
+        return f"unreachable: {error.__class__.__name__}"
+
+    return None
+
+
+def _check_migrations() -> str | None:
+    """
+    Check that every database is at the migration head.
+
+    Once it is, the result is remembered for the life of the worker, as
+    migrations only move forward while it runs.
+    """
+    if current_app.extensions.get("migrations_at_head"):
+        return None
+
+    from app.schema_migrations import pending_migrations
+
+    for connection in _connections():
+        if (pending := pending_migrations(connection)) is not None:
+            return pending
+
+    current_app.extensions["migrations_at_head"] = True
+    return None
+
+
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    """Report that the process is alive, without touching the database."""
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    """
+    Report whether this worker can serve traffic.
+
+    The other checks need the database, so they are skipped while it is down.
+    """
+    results = {"database": _check_database()}
+
+    if results["database"] is None:
+        checks = {
+            "migrations": _check_migrations,
+            **current_app.extensions.get("readiness_checks", {}),
+        }
+        results |= {name: check() for name, check in checks.items()}
+
+    ready = all(result is None for result in results.values())
+    body = {
+        "status": "ready" if ready else "unavailable",
+        "checks": {name: result or "ok" for name, result in results.items()},
+    }
+    return jsonify(body), 200 if ready else 503
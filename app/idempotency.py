@@ -0,0 +1,188 @@
+import hashlib
+from datetime import UTC, datetime, timedelta
+from functools import wraps
+from typing import Callable
+
+from flask import Response, current_app, jsonify, request
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from app.app import db
+from app.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint() -> str:
+    """Return a hash identifying the method, path and body of the current request."""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(request.path.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _expiry_cutoff(ttl: int) -> datetime:
+    """Return the creation time before which stored keys are considered expired."""
+    return datetime.now(UTC) - timedelta(seconds=ttl)
+
+
+def _is_expired(record: IdempotencyKey) -> bool:
+    """
+    Check whether a stored key can be claimed again.
+
+    Completed keys expire after ``IDEMPOTENCY_KEY_TTL``. Keys still in progress
+    after ``IDEMPOTENCY_LOCK_TIMEOUT`` were left by a worker that died before
+    finishing the request, so they are taken over by the next retry.
+    """
+    created_at = record.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+
+    if record.is_completed:
+        ttl = current_app.config["IDEMPOTENCY_KEY_TTL"]
+    else:
+        ttl = current_app.config["IDEMPOTENCY_LOCK_TIMEOUT"]
+
+    return created_at < _expiry_cutoff(ttl)
+
+
+def _claim(key: str, fingerprint: str) -> IdempotencyKey | None:
+    """
+    Reserve the key for the current request.
+
+    Returns None when the key was claimed, otherwise the record left by an
+    earlier request with the same key.
+    """
+    try:
+        db.session.add(IdempotencyKey(key=key, fingerprint=fingerprint))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    record = db.session.get(IdempotencyKey, key)
+
+    if record is None:
+        return _claim(key, fingerprint)
+
+    if _is_expired(record):
+        # Only the record seen here is removed, so of two requests taking
+        # over the same key, the later one cannot delete the earlier claim.
+        db.session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.created_at == record.created_at,
+            )
+        )
+        db.session.commit()
+        return _claim(key, fingerprint)
+
+    return record
+
+
+def _release(key: str) -> None:
+    """Forget a claimed key so that the request can be retried."""
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+    db.session.commit()
+
+
+def _store(key: str, response: Response) -> None:
+    """Persist the response of a completed request under its key."""
+    db.session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(
+            response_status=response.status_code,
+            response_body=response.get_data(as_text=True),
+        )
+    )
+    db.session.commit()
+
+
+def _replay(record: IdempotencyKey, fingerprint: str) -> Response:
+    """Build the response for a request whose key has already been used."""
+    if record.fingerprint != fingerprint:
+        response = jsonify(
+            {"message": "Idempotency-Key was already used for a different request"}
+        )
+        response.status_code = 422
+        return response
+
+    if not record.is_completed:
+        response = jsonify(
+            {"message": "A request with this Idempotency-Key is already in progress"}
+        )
+        response.status_code = 409
+        response.headers["Retry-After"] = "1"
+        return response
+
+    response = Response(
+        record.response_body,
+        status=record.response_status,
+        mimetype="application/json",
+    )
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view: Callable) -> Callable:
+    """
+    Make a view safe to retry by honouring the ``Idempotency-Key`` header.
+
+    The first request with a given key is executed and its response stored.
+    Replays with the same key and payload return the stored response, while
+    replays arriving before the first request has finished are rejected with
+    409. Server errors are not stored, so the client may retry them.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+
+        if key is None:
+            return view(*args, **kwargs)
+
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            response = jsonify(
+                {
+                    "message": "Idempotency-Key must be between 1 and "
+                    f"{MAX_KEY_LENGTH} characters long"
+                }
+            )
+            response.status_code = 400
+            return response
+
+        fingerprint = request_fingerprint()
+        record = _claim(key, fingerprint)
+
+        if record is not None:
+            return _replay(record, fingerprint)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            _release(key)
+            raise
+
+        if response.status_code >= 500:
+            _release(key)
+        else:
+            _store(key, response)
+
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys(ttl: int) -> int:
+    """Delete keys older than ``ttl`` seconds and return how many were removed."""
+    result = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.created_at < _expiry_cutoff(ttl))
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,17 @@
+from typing import Callable
+
+from flask import Blueprint, Flask, current_app, jsonify
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def register_metrics(app: Flask, name: str, provider: Callable[[], dict]) -> None:
+    """Expose the counters returned by ``provider`` under ``name`` on /metrics."""
+    app.extensions.setdefault("metrics", {})[name] = provider
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Get the in-process counters of this worker."""
+    providers = current_app.extensions.get("metrics", {})
+    return jsonify({name: provider() for name, provider in providers.items()}), 200
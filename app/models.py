@@ -1,25 +1,77 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from typing import Callable, Iterator
 
-from sqlalchemy import String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    ColumnElement,
+    Index,
+    Integer,
+    String,
+    Text,
+    any_,
+    delete,
+    event,
+    insert,
+    inspect,
+    literal,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import (
+    Mapped,
+    Mapper,
+    foreign,
+    mapped_column,
+    relationship,
+    selectinload,
+)
 
 from app.app import bcrypt, db
+from app.audit import stage_audit_events
+from app.sharding import (
+    RELOCATED_FIELDS,
+    email_shard_options,
+    home_connection,
+    id_lookup_options,
+)
+from app.tracing import span
 
 
 class User(db.Model):
     """User model for storing user data."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_email_live",
+            "email",
+            unique=True,
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_users_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+        Index("ix_users_created_at", "created_at"),
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(255), nullable=False)
-    email: Mapped[str] = mapped_column(
-        String(255), unique=True, nullable=False, index=True
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
     )
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
     _password: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now(UTC), nullable=False
     )
+    deleted_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
     def __repr__(self) -> str:
         """Return string representation of the user."""
@@ -33,7 +85,8 @@ class User(db.Model):
     @password.setter
     def password(self, password: str) -> None:
         """Hash and set the user password."""
-        self._password = bcrypt.generate_password_hash(password).decode("utf-8")
+        with span("hash_password"):
+            self._password = bcrypt.generate_password_hash(password).decode("utf-8")
 
     def check_password(self, password: str) -> bool:
         """Check if the provided password matches the stored hash."""
@@ -49,17 +102,364 @@ class User(db.Model):
         new_user.password = password
         return new_user
 
+    @property
+    def is_deleted(self) -> bool:
+        """Whether the user has been soft-deleted."""
+        return self.deleted_at is not None
+
+    def soft_delete(self) -> None:
+        """Mark the user as deleted, leaving a tombstone until it is purged."""
+        self.deleted_at = datetime.now(UTC)
+
     @classmethod
     def get_all(cls) -> list["User"]:
-        """Get all users."""
-        return cls.query.all()
+        """Get all users that are not deleted."""
+        return list(db.session.scalars(select(cls).where(cls.deleted_at.is_(None))))
 
     @classmethod
     def get_by_id(cls, user_id: int) -> "User | None":
-        """Get user by ID."""
-        return cls.query.get(user_id)
+        """
+        Get user by ID, ignoring deleted users.
+
+        Users already loaded in the current session are returned from the
+        identity map without querying the database again. In sharded mode the
+        shard recorded in the ID is queried, then all shards in case the user
+        has since moved to another one.
+        """
+        lookup = id_lookup_options(user_id)
+        user = db.session.get(cls, user_id, **lookup)
+
+        if user is None and lookup:
+            user = db.session.scalars(select(cls).where(cls.id == user_id)).first()
+
+        return user if user is not None and not user.is_deleted else None
 
     @classmethod
     def get_by_email(cls, email: str) -> "User | None":
-        """Get user by email."""
-        return cls.query.filter_by(email=email).first()
+        """Get user by email, ignoring deleted users."""
+        with span("get_by_email"):
+            return db.session.scalars(
+                select(cls)
+                .options(*email_shard_options(email))
+                .where(cls.email == email, cls.deleted_at.is_(None))
+                .limit(1)
+            ).first()
+
+    @classmethod
+    def get_by_ids(cls, user_ids: list[int]) -> dict[int, "User"]:
+        """Get users that are not deleted by a list of IDs, keyed by ID."""
+        if not user_ids:
+            return {}
+
+        users = db.session.scalars(
+            select(cls).where(cls.id.in_(user_ids), cls.deleted_at.is_(None))
+        )
+        return {user.id: user for user in users}
+
+    @classmethod
+    def _id_in(cls, user_ids: list[int]) -> ColumnElement[bool]:
+        """
+        Build an ``id`` membership filter.
+
+        On PostgreSQL the IDs are sent as a single array parameter
+        (``id = ANY(:ids)``), so every chunk reuses the same statement.
+        """
+        if db.session.get_bind().dialect.name == "postgresql":
+            return cls.id == any_(literal(user_ids, ARRAY(BigInteger)))
+
+        return cls.id.in_(user_ids)
+
+    @classmethod
+    def bulk_delete(
+        cls,
+        user_ids: list[int] | None = None,
+        created_before: datetime | None = None,
+        chunk_size: int = 1000,
+        progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """
+        Soft-delete users by ID and/or creation time with set-based statements.
+
+        Rows are updated in chunks of at most ``chunk_size`` IDs, each in its own
+        transaction, so long-running cleanups neither hold locks nor build up a
+        huge transaction. ``progress`` is called with the running total after
+        every chunk. Returns the number of deleted users.
+
+        Raises:
+            ValueError: If neither ``user_ids`` nor ``created_before`` is given,
+                which would delete every user.
+        """
+        if user_ids is None and created_before is None:
+            raise ValueError("Either user_ids or created_before must be given")
+
+        criteria = [cls.deleted_at.is_(None)]
+
+        if created_before is not None:
+            criteria.append(cls.created_at < created_before)
+
+        deleted_at = datetime.now(UTC)
+        deleted = 0
+
+        for chunk in cls._id_chunks(user_ids, criteria, chunk_size):
+            deleted_ids = db.session.scalars(
+                update(cls)
+                .where(cls._id_in(chunk), *criteria)
+                .values(deleted_at=deleted_at)
+                .returning(cls.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            UserChange.record_many(deleted_ids, UserChange.DELETE)
+            db.session.commit()
+
+            deleted += len(deleted_ids)
+
+            if progress is not None:
+                progress(deleted)
+
+        return deleted
+
+    @classmethod
+    def purge_deleted(
+        cls,
+        deleted_before: datetime,
+        batch_size: int = 500,
+        progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """
+        Permanently remove tombstones of users deleted before the given time.
+
+        Tombstones are removed in small batches, each in its own transaction,
+        so purging never competes with live traffic for long-held locks.
+        Returns the number of purged users.
+        """
+        criteria = [cls.deleted_at < deleted_before]
+        purged = 0
+
+        for chunk in cls._id_chunks(None, criteria, batch_size):
+            result = db.session.execute(
+                delete(cls)
+                .where(cls._id_in(chunk), *criteria)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+            purged += result.rowcount
+
+            if progress is not None:
+                progress(purged)
+
+        return purged
+
+    @classmethod
+    def _id_chunks(
+        cls,
+        user_ids: list[int] | None,
+        criteria: list[ColumnElement[bool]],
+        chunk_size: int,
+    ) -> Iterator[list[int]]:
+        """Yield chunks of IDs to process, walking the primary key for filters."""
+        if user_ids is not None:
+            for start in range(0, len(user_ids), chunk_size):
+                end = start + chunk_size
+                yield user_ids[start:end]
+            return
+
+        last_id = 0
+
+        while True:
+            # Sharded sessions concatenate one sorted chunk per shard.
+            chunk = sorted(
+                db.session.scalars(
+                    select(cls.id)
+                    .where(cls.id > last_id, *criteria)
+                    .order_by(cls.id)
+                    .limit(chunk_size)
+                )
+            )[:chunk_size]
+
+            if not chunk:
+                return
+
+            last_id = chunk[-1]
+            yield chunk
+
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a request sent with an ``Idempotency-Key`` header."""
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    response_status: Mapped[int | None] = mapped_column(nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        """Return string representation of the idempotency key."""
+        return f"<IdempotencyKey {self.key}, status: {self.response_status}>"
+
+    @property
+    def is_completed(self) -> bool:
+        """Whether the original request has finished and its response is stored."""
+        return self.response_status is not None
+
+
+class UserChange(db.Model):
+    """
+    Append-only log of user inserts, updates and deletes for incremental sync.
+
+    ``seq`` increases monotonically, so consumers can resume from the last
+    sequence number they have seen. In sharded mode the log is kept on shard 0
+    only, so there is a single sequence for users of every shard.
+    """
+
+    __tablename__ = "user_changes"
+
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), nullable=False
+    )
+    op: Mapped[str] = mapped_column(String(16), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC), nullable=False
+    )
+
+    user: Mapped["User | None"] = relationship(
+        User,
+        primaryjoin=foreign(user_id) == User.id,
+        viewonly=True,
+        lazy="raise",
+    )
+
+    def __repr__(self) -> str:
+        """Return string representation of the change."""
+        return f"<UserChange {self.seq}: {self.op} user {self.user_id}>"
+
+    @classmethod
+    def record(
+        cls,
+        connection: Connection,
+        user_id: int,
+        op: str,
+        fields: list[str] | None = None,
+    ) -> None:
+        """
+        Append a change using the connection of an ongoing flush.
+
+        The change is also staged for the audit log, with the names of the
+        changed ``fields`` when known.
+        """
+        connection.execute(
+            insert(cls.__table__).values(
+                user_id=user_id, op=op, changed_at=datetime.now(UTC)
+            )
+        )
+        stage_audit_events([user_id], op, fields)
+
+    @classmethod
+    def record_many(cls, user_ids: list[int], op: str) -> None:
+        """Append one change per user in the current transaction."""
+        if not user_ids:
+            return
+
+        changed_at = datetime.now(UTC)
+        db.session.execute(
+            insert(cls.__table__),
+            [
+                {"user_id": user_id, "op": op, "changed_at": changed_at}
+                for user_id in user_ids
+            ],
+        )
+        stage_audit_events(user_ids, op)
+
+    @classmethod
+    def get_since(
+        cls, since: int, limit: int, gap_timeout: float = 0.0
+    ) -> list["UserChange"]:
+        """
+        Get up to ``limit`` changes after the given sequence number, in order.
+
+        Sequence numbers are taken before commit, so a missing number may
+        still show up. The page therefore ends before a gap that is followed
+        by a change less than ``gap_timeout`` seconds old; older gaps are
+        left by rolled-back transactions. Users are loaded with a second query
+        rather than a join, as in sharded mode they live on other databases
+        than the log.
+        """
+        changes = db.session.scalars(
+            select(cls)
+            .options(selectinload(cls.user))
+            .where(cls.seq > since)
+            .order_by(cls.seq)
+            .limit(limit)
+        ).all()
+        settled_before = datetime.now(UTC) - timedelta(seconds=gap_timeout)
+        previous = since
+
+        for index, change in enumerate(changes):
+            changed_at = change.changed_at.replace(tzinfo=UTC)
+
+            if change.seq != previous + 1 and changed_at > settled_before:
+                return list(changes[:index])
+
+            previous = change.seq
+
+        return list(changes)
+
+
+@event.listens_for(User, "after_insert")
+def _record_user_insert(mapper: Mapper, connection: Connection, user: User) -> None:
+    """Log users created through the ORM, and users moved to another shard."""
+    moved_fields = inspect(user).info.pop(RELOCATED_FIELDS, None)
+    op = UserChange.INSERT if moved_fields is None else UserChange.UPDATE
+    UserChange.record(home_connection(connection, user), user.id, op, moved_fields)
+
+
+@event.listens_for(User, "after_update")
+def _record_user_update(mapper: Mapper, connection: Connection, user: User) -> None:
+    """Log users updated or soft-deleted through the ORM."""
+    state = inspect(user)
+    fields = [
+        attr.key.lstrip("_")
+        for attr in mapper.column_attrs
+        if state.attrs[attr.key].history.has_changes()
+    ]
+
+    if not fields:
+        return
+
+    deleted = state.attrs.deleted_at.history.added
+    op = UserChange.DELETE if deleted and deleted[0] is not None else UserChange.UPDATE
+    UserChange.record(home_connection(connection, user), user.id, op, fields)
+
+
+class UserAudit(db.Model):
+    """
+    Audit trail entry of a committed user create, update or delete.
+
+    Rows are written in batches by the audit log's background writer, shortly
+    after the change they record was committed.
+    """
+
+    __tablename__ = "user_audit"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    action: Mapped[str] = mapped_column(String(16), nullable=False)
+    fields: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+    trace_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    remote_addr: Mapped[str | None] = mapped_column(String(45), nullable=True)
+    occurred_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    def __repr__(self) -> str:
+        """Return string representation of the audit entry."""
+        return f"<UserAudit {self.id}: {self.action} user {self.user_id}>"
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import msgpack
+from flask import Response, jsonify, request
+from marshmallow import Schema
+
+from app.schemas import native_datetimes
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def response_mimetype() -> str:
+    """
+    Pick the response format from the ``Accept`` header of the current request.
+
+    JSON is the default and wins ties, MessagePack is served to clients that
+    prefer it.
+    """
+    return request.accept_mimetypes.best_match(
+        (JSON_MIMETYPE, *MSGPACK_MIMETYPES), default=JSON_MIMETYPE
+    )
+
+
+def wants_msgpack() -> bool:
+    """Check whether the current request should be answered with MessagePack."""
+    return response_mimetype() in MSGPACK_MIMETYPES
+
+
+@contextmanager
+def serializing() -> Iterator[None]:
+    """Dump schemas within the block in the shape the response format needs."""
+    with native_datetimes(wants_msgpack()):
+        yield
+
+
+def dump(schema: Schema, obj: Any) -> Any:
+    """Serialize ``obj`` with ``schema`` for the negotiated response format."""
+    with serializing():
+        return schema.dump(obj)
+
+
+def respond(data: Any, status: int = 200) -> Response:
+    """
+    Build a response in the negotiated format.
+
+    Returns:
+        Response: MessagePack with native timestamps, or JSON.
+    """
+    mimetype = response_mimetype()
+
+    if mimetype in MSGPACK_MIMETYPES:
+        response = Response(msgpack.packb(data, datetime=True), mimetype=mimetype)
+    else:
+        response = jsonify(data)
+
+    response.status_code = status
+    response.vary.add("Accept")
+    return response
@@ -0,0 +1,305 @@
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any
+
+import sqlalchemy as sa
+from alembic import op
+
+# Alembic's logger is shown at INFO level by migrations/alembic.ini.
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _is_postgresql() -> bool:
+    """Whether the migrations run against, or render SQL for, PostgreSQL."""
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _set_lock_timeout(seconds: float) -> None:
+    """
+    Make the next statements of the transaction give up on waiting for a lock.
+
+    A DDL statement queued behind a long transaction blocks every query that
+    arrives after it, so failing fast and retrying the migration is safer.
+    """
+    if _is_postgresql():
+        op.execute(f"SET LOCAL lock_timeout = '{int(seconds * 1000)}ms'")
+
+
+def create_index_concurrently(
+    index_name: str, table_name: str, columns: list[str], **kwargs: Any
+) -> None:
+    """
+    Create an index without blocking writes to the table.
+
+    On PostgreSQL the index is built with ``CREATE INDEX CONCURRENTLY``, which
+    cannot run in a transaction, so the migration's transaction is committed
+    first. An invalid index left behind by an interrupted build is dropped and
+    built again; a valid one is kept. Other databases use a plain
+    ``CREATE INDEX``.
+    """
+    if not _is_postgresql():
+        op.create_index(index_name, table_name, columns, **kwargs)
+        return
+
+    with op.get_context().autocommit_block():
+        if not op.get_context().as_sql and _is_invalid_index(index_name):
+            op.drop_index(index_name, postgresql_concurrently=True)
+
+        op.create_index(
+            index_name,
+            table_name,
+            columns,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kwargs,
+        )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """Drop an index without blocking queries, like ``create_index_concurrently``."""
+    if not _is_postgresql():
+        op.drop_index(index_name, table_name=table_name)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def _is_invalid_index(index_name: str) -> bool:
+    """Whether an index of that name exists but was never finished."""
+    return bool(
+        op.get_bind().scalar(
+            sa.text(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = indexrelid "
+                "WHERE relname = :name AND NOT indisvalid"
+            ),
+            {"name": index_name},
+        )
+    )
+
+
+def add_column_with_backfill(
+    table_name: str,
+    column: sa.Column,
+    value: Any,
+    batch_size: int = 10000,
+    pause: float = 0.1,
+    lock_timeout: float = 5.0,
+) -> None:
+    """
+    Add a nullable column and fill it in for existing rows in batches.
+
+    Adding a nullable column without a volatile default only changes the
+    catalog, so the table lock is held briefly; ``lock_timeout`` bounds how
+    long it is waited for. The rows are then updated by ``backfill_column``.
+    Make the column ``NOT NULL`` afterwards with ``set_not_null``.
+
+    Raises:
+        ValueError: If the column is not nullable.
+    """
+    if not column.nullable:
+        raise ValueError("Add the column as nullable, then call set_not_null")
+
+    _set_lock_timeout(lock_timeout)
+    op.add_column(table_name, column)
+    backfill_column(table_name, column.name, value, batch_size, pause)
+
+
+def backfill_column(
+    table_name: str,
+    column_name: str,
+    value: Any,
+    batch_size: int = 10000,
+    pause: float = 0.1,
+    key: str = "id",
+) -> None:
+    """
+    Set ``column_name`` to ``value`` where it is NULL, ``batch_size`` rows at a time.
+
+    ``value`` is a Python value or a SQL expression. Batches are ranges of the
+    ``key`` column, with ``pause`` seconds between them to leave room for other
+    traffic. On PostgreSQL each batch is committed on its own, so row locks are
+    held briefly.
+    Progress is logged after every batch. When rendering SQL, a single UPDATE is
+    emitted instead.
+    """
+    table = sa.table(table_name, sa.column(key), sa.column(column_name))
+    update = (
+        sa.update(table)
+        .values({column_name: value})
+        .where(table.c[column_name].is_(None))
+    )
+
+    if op.get_context().as_sql:
+        op.execute(update)
+        return
+
+    if _is_postgresql():
+        batches = op.get_context().autocommit_block()
+    else:
+        batches = nullcontext()
+
+    with batches:
+        connection = op.get_bind()
+        total = estimate_rows(connection, table_name)
+        updated, last = 0, None
+
+        while True:
+            batch = sa.select(table.c[key]).order_by(table.c[key]).limit(batch_size)
+
+            if last is not None:
+                batch = batch.where(table.c[key] > last)
+
+            upper = connection.scalar(sa.select(sa.func.max(batch.subquery().c[key])))
+
+            if upper is None:
+                break
+
+            criteria = [table.c[key] <= upper]
+
+            if last is not None:
+                criteria.append(table.c[key] > last)
+
+            updated += connection.execute(update.where(*criteria)).rowcount
+            last = upper
+            logger.info(
+                "Backfilled %s.%s: %d of ~%d rows",
+                table_name,
+                column_name,
+                updated,
+                max(total, updated),
+            )
+            time.sleep(pause)
+
+
+def set_not_null(table_name: str, column_name: str, lock_timeout: float = 5.0) -> None:
+    """
+    Make a backfilled column ``NOT NULL`` without a long table lock.
+
+    On PostgreSQL a ``NOT VALID`` check constraint is added first and validated
+    without blocking writes; ``SET NOT NULL`` then trusts it instead of scanning
+    the table under an exclusive lock. ``lock_timeout`` bounds the waits for
+    the brief exclusive locks. Other databases alter the column directly.
+    """
+    if not _is_postgresql():
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column(column_name, nullable=False)
+        return
+
+    constraint = f"{table_name}_{column_name}_not_null"
+    _set_lock_timeout(lock_timeout)
+    op.execute(
+        f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint} "
+        f"CHECK ({column_name} IS NOT NULL) NOT VALID"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {constraint}")
+
+    _set_lock_timeout(lock_timeout)
+    op.alter_column(table_name, column_name, nullable=False)
+    op.drop_constraint(constraint, table_name)
+
+
+def widen_to_bigint(
+    table_name: str,
+    column_name: str,
+    key: str = "id",
+    primary_key: str | None = None,
+    sequence: str | None = None,
+    batch_size: int = 10000,
+    pause: float = 0.1,
+    lock_timeout: float = 5.0,
+) -> None:
+    """
+    Change an integer column to ``BIGINT`` without rewriting the table under lock.
+
+    ``ALTER COLUMN ... TYPE`` rewrites a PostgreSQL table and its indexes while
+    holding an exclusive lock. Instead, a ``BIGINT`` copy of the column is
+    added, kept in step with writes by a trigger, backfilled in batches of the
+    ``key`` column and made ``NOT NULL`` with ``set_not_null``. A short
+    transaction then swaps it in for the original column. For a primary key,
+    name its constraint in ``primary_key``: the new unique index is built
+    concurrently first and turned into the constraint. A ``sequence`` feeding
+    the column is widened and moved to the new column. The column must be
+    ``NOT NULL``. Other databases alter the column directly.
+    """
+    if not _is_postgresql():
+        op.alter_column(
+            table_name,
+            column_name,
+            existing_type=sa.Integer(),
+            type_=sa.BigInteger(),
+            existing_nullable=False,
+        )
+        return
+
+    new_column = f"{column_name}_bigint"
+    trigger = f"{table_name}_{new_column}_sync"
+    index_name = f"{table_name}_{new_column}_key"
+
+    _set_lock_timeout(lock_timeout)
+    op.add_column(table_name, sa.Column(new_column, sa.BigInteger(), nullable=True))
+    op.execute(
+        f"CREATE FUNCTION {trigger}() RETURNS trigger LANGUAGE plpgsql AS "
+        f"$$ BEGIN NEW.{new_column} := NEW.{column_name}; RETURN NEW; END $$"
+    )
+    op.execute(
+        f"CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE ON {table_name} "
+        f"FOR EACH ROW EXECUTE FUNCTION {trigger}()"
+    )
+
+    backfill_column(
+        table_name, new_column, sa.column(column_name), batch_size, pause, key=key
+    )
+    set_not_null(table_name, new_column, lock_timeout)
+
+    if primary_key is not None:
+        create_index_concurrently(index_name, table_name, [new_column], unique=True)
+
+    _set_lock_timeout(lock_timeout)
+    op.execute(f"DROP TRIGGER {trigger} ON {table_name}")
+    op.execute(f"DROP FUNCTION {trigger}()")
+
+    if primary_key is not None:
+        op.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT {primary_key}")
+        op.execute(
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {primary_key} "
+            f"PRIMARY KEY USING INDEX {index_name}"
+        )
+
+    if sequence is not None:
+        op.execute(
+            f"ALTER SEQUENCE {sequence} AS bigint OWNED BY {table_name}.{new_column}"
+        )
+        op.alter_column(
+            table_name, new_column, server_default=sa.text(f"nextval('{sequence}')")
+        )
+
+    op.drop_column(table_name, column_name)
+    op.alter_column(table_name, new_column, new_column_name=column_name)
+
+
+def estimate_rows(connection: sa.Connection, table_name: str) -> int:
+    """
+    Estimate the number of rows in a table.
+
+    PostgreSQL's planner statistics are read instead of counting, which would
+    scan the table; other databases count.
+    """
+    if connection.dialect.name == "postgresql":
+        estimate = connection.scalar(
+            sa.text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": table_name},
+        )
+        return max(int(estimate or 0), 0)
+
+    return connection.scalar(
+        sa.select(sa.func.count()).select_from(sa.table(table_name))
+    )
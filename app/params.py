@@ -0,0 +1,133 @@
+from datetime import UTC, datetime
+from typing import Any
+
+# Largest signed 64-bit integer, the range of user IDs and change sequence
+# numbers; larger values overflow the database driver.
+MAX_ID = 2**63 - 1
+
+
+def parse_id_list(value: str, max_items: int | None = None) -> list[int]:
+    """
+    Parse a comma-separated list of user IDs, keeping the first occurrence order.
+
+    Raises:
+        ValueError: If an item is not an integer between 1 and ``MAX_ID`` or
+            there are too many.
+    """
+    user_ids = []
+    seen = set()
+
+    for item in value.split(","):
+        item = item.strip()
+
+        if not item:
+            continue
+
+        if not item.isdigit() or not 1 <= int(item) <= MAX_ID:
+            raise ValueError(f"Invalid user id: {item!r}")
+
+        user_id = int(item)
+
+        if user_id not in seen:
+            seen.add(user_id)
+            user_ids.append(user_id)
+
+    if not user_ids:
+        raise ValueError("At least one user id is required")
+
+    if max_items is not None and len(user_ids) > max_items:
+        raise ValueError(f"At most {max_items} user ids are allowed")
+
+    return user_ids
+
+
+def parse_datetime(value: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp, treating naive values as UTC.
+
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 timestamp.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid ISO 8601 timestamp: {value!r}") from None
+
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=UTC)
+
+    return parsed.astimezone(UTC)
+
+
+def parse_int(
+    value: str | None,
+    name: str,
+    default: int,
+    minimum: int | None = None,
+    maximum: int | None = None,
+) -> int:
+    """
+    Parse an integer query parameter, falling back to a default when missing.
+
+    Without an explicit ``maximum``, values are capped at ``MAX_ID``, as
+    cursors are compared with 64-bit columns.
+
+    Raises:
+        ValueError: If the value is not an integer or is out of range.
+    """
+    if value is None or value == "":
+        return default
+
+    if maximum is None:
+        maximum = MAX_ID
+
+    try:
+        parsed = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+
+    if minimum is not None and parsed < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+
+    if parsed > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+
+    return parsed
+
+
+def parse_lookup_keys(json_data: Any, max_keys: int) -> tuple[list[int], list[str]]:
+    """
+    Parse the ``ids`` and ``emails`` of a lookup request, dropping duplicates.
+
+    Raises:
+        ValueError: If the keys are malformed, missing or too many.
+    """
+    if not isinstance(json_data, dict):
+        raise ValueError("No input data provided")
+
+    ids = json_data.get("ids", [])
+    emails = json_data.get("emails", [])
+
+    if not isinstance(ids, list) or not all(
+        isinstance(user_id, int)
+        and not isinstance(user_id, bool)
+        and 1 <= user_id <= MAX_ID
+        for user_id in ids
+    ):
+        raise ValueError(f"ids must be a list of integers between 1 and {MAX_ID}")
+
+    if not isinstance(emails, list) or not all(
+        isinstance(email, str) and email for email in emails
+    ):
+        raise ValueError("emails must be a list of non-empty strings")
+
+    user_ids = list(dict.fromkeys(ids))
+    user_emails = list(dict.fromkeys(emails))
+
+    if not user_ids and not user_emails:
+        raise ValueError("At least one id or email is required")
+
+    if len(user_ids) + len(user_emails) > max_keys:
+        raise ValueError(f"At most {max_keys} ids and emails are allowed")
+
+    return user_ids, user_emails
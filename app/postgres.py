@@ -0,0 +1,100 @@
+from typing import IO, Any
+
+from flask import current_app
+
+from app.app import db
+from app.sharding import current_router
+
+USER_COPY_COLUMNS = "id, name, email, _password, created_at"
+
+
+class UnsupportedDriverError(RuntimeError):
+    """Raised when an operation needs the psycopg 3 driver."""
+
+
+def psycopg_connection() -> Any:
+    """
+    Return the psycopg 3 connection behind the current session.
+
+    The connection takes part in the session's transaction, so statements sent
+    through it are committed or rolled back with the session.
+
+    Raises:
+        UnsupportedDriverError: If the database is not PostgreSQL accessed
+            through psycopg 3, or the app is sharded.
+    """
+    if current_router() is not None:
+        raise UnsupportedDriverError("COPY is not supported in sharded mode")
+
+    connection = db.session.connection()
+    dialect = connection.dialect
+
+    if (dialect.name, dialect.driver) != ("postgresql", "psycopg"):
+        raise UnsupportedDriverError(
+            "Binary COPY requires PostgreSQL with POSTGRES_DRIVER=psycopg"
+        )
+
+    return connection.connection.driver_connection
+
+
+def copy_users_out(target: IO[bytes]) -> int:
+    """
+    Stream all live users to ``target`` in PostgreSQL's binary COPY format.
+
+    Returns the number of exported users.
+    """
+    connection = psycopg_connection()
+
+    with connection.cursor() as cursor:
+        with cursor.copy(
+            f"COPY (SELECT {USER_COPY_COLUMNS} FROM users "
+            "WHERE deleted_at IS NULL ORDER BY id) TO STDOUT (FORMAT BINARY)"
+        ) as copy:
+            for data in copy:
+                target.write(data)
+
+        return cursor.rowcount
+
+
+def copy_users_in(source: IO[bytes]) -> int:
+    """
+    Load users exported by ``copy_users_out`` in the current transaction.
+
+    Rows are copied into a temporary staging table first. The follow-up
+    statements (insert into ``users``, change log, ID sequence) are then sent
+    in a single pipeline, so they cost one round trip instead of three. A
+    duplicate ID or email fails the whole import. Returns the number of
+    imported users.
+    """
+    connection = psycopg_connection()
+    chunk_size = current_app.config["COPY_CHUNK_SIZE"]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE users_import "
+            "(LIKE users INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+
+        with cursor.copy(
+            f"COPY users_import ({USER_COPY_COLUMNS}) FROM STDIN (FORMAT BINARY)"
+        ) as copy:
+            while data := source.read(chunk_size):
+                copy.write(data)
+
+        imported = cursor.rowcount
+
+        with connection.pipeline():
+            cursor.execute(
+                f"INSERT INTO users ({USER_COPY_COLUMNS}) "
+                f"SELECT {USER_COPY_COLUMNS} FROM users_import"
+            )
+            cursor.execute(
+                "INSERT INTO user_changes (user_id, op, changed_at) "
+                "SELECT id, 'insert', now() AT TIME ZONE 'UTC' FROM users_import"
+            )
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence('users', 'id'), "
+                "(SELECT max(id) FROM users))"
+            )
+
+    return imported
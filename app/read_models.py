@@ -0,0 +1,108 @@
+from datetime import datetime
+from operator import attrgetter
+
+from sqlalchemy import ColumnElement, or_, select
+
+from app.app import db
+from app.models import User
+from app.sharding import current_router
+
+users_table = User.__table__
+
+
+class UserRow:
+    """
+    Read-only projection of a user for serialization.
+
+    Unlike ``User`` instances, rows are not tracked by the session and carry no
+    attribute instrumentation, which keeps large listings cheap to build.
+    """
+
+    __slots__ = ("id", "name", "email", "created_at")
+
+    def __init__(self, id: int, name: str, email: str, created_at: datetime) -> None:
+        self.id = id
+        self.name = name
+        self.email = email
+        self.created_at = created_at
+
+    def __repr__(self) -> str:
+        """Return string representation of the row."""
+        return f"<UserRow {self.id}, email: {self.email}>"
+
+
+USER_ROW_COLUMNS = (
+    users_table.c.id,
+    users_table.c.name,
+    users_table.c.email,
+    users_table.c.created_at,
+)
+
+
+def get_user_rows(
+    *criteria: ColumnElement[bool], limit: int | None = None
+) -> list[UserRow]:
+    """
+    Get users that are not deleted as read-only rows, ordered by ID.
+
+    In sharded mode every shard returns up to ``limit`` of its own rows and the
+    concatenated runs are merged back into ID order before the page is cut.
+    """
+    result = db.session.execute(
+        select(*USER_ROW_COLUMNS)
+        .where(users_table.c.deleted_at.is_(None), *criteria)
+        .order_by(users_table.c.id)
+        .limit(limit)
+    )
+    rows = [UserRow(*row) for row in result]
+
+    if current_router() is not None:
+        rows = sorted(rows, key=attrgetter("id"))[:limit]
+
+    return rows
+
+
+def get_user_page(after: int, limit: int) -> list[UserRow]:
+    """Get up to ``limit`` users with IDs greater than ``after``, in ID order."""
+    return get_user_rows(users_table.c.id > after, limit=limit)
+
+
+def lookup_user_rows(
+    user_ids: list[int], emails: list[str]
+) -> tuple[list[UserRow], list[int], list[str]]:
+    """
+    Resolve users by IDs and/or emails with a single query.
+
+    Returns the found users in request order (IDs first, then emails, every
+    user once) along with the IDs and emails that matched no live user.
+    """
+    criteria = []
+
+    if user_ids:
+        criteria.append(User._id_in(user_ids))
+
+    if emails:
+        criteria.append(users_table.c.email.in_(emails))
+
+    rows = get_user_rows(or_(*criteria))
+    by_id = {row.id: row for row in rows}
+    by_email = {row.email: row for row in rows}
+
+    found: dict[int, UserRow] = {}
+    missing_ids = []
+    missing_emails = []
+
+    for user_id in user_ids:
+        if user_id in by_id:
+            found.setdefault(user_id, by_id[user_id])
+        else:
+            missing_ids.append(user_id)
+
+    for email in emails:
+        if email in by_email:
+            row = by_email[email]
+            found.setdefault(row.id, row)
+        else:
+            missing_emails.append(email)
+
+    return list(found.values()), missing_ids, missing_emails
@@ -1,55 +1,191 @@
-from flask import Blueprint, jsonify, request
-from marshmallow import ValidationError
+from flask import Blueprint, current_app, jsonify, request
+from marshmallow import ValidationError, validate
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from app.app import db
-from app.models import User
+from app.app import db, single_flight
+from app.batch import BatchRequestError, apply_operations, parse_operations
+from app.bloom import email_filter
+from app.idempotency import idempotent
+from app.models import User, UserChange
+from app.negotiation import dump, respond, response_mimetype, serializing
+from app.params import parse_datetime, parse_id_list, parse_int, parse_lookup_keys
+from app.read_models import get_user_page, get_user_rows, lookup_user_rows
 from app.schemas import (
-    UserUpdateSchema,
+    user_changes_schema,
     user_create_schema,
     user_schema,
+    user_update_schema,
     users_schema,
 )
+from app.sharding import relocate
+from app.singleflight import SingleFlightTimeout
+from app.tracing import span
 
 users_bp = Blueprint("users", __name__)
 
 
 @users_bp.route("/", methods=["GET"])
 def get_users():
-    """Get all users."""
-    users = User.get_all()
-    return jsonify(users_schema.dump(users)), 200
+    """Get all users, a page of users, or only the users with the given ``ids``."""
+    ids = request.args.get("ids")
+
+    if ids is not None:
+        try:
+            user_ids = parse_id_list(ids, current_app.config["LOOKUP_MAX_KEYS"])
+        except ValueError as error:
+            return jsonify({"message": str(error)}), 400
+
+        return _lookup(user_ids, [])
+
+    if "limit" not in request.args and "after" not in request.args:
+        users = get_user_rows()
+        return respond(dump(users_schema, users))
+
+    try:
+        after = parse_int(request.args.get("after"), "after", default=0, minimum=0)
+        limit = parse_int(
+            request.args.get("limit"),
+            "limit",
+            default=100,
+            minimum=1,
+            maximum=current_app.config["LIST_PAGE_MAX_LIMIT"],
+        )
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    users = get_user_page(after, limit)
+
+    return respond(
+        {
+            "users": dump(users_schema, users),
+            "next_cursor": users[-1].id if users else after,
+            "has_more": len(users) == limit,
+        }
+    )
+
+
+@users_bp.route("/lookup", methods=["POST"])
+def lookup_users():
+    """Get many users by IDs and/or emails in one call."""
+    try:
+        user_ids, emails = parse_lookup_keys(
+            request.get_json(silent=True), current_app.config["LOOKUP_MAX_KEYS"]
+        )
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    return _lookup(user_ids, emails)
+
+
+def _lookup(user_ids: list[int], emails: list[str]):
+    """Resolve users by keys and report the keys that were not found."""
+    users, missing_ids, missing_emails = lookup_user_rows(user_ids, emails)
+
+    return respond(
+        {
+            "users": dump(users_schema, users),
+            "missing": {"ids": missing_ids, "emails": missing_emails},
+        }
+    )
+
+
+@users_bp.route("/changes", methods=["GET"])
+def get_user_changes():
+    """Get user changes after a cursor, oldest first."""
+    try:
+        since = parse_int(request.args.get("since"), "since", default=0, minimum=0)
+        limit = parse_int(
+            request.args.get("limit"),
+            "limit",
+            default=100,
+            minimum=1,
+            maximum=current_app.config["CHANGE_FEED_MAX_LIMIT"],
+        )
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    changes = UserChange.get_since(
+        since, limit, current_app.config["CHANGE_LOG_GAP_TIMEOUT"]
+    )
+
+    return respond(
+        {
+            "changes": dump(user_changes_schema, changes),
+            "next_cursor": changes[-1].seq if changes else since,
+            "has_more": len(changes) == limit,
+        }
+    )
+
+
+@users_bp.route("/email-availability", methods=["GET"])
+def check_email_availability():
+    """Check whether an email can still be used for a new account."""
+    email = request.args.get("email", "")
+
+    try:
+        validate.Email()(email)
+    except ValidationError:
+        return jsonify({"message": "A valid email is required"}), 400
+
+    available = not email_filter.might_exist(email) or User.get_by_email(email) is None
+    return respond({"email": email, "available": available})
 
 
 @users_bp.route("/<int:user_id>", methods=["GET"])
 def get_user(user_id: int):
     """Get a user by ID."""
-    user = User.get_by_id(user_id)
+    try:
+        user_data = single_flight.do(
+            ("user", user_id, response_mimetype()), lambda: _load_user_data(user_id)
+        )
+    except SingleFlightTimeout:
+        return (
+            jsonify({"message": "Service temporarily unavailable"}),
+            503,
+            {"Retry-After": "1"},
+        )
 
-    if not user:
+    if not user_data:
         return jsonify({"message": f"User with id {user_id} not found"}), 404
 
-    return jsonify(user_schema.dump(user)), 200
+    return respond(user_data)
+
+
+def _load_user_data(user_id: int) -> dict | None:
+    """Load a user and serialize it, so the result can be shared across requests."""
+    user = User.get_by_id(user_id)
+    return dump(user_schema, user) if user else None
 
 
 @users_bp.route("/", methods=["POST"])
+@idempotent
 def create_user():
     """Create a new user."""
     try:
-        json_data = request.get_json()
+        with span("parse_json"):
+            json_data = request.get_json()
 
         if not json_data:
             return jsonify({"message": "No input data provided"}), 400
 
-        user = user_create_schema.load(json_data, session=db.session)
+        with span("validate"):
+            user = user_create_schema.load(json_data, session=db.session)
+
         new_user = User.create(
-            name=user.name, email=user.email, password=json_data.get("password")
+            name=user["name"], email=user["email"], password=user["password"]
         )
 
-        db.session.add(new_user)
-        db.session.commit()
+        with span("insert"):
+            db.session.add(new_user)
+            db.session.flush()
+
+        with span("commit"):
+            db.session.commit()
+
+        with span("serialize"):
+            body = user_schema.dump(new_user)
 
-        return jsonify(user_schema.dump(new_user)), 201
+        return jsonify(body), 201
 
     except ValidationError as error:
         return jsonify({"message": "Validation error", "errors": error.messages}), 400
@@ -61,6 +197,62 @@ def create_user():
         return jsonify({"message": "Database error occurred"}), 500
 
 
+@users_bp.route("/", methods=["DELETE"])
+def delete_users():
+    """Delete users by a list of IDs and/or a creation time filter."""
+    ids = request.args.get("ids")
+    created_before = request.args.get("created_before")
+
+    if ids is None and created_before is None:
+        return (
+            jsonify({"message": "Either ids or created_before must be provided"}),
+            400,
+        )
+
+    try:
+        user_ids = (
+            parse_id_list(ids, current_app.config["BULK_DELETE_MAX_IDS"])
+            if ids is not None
+            else None
+        )
+        before = parse_datetime(created_before) if created_before is not None else None
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    try:
+        deleted = User.bulk_delete(
+            user_ids=user_ids,
+            created_before=before,
+            chunk_size=current_app.config["BULK_DELETE_CHUNK_SIZE"],
+        )
+        return respond({"deleted": deleted})
+
+    except SQLAlchemyError:
+        db.session.rollback()
+        return jsonify({"message": "Database error occurred"}), 500
+
+
+@users_bp.route("/batch", methods=["POST"])
+def batch_users():
+    """Apply a batch of create, update and delete operations."""
+    try:
+        operations, atomic = parse_operations(request.get_json(silent=True))
+
+        with serializing():
+            result = apply_operations(operations, atomic=atomic)
+
+        return respond(result, 200 if result["committed"] else 400)
+
+    except BatchRequestError as error:
+        response = {"message": error.message}
+        if error.errors:
+            response["errors"] = error.errors
+        return jsonify(response), 400
+    except SQLAlchemyError:
+        db.session.rollback()
+        return jsonify({"message": "Database error occurred"}), 500
+
+
 @users_bp.route("/<int:user_id>", methods=["PUT"])
 def update_user(user_id: int):
     """Update an existing user."""
@@ -88,12 +280,12 @@ def update_user(user_id: int):
                 400,
             )
 
-        schema = UserUpdateSchema(context={"user": user})
-        updated_data = schema.load(json_data, session=db.session)
+        updated_data = user_update_schema.load(json_data, user=user)
 
-        user.name = updated_data.name
-        user.email = updated_data.email
+        user.name = updated_data["name"]
+        user.email = updated_data["email"]
         user.password = json_data["password"]
+        user = relocate(user)
 
         db.session.commit()
 
@@ -118,7 +310,7 @@ def delete_user(user_id: int):
         if not user:
             return jsonify({"message": f"User with id {user_id} not found"}), 404
 
-        db.session.delete(user)
+        user.soft_delete()
         db.session.commit()
 
         return "", 204
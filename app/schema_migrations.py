@@ -0,0 +1,348 @@
+import io
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Engine, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.app import db
+from app.sharding import HOME_SHARD, current_router
+
+# Session-level advisory lock shared by every replica running migrations.
+MIGRATION_LOCK_ID = zlib.crc32(b"user-management-api:migrations")
+
+# PostgreSQL lock taken by each kind of statement, first match wins:
+# (pattern, lock mode, what it blocks, work done on existing rows while held).
+LOCK_RULES = (
+    (r"CREATE (UNIQUE )?INDEX CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", None, "scan"),
+    (r"DROP INDEX CONCURRENTLY", "SHARE UPDATE EXCLUSIVE", None, None),
+    (r"CREATE (UNIQUE )?INDEX", "SHARE", "writes", "scan"),
+    (r"DROP INDEX", "ACCESS EXCLUSIVE", "reads and writes", None),
+    (r"ALTER TABLE .* VALIDATE CONSTRAINT", "SHARE UPDATE EXCLUSIVE", None, "scan"),
+    (r"ALTER TABLE .* NOT VALID", "ACCESS EXCLUSIVE", "reads and writes", None),
+    (r"ALTER TABLE .* FOREIGN KEY", "SHARE ROW EXCLUSIVE", "writes", "scan"),
+    (r"ALTER TABLE .* TYPE ", "ACCESS EXCLUSIVE", "reads and writes", "rewrite"),
+    (r"ALTER TABLE .* SET NOT NULL", "ACCESS EXCLUSIVE", "reads and writes", "scan"),
+    (r"ALTER TABLE .* USING INDEX", "ACCESS EXCLUSIVE", "reads and writes", None),
+    (r"ALTER TABLE .* ADD CONSTRAINT", "ACCESS EXCLUSIVE", "reads and writes", "scan"),
+    (r"ALTER TABLE", "ACCESS EXCLUSIVE", "reads and writes", None),
+    (r"(UPDATE|DELETE|INSERT) ", "ROW EXCLUSIVE", "writes to matched rows", "scan"),
+    (r"DROP TABLE", "ACCESS EXCLUSIVE", "reads and writes", None),
+    (r"CREATE ", None, None, None),
+)
+TABLE_PATTERN = re.compile(
+    r"(?:ALTER TABLE|UPDATE|DELETE FROM|INSERT INTO|DROP TABLE| ON)"
+    r"\s+(?:IF EXISTS\s+|ONLY\s+)?\"?(\w+)\"?",
+    re.IGNORECASE,
+)
+NOT_NULL_CHECK = re.compile(r"CHECK \((\w+) IS NOT NULL\)", re.IGNORECASE)
+SET_NOT_NULL = re.compile(r"ALTER COLUMN (\w+) SET NOT NULL", re.IGNORECASE)
+IGNORED_STATEMENT = re.compile(
+    r"^(BEGIN|COMMIT|SET |SELECT )|alembic_version", re.IGNORECASE
+)
+
+
+class LockImpact(NamedTuple):
+    """Estimated lock impact of one migration statement."""
+
+    revision: str
+    statement: str
+    table: str | None
+    lock: str | None
+    blocks: str | None
+    work: str | None
+
+    @property
+    def risk(self) -> str:
+        """``high`` when traffic waits for a scan or rewrite, ``low`` when briefly."""
+        if self.blocks is None:
+            return "none"
+
+        return "high" if self.work is not None else "low"
+
+
+def migrations_directory() -> Path:
+    """Directory of the Alembic migration scripts."""
+    return Path(current_app.root_path).parent / "migrations"
+
+
+@lru_cache
+def migration_heads(directory: Path) -> frozenset[str]:
+    """
+    Head revisions of the migration scripts in ``directory``.
+
+    Alembic is imported here rather than at module level, so web workers only
+    load it when readiness is first checked.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(directory))
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+def pending_migrations(connection: Connection) -> str | None:
+    """
+    Describe how the database behind ``connection`` differs from the heads.
+
+    Returns None when it is at head.
+    """
+    heads = migration_heads(migrations_directory())
+    current = frozenset()
+
+    if inspect(connection).has_table("alembic_version"):
+        current = frozenset(
+            connection.scalars(text("SELECT version_num FROM alembic_version"))
+        )
+
+    if current == heads:
+        return None
+
+    return (
+        f"database is at {', '.join(sorted(current)) or 'no revision'}, "
+        f"head is {', '.join(sorted(heads))}"
+    )
+
+
+def wait_for_database(engine: Engine, timeout: float, interval: float = 0.5) -> None:
+    """
+    Block until the database accepts connections.
+
+    Raises:
+        TimeoutError: If it does not within ``timeout`` seconds.
+    """
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return
+        except OperationalError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Database did not become available") from None
+
+            time.sleep(interval)
+
+
+@contextmanager
+def migration_lock(
+    engine: Engine, timeout: float, interval: float = 1.0
+) -> Iterator[None]:
+    """
+    Hold the PostgreSQL advisory lock for migrations within the block.
+
+    The lock is taken on a dedicated connection and does not keep a transaction
+    open while it is held. Other databases have no such lock and run the block
+    right away.
+
+    Raises:
+        TimeoutError: If the lock is not acquired within ``timeout`` seconds.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    deadline = time.monotonic() + timeout
+
+    with engine.connect() as connection:
+        while not connection.scalar(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+        ):
+            connection.commit()
+
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Another replica is still running migrations")
+
+            time.sleep(interval)
+
+        connection.commit()
+
+        try:
+            yield
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+            connection.commit()
+
+
+def migration_engines() -> dict[int, Engine]:
+    """Engines of every database to migrate, keyed by shard number."""
+    router = current_router()
+
+    if router is None:
+        return {HOME_SHARD: db.engine}
+
+    return router.engines(db)
+
+
+@click.command("upgrade-locked")
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0),
+    default=600.0,
+    help="Seconds to wait for the databases and for other replicas.",
+)
+@with_appcontext
+def upgrade_locked(timeout: float) -> None:
+    """
+    Upgrade every database to head, letting only one replica migrate at a time.
+
+    In sharded mode each shard is upgraded in turn, under the lock taken on
+    shard 0.
+    """
+    from alembic import command
+
+    engines = migration_engines()
+    config = current_app.extensions["migrate"].migrate.get_config()
+
+    try:
+        for engine in engines.values():
+            wait_for_database(engine, timeout)
+
+        with migration_lock(db.engine, timeout):
+            for shard, engine in engines.items():
+                label = f"shard {shard}" if len(engines) > 1 else "database"
+
+                with engine.connect() as connection:
+                    pending = pending_migrations(connection)
+                    # Alembic has to begin the transaction it migrates in.
+                    connection.commit()
+
+                    if pending is None:
+                        click.echo(f"{label.capitalize()} is already at head")
+                        continue
+
+                    click.echo(f"Upgrading {label}: {pending}")
+                    config.attributes["connection"] = connection
+                    command.upgrade(config, "head")
+                    connection.commit()
+    except TimeoutError as error:
+        raise click.ClickException(str(error)) from None
+
+
+def _lock_rule(statement: str) -> tuple[str | None, str | None, str | None]:
+    """Lock mode, blocked queries and table work of a statement."""
+    for pattern, *rule in LOCK_RULES:
+        if re.match(pattern, statement, re.IGNORECASE):
+            return tuple(rule)
+
+    return None, None, None
+
+
+def classify_statements(sql: str) -> list[LockImpact]:
+    """
+    Estimate the lock impact of the statements of an offline migration script.
+
+    ``sql`` is the output of ``flask db upgrade --sql``; the revision of each
+    statement is taken from the ``Running upgrade`` comments before it. A
+    ``SET NOT NULL`` covered by an earlier ``IS NOT NULL`` check constraint, as
+    added by ``set_not_null``, is not counted as a scan.
+    """
+    impacts, revision, lines, checked = [], "", [], set()
+
+    for line in sql.splitlines():
+        if line.startswith("-- Running upgrade"):
+            revision = line.rsplit(" ", 1)[-1]
+            continue
+
+        if not line.strip() or line.startswith("--"):
+            continue
+
+        lines.append(line.strip())
+
+        if not line.rstrip().endswith(";"):
+            continue
+
+        statement = " ".join(lines).rstrip(";")
+        lines = []
+
+        if IGNORED_STATEMENT.search(statement):
+            continue
+
+        match = TABLE_PATTERN.search(statement)
+        table = match.group(1) if match else None
+        lock, blocks, work = _lock_rule(statement)
+
+        if check := NOT_NULL_CHECK.search(statement):
+            checked.add((table, check.group(1)))
+
+        column = SET_NOT_NULL.search(statement)
+
+        if column and (table, column.group(1)) in checked:
+            work = None
+
+        impacts.append(LockImpact(revision, statement, table, lock, blocks, work))
+
+    return impacts
+
+
+@click.command("lock-report")
+@click.argument("revision_range", required=False)
+@with_appcontext
+def lock_report(revision_range: str | None) -> None:
+    """
+    Estimate the locks taken by pending migrations, without running them.
+
+    REVISION_RANGE is FROM:TO, by default from the database's revision to head.
+    Lock modes are PostgreSQL's; run against the production database URL to get
+    row estimates of its tables.
+    """
+    from alembic import command
+
+    from app.online_migrations import estimate_rows
+
+    with db.engine.connect() as connection:
+        if revision_range is None:
+            current = None
+
+            if inspect(connection).has_table("alembic_version"):
+                current = connection.scalar(
+                    text("SELECT version_num FROM alembic_version")
+                )
+
+            revision_range = f"{current}:head" if current else "head"
+
+        config = current_app.extensions["migrate"].migrate.get_config()
+        config.output_buffer = io.StringIO()
+        command.upgrade(config, revision_range, sql=True)
+        impacts = classify_statements(config.output_buffer.getvalue())
+
+        tables = set(inspect(connection).get_table_names())
+        rows = {
+            impact.table: estimate_rows(connection, impact.table)
+            for impact in impacts
+            if impact.table in tables
+        }
+
+    if not impacts:
+        click.echo("No pending migrations")
+        return
+
+    for impact in impacts:
+        target = impact.table or "-"
+
+        if impact.table in rows:
+            target += f" (~{rows[impact.table]} rows)"
+
+        effect = f"blocks {impact.blocks}" if impact.blocks else "blocks nothing"
+
+        if impact.work is not None:
+            effect += f" during a {impact.work} of the table"
+
+        click.echo(
+            f"{impact.revision} {impact.risk.upper():<4} {target}: "
+            f"{impact.lock or 'no lock on existing rows'}, {effect}"
+        )
+        click.echo(f"    {impact.statement[:200]}")
@@ -1,22 +1,76 @@
-from marshmallow import ValidationError, fields, validates
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import Any, Iterator
 
-from app.models import User
+from marshmallow import Schema, ValidationError, fields, validates
+from marshmallow_sqlalchemy import SQLAlchemySchema
 
+from app.bloom import email_filter
+from app.models import User, UserChange
 
-class UserSchema(SQLAlchemyAutoSchema):
-    """Schema for User model serialization and validation."""
+# Letters and digits (``str.isalnum``), spaces, hyphens and apostrophes.
+NAME_PATTERN = re.compile(r"(?:[^\W_]|[ \-'])*")
+
+# User being updated by the ``UserUpdateSchema.load`` call running in this
+# thread, so a single schema instance can be shared between requests.
+_updated_user: ContextVar[User | None] = ContextVar("updated_user", default=None)
+
+# Whether datetimes are dumped as objects for a binary format instead of strings.
+_native_datetimes: ContextVar[bool] = ContextVar("native_datetimes", default=False)
+
+
+@contextmanager
+def native_datetimes(enabled: bool = True) -> Iterator[None]:
+    """Dump ``DateTime`` fields as timezone-aware datetimes within the block."""
+    token = _native_datetimes.set(enabled)
+
+    try:
+        yield
+    finally:
+        _native_datetimes.reset(token)
+
+
+class DateTime(fields.DateTime):
+    """
+    DateTime field that can be left as a datetime object when dumping.
+
+    Binary formats such as MessagePack encode timestamps natively, which is
+    cheaper than formatting and parsing ISO 8601 strings. Naive values are
+    stored in UTC, so they are marked as such.
+
+    Strings are always formatted from naive UTC values, as read back from the
+    database, so objects still holding the aware value they were created with
+    are dumped the same way.
+    """
+
+    def _serialize(self, value: datetime | None, attr, obj, **kwargs) -> Any:
+        if value is not None and _native_datetimes.get():
+            return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+
+        return super()._serialize(value, attr, obj, **kwargs)
+
+
+class UserSchema(SQLAlchemySchema):
+    """
+    Schema for User model serialization and validation.
+
+    Fields are declared explicitly rather than generated from the model, which
+    keeps model introspection out of worker startup.
+    """
 
     class Meta:
         model = User
         load_instance = True
-        include_fk = True
-        exclude = ("_password",)
 
     id = fields.Integer(dump_only=True)
     name = fields.String(required=True)
     email = fields.Email(required=True)
-    created_at = fields.DateTime(dump_only=True)
+    created_at = DateTime(dump_only=True)
 
     @validates("name")
     def validate_name(self, name: str) -> None:
@@ -27,7 +81,7 @@ class UserSchema(SQLAlchemyAutoSchema):
         if len(name) > 255:
             raise ValidationError("Name must be at most 255 characters long.")
 
-        if not all(char.isalnum() or char in " -'" for char in name):
+        if not NAME_PATTERN.fullmatch(name):
             raise ValidationError(
                 "Name can only contain letters, numbers, "
                 "spaces, hyphens, and apostrophes."
@@ -46,9 +100,15 @@ class PasswordValidationMixin:
         if len(password) < 8:
             raise ValidationError("Password must be at least 8 characters long.")
 
-        has_uppercase = any(char.isupper() for char in password)
-        has_lowercase = any(char.islower() for char in password)
-        has_digit = any(char.isdigit() for char in password)
+        has_uppercase = has_lowercase = has_digit = False
+
+        for char in password:
+            if char.isupper():
+                has_uppercase = True
+            elif char.islower():
+                has_lowercase = True
+            elif char.isdigit():
+                has_digit = True
 
         if not has_uppercase:
             raise ValidationError(
@@ -65,25 +125,62 @@ class PasswordValidationMixin:
 
 
 class UserUpdateSchema(UserSchema, PasswordValidationMixin):
-    """Schema for User model updates."""
+    """
+    Schema for User model updates.
+
+    The user being updated is passed to each ``load`` call rather than to the
+    constructor, and data is loaded into a plain dict instead of a model
+    instance, so one schema instance can safely serve every request.
+    """
+
+    class Meta(UserSchema.Meta):
+        load_instance = False
 
     password = fields.String(load_only=True, required=False)
 
+    def load(self, data: Any, *, user: User | None = None, **kwargs) -> dict:
+        """Deserialize an update of ``user``, excluding it from the email check."""
+        token = _updated_user.set(user)
+
+        # No model instance is built, so skip the marshmallow-sqlalchemy
+        # wrapper, which looks up the installed marshmallow version per call.
+        try:
+            return Schema.load(self, data, **kwargs)
+        finally:
+            _updated_user.reset(token)
+
     @validates("email")
     def validate_email_unique(self, email: str) -> None:
         """Validate that the email is unique among other users."""
         if len(email) > 255:
             raise ValidationError("Email must be at most 255 characters long.")
 
-        current_user_id = getattr(self.context.get("user"), "id", None)
+        current_user = _updated_user.get()
+
+        # The user being updated already holds its own email, and live emails
+        # are unique, so there is nothing to look up.
+        if current_user is not None and current_user.email == email:
+            return
+
+        if not email_filter.might_exist(email):
+            return
+
         existing_user = User.get_by_email(email)
 
-        if existing_user and existing_user.id != current_user_id:
+        if existing_user and existing_user.id != getattr(current_user, "id", None):
             raise ValidationError("Email already exists.")
 
 
 class UserCreateSchema(UserSchema, PasswordValidationMixin):
-    """Schema for creating new users."""
+    """
+    Schema for creating new users.
+
+    Data is loaded into a plain dict rather than a model instance, as building
+    a ``User`` would hash the password, which ``User.create`` does again.
+    """
+
+    class Meta(UserSchema.Meta):
+        load_instance = False
 
     password = fields.String(load_only=True, required=True)
 
@@ -93,10 +190,32 @@ class UserCreateSchema(UserSchema, PasswordValidationMixin):
         if len(email) > 255:
             raise ValidationError("Email must be at most 255 characters long.")
 
-        if User.get_by_email(email):
+        if email_filter.might_exist(email) and User.get_by_email(email):
             raise ValidationError("Email already exists.")
 
 
+class UserChangeSchema(Schema):
+    """Schema for entries of the user change feed."""
+
+    seq = fields.Integer()
+    op = fields.String()
+    user_id = fields.Integer()
+    changed_at = DateTime()
+    user = fields.Method("get_user")
+
+    def get_user(self, change: UserChange) -> dict | None:
+        """Return the current state of the user, or None if it has been deleted."""
+        if change.op == UserChange.DELETE or change.user is None:
+            return None
+
+        if change.user.is_deleted:
+            return None
+
+        return user_schema.dump(change.user)
+
+
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 user_create_schema = UserCreateSchema()
+user_update_schema = UserUpdateSchema()
+user_changes_schema = UserChangeSchema(many=True)
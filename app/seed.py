@@ -0,0 +1,112 @@
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Iterator
+
+from sqlalchemy import insert
+
+from app.app import bcrypt, db
+from app.models import User, UserChange
+from app.sharding import current_router
+
+FIRST_NAMES = (
+    "Olivia", "Liam", "Emma", "Noah", "Amelia", "Oliver", "Sophia", "Elijah",
+    "Isabella", "Lucas", "Mia", "Mateo", "Charlotte", "Levi", "Ava", "Ethan",
+    "Harper", "James", "Evelyn", "Mason", "Aria", "Hiroshi", "Chloe", "Andriy",
+    "Zoe", "Omar", "Nora", "Ravi", "Ingrid", "Diego", "Leila", "Jean-Luc",
+    "Mary Ann", "Siobhan", "Kwame", "Yuki", "Olena", "Mateus", "Freya", "Tariq",
+)  # fmt: skip
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Thompson",
+    "White", "O'Brien", "Nakamura", "Kowalski", "Shevchenko", "Muller",
+    "Rossi", "Silva", "Kim", "Nguyen", "Patel", "Okafor", "Dubois",
+    "Van der Berg", "Smith-Jones", "D'Angelo", "Larsen", "Novak", "Haddad",
+    "Fernandes",
+)  # fmt: skip
+EMAIL_DOMAINS = (
+    "example.com", "example.org", "example.net", "mail.example.com",
+    "corp.example.com",
+)  # fmt: skip
+
+
+def _email_part(name: str) -> str:
+    """Turn a name into a valid, lowercase email local-part fragment."""
+    return name.lower().replace(" ", "").replace("'", "")
+
+
+def generate_users(
+    count: int,
+    password_hash: str,
+    until: datetime,
+    start: int = 0,
+    seed: int = 0,
+    days: int = 365,
+) -> Iterator[dict]:
+    """
+    Generate rows for users ``start`` to ``start + count - 1``.
+
+    The same arguments always produce the same rows. Names only use characters
+    ``UserSchema`` accepts, emails are unique per index, and creation times
+    increase with the index, spread over ``days`` days before ``until``.
+    """
+    rng = random.Random(f"{seed}:{start}")
+    span = timedelta(days=days) / max(count, 1)
+    first_at = until - timedelta(days=days)
+
+    for offset in range(count):
+        index = start + offset
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        domain = EMAIL_DOMAINS[index % len(EMAIL_DOMAINS)]
+
+        yield {
+            "name": f"{first} {last}",
+            "email": f"{_email_part(first)}.{_email_part(last)}.{index}@{domain}",
+            "_password": password_hash,
+            "created_at": first_at + span * (offset + rng.random()),
+        }
+
+
+def seed_users(
+    count: int,
+    password: str,
+    until: datetime,
+    start: int = 0,
+    seed: int = 0,
+    days: int = 365,
+    chunk_size: int = 10000,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Bulk-load generated users, committing every ``chunk_size`` rows.
+
+    The password is hashed once and shared by every row. Rows are generated
+    lazily and sent as multi-row INSERTs, so memory use does not grow with
+    ``count``. Each user gets an ``insert`` change log entry, like users
+    created through the API. Returns the number of created users.
+
+    Raises:
+        RuntimeError: If the app is sharded, as rows would bypass routing.
+    """
+    if current_router() is not None:
+        raise RuntimeError("Seeding is not supported in sharded mode")
+
+    password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+    rows = generate_users(count, password_hash, until, start, seed, days)
+    created = 0
+
+    while chunk := list(islice(rows, chunk_size)):
+        user_ids = db.session.scalars(
+            insert(User.__table__).returning(User.__table__.c.id), chunk
+        ).all()
+        UserChange.record_many(user_ids, UserChange.INSERT)
+        db.session.commit()
+
+        created += len(chunk)
+
+        if progress is not None:
+            progress(created)
+
+    return created
@@ -0,0 +1,347 @@
+import hashlib
+import threading
+import time
+from typing import Any, Iterable
+
+from flask import Flask, current_app, has_app_context
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Engine, create_engine, inspect
+from sqlalchemy import orm as sa_orm
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.horizontal_shard import ShardedSession, set_shard_id
+from sqlalchemy.orm import Mapper, ORMExecuteState
+from sqlalchemy.sql.util import find_tables
+
+# Tables whose rows are distributed by email; everything else lives on shard 0,
+# including the change log, so its sequence numbers stay global.
+SHARDED_TABLES = frozenset({"users"})
+HOME_SHARD = 0
+# ``InstanceState.info`` key holding the changed fields of a user moved by
+# ``relocate``, so its re-insert is logged as an update.
+RELOCATED_FIELDS = "relocated_fields"
+
+# Snowflake layout (63 bits): milliseconds since EPOCH_MS | shard | worker | sequence.
+EPOCH_MS = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+SHARD_BITS = 8
+WORKER_BITS = 6
+SEQUENCE_BITS = 8
+MAX_SHARDS = 1 << SHARD_BITS
+MAX_WORKERS = 1 << WORKER_BITS
+
+
+def normalize_email(email: str) -> str:
+    """Normalize an email for shard routing."""
+    return email.strip().lower()
+
+
+def shard_for_email(email: str, shard_count: int) -> int:
+    """
+    Map an email to a shard with a hash that is stable across processes.
+
+    Unlike ``hash()``, the digest does not depend on ``PYTHONHASHSEED``, so every
+    worker routes the same email to the same shard.
+    """
+    digest = hashlib.blake2b(
+        normalize_email(email).encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def shard_for_id(user_id: int) -> int:
+    """Decode the shard a user was created on from its snowflake ID."""
+    return (user_id >> (WORKER_BITS + SEQUENCE_BITS)) & (MAX_SHARDS - 1)
+
+
+class SnowflakeIds:
+    """
+    Generator of time-ordered, globally unique 63-bit IDs.
+
+    IDs embed the creation time in milliseconds, the shard and the worker, so
+    workers never coordinate to hand them out. The clock never runs backwards:
+    when the system clock does, or the per-millisecond sequence is exhausted,
+    IDs borrow from the next millisecond instead.
+    """
+
+    def __init__(self, worker_id: int) -> None:
+        if not 0 <= worker_id < MAX_WORKERS:
+            raise ValueError(f"Worker id must be between 0 and {MAX_WORKERS - 1}")
+
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self, shard: int) -> int:
+        """Return a new ID for a row created on the given shard."""
+        with self._lock:
+            now = max(int(time.time() * 1000) - EPOCH_MS, self._last_ms)
+
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & ((1 << SEQUENCE_BITS) - 1)
+
+                if self._sequence == 0:
+                    now += 1
+            else:
+                self._sequence = 0
+
+            self._last_ms = now
+            sequence = self._sequence
+
+        return (
+            now << (SHARD_BITS + WORKER_BITS + SEQUENCE_BITS)
+            | shard << (WORKER_BITS + SEQUENCE_BITS)
+            | self.worker_id << SEQUENCE_BITS
+            | sequence
+        )
+
+
+def _table_name(mapper: Mapper | None) -> str | None:
+    """Name of the table a mapper persists to, if any."""
+    return mapper.local_table.name if mapper is not None else None
+
+
+class ShardRouter:
+    """Routing rules of a sharded app: where rows live and where queries go."""
+
+    def __init__(self, extra_engines: list[Engine], worker_id: int) -> None:
+        self.extra_engines = extra_engines
+        self.shard_count = len(extra_engines) + 1
+        self.shards = list(range(self.shard_count))
+        self.ids = SnowflakeIds(worker_id)
+
+    def shard_for_email(self, email: str) -> int:
+        """Shard that owns users with the given email."""
+        return shard_for_email(email, self.shard_count)
+
+    def engines(self, db: SQLAlchemy) -> dict[int, Any]:
+        """Engines of all shards, keyed by shard number."""
+        return {HOME_SHARD: db.engine, **dict(enumerate(self.extra_engines, 1))}
+
+    def create_all(self, db: SQLAlchemy) -> None:
+        """Create the tables on every shard, like ``db.create_all()``."""
+        for engine in self.engines(db).values():
+            db.metadata.create_all(engine)
+
+    def drop_all(self, db: SQLAlchemy) -> None:
+        """Drop the tables on every shard, like ``db.drop_all()``."""
+        for engine in self.engines(db).values():
+            db.metadata.drop_all(engine)
+
+    def shard_chooser(
+        self, mapper: Mapper | None, instance: Any, clause: Any = None, **kw: Any
+    ) -> int:
+        """Pick the shard a new instance is written to, assigning user IDs."""
+        if instance is None or _table_name(mapper) != "users":
+            return HOME_SHARD
+
+        shard = self.shard_for_email(instance.email)
+
+        if instance.id is None:
+            instance.id = self.ids.next_id(shard)
+
+        return shard
+
+    def identity_chooser(
+        self, mapper: Mapper, primary_key: tuple, **kw: Any
+    ) -> list[int]:
+        """Shards to check for an identity, most likely first."""
+        if _table_name(mapper) != "users":
+            return [HOME_SHARD]
+
+        home = shard_for_id(primary_key[0])
+        return [home] + [shard for shard in self.shards if shard != home]
+
+    def execute_chooser(self, orm_context: ORMExecuteState) -> Iterable[int]:
+        """
+        Shards a statement without an explicit shard runs on.
+
+        Reads, updates and deletes of sharded tables scatter to every shard and
+        their results are concatenated; everything else runs on shard 0.
+        """
+        tables = {
+            table.name
+            for table in find_tables(
+                orm_context.statement, include_crud=True, include_joins=True
+            )
+        }
+
+        if tables & SHARDED_TABLES and not orm_context.is_insert:
+            return self.shards
+
+        return [HOME_SHARD]
+
+
+def current_router() -> ShardRouter | None:
+    """Router of the current app, or None when it is not sharded."""
+    if not has_app_context():
+        return None
+
+    return current_app.extensions.get("sharding")
+
+
+def email_shard_options(email: str) -> tuple:
+    """Statement options that send a query by email to the owning shard only."""
+    router = current_router()
+
+    if router is None:
+        return ()
+
+    return (set_shard_id(router.shard_for_email(email)),)
+
+
+def id_lookup_options(user_id: int) -> dict[str, Any]:
+    """``Session.get`` arguments that look a user up on the shard its ID records."""
+    router = current_router()
+
+    if router is None or shard_for_id(user_id) >= router.shard_count:
+        return {}
+
+    return {"identity_token": shard_for_id(user_id)}
+
+
+def home_connection(connection: Connection, instance: Any) -> Connection:
+    """
+    Connection to shard 0 within the transaction that is flushing ``instance``.
+
+    Flush events get the connection of the shard the instance is written to;
+    rows of tables that are not sharded must go to shard 0 instead.
+    """
+    session = inspect(instance).session
+    router = getattr(session, "router", None)
+
+    if router is None:
+        return connection
+
+    return session.connection(bind_arguments={"shard_id": HOME_SHARD})
+
+
+def relocate(user: Any) -> Any:
+    """
+    Move a user whose email changed to the shard the new email hashes to.
+
+    The row is deleted from the old shard and inserted on the new one, keeping
+    its ID, when the session is flushed, and logged as an update. The two
+    writes go to different databases, so they are not atomic. Returns the
+    instance to keep working with, which is ``user`` itself when no move is
+    needed.
+    """
+    state = inspect(user)
+    router = getattr(state.session, "router", None)
+
+    if router is None or state.identity_token == router.shard_for_email(user.email):
+        return user
+
+    moved = state.mapper.class_(
+        **{attr.key: getattr(user, attr.key) for attr in state.mapper.column_attrs}
+    )
+    inspect(moved).info[RELOCATED_FIELDS] = [
+        attr.key.lstrip("_")
+        for attr in state.mapper.column_attrs
+        if state.attrs[attr.key].history.has_changes()
+    ]
+    state.session.delete(user)
+    state.session.add(moved)
+    return moved
+
+
+class RoutingSession(ShardedSession, Session):
+    """
+    Flask-SQLAlchemy session that routes statements across shards.
+
+    The session only shards when its app was set up by ``Sharding`` with
+    ``SHARD_DATABASE_URIS``; otherwise it behaves exactly like the default
+    Flask-SQLAlchemy session.
+    """
+
+    def __init__(self, db: SQLAlchemy, **kwargs: Any) -> None:
+        self.router = current_router()
+
+        if self.router is None:
+            Session.__init__(self, db, **kwargs)
+            self.connection_callable = None
+            return
+
+        super().__init__(
+            shard_chooser=self.router.shard_chooser,
+            identity_chooser=self.router.identity_chooser,
+            execute_chooser=self.router.execute_chooser,
+            shards=self.router.engines(db),
+            db=db,
+            **kwargs,
+        )
+
+    def get_bind(
+        self,
+        mapper: Any | None = None,
+        clause: Any | None = None,
+        bind: Any | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Pick the shard engine, or the Flask-SQLAlchemy bind when unsharded.
+
+        A session created with an explicit ``bind``, such as a connection whose
+        transaction it joins, always uses that bind.
+        """
+        if self.router is None:
+            return Session.get_bind(
+                self, mapper, clause=clause, bind=bind or self.bind, **kwargs
+            )
+
+        if mapper is None:
+            kwargs.setdefault("shard_id", HOME_SHARD)
+
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _identity_lookup(self, *args: Any, **kwargs: Any) -> Any:
+        """Search the identity map of every candidate shard when sharded."""
+        if self.router is None:
+            return sa_orm.Session._identity_lookup(self, *args, **kwargs)
+
+        return super()._identity_lookup(*args, **kwargs)
+
+
+class Sharding:
+    """
+    Optional horizontal sharding of users by a hash of their email.
+
+    With ``SHARD_DATABASE_URIS`` set, the first URI becomes the default database
+    (shard 0, which also keeps the tables that are not sharded) and an engine
+    is created for each of the others. ``RoutingSession`` then writes
+    every user to the shard its email hashes to and gives it a snowflake ID
+    that records that shard, which needs a ``SHARD_WORKER_ID`` unique to each
+    worker process. Must be initialized before ``db.init_app``.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Set up the engines of the app's shards."""
+        uris = list(app.config["SHARD_DATABASE_URIS"])
+
+        if not uris:
+            return
+
+        if len(uris) > MAX_SHARDS:
+            raise ValueError(f"At most {MAX_SHARDS} shards are supported")
+
+        worker_id = app.config["SHARD_WORKER_ID"]
+
+        # Process IDs repeat across hosts and containers (often PID 1), and
+        # workers sharing an ID hand out the same user IDs.
+        if worker_id is None:
+            raise ValueError(
+                "SHARD_WORKER_ID must be set to an ID unique to this worker "
+                "process when SHARD_DATABASE_URIS is set"
+            )
+
+        # Shard engines are kept out of SQLALCHEMY_BINDS, whose metadata would
+        # be shared with every other app using ``db``.
+        options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+        engines = [create_engine(uri, **options) for uri in uris[1:]]
+
+        app.config["SQLALCHEMY_DATABASE_URI"] = uris[HOME_SHARD]
+        app.extensions["sharding"] = ShardRouter(engines, worker_id)
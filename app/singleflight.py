@@ -0,0 +1,110 @@
+import threading
+from typing import Any, Callable, Hashable
+
+from flask import Flask
+
+from app.metrics import register_metrics
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when waiting for an in-flight call for the same key takes too long."""
+
+
+class _Call:
+    """State of a call shared by the leader and the requests waiting for it."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key within a worker process.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for and share its result, or its exception.
+    Results are not cached: once the leader finishes, the next call for the key
+    runs the function again.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self.enabled = True
+        self.timeout = 5.0
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._executed = 0
+        self._coalesced = 0
+        self._timeouts = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Configure the coalescing layer from the app config."""
+        self.enabled = app.config["SINGLE_FLIGHT_ENABLED"]
+        self.timeout = app.config["SINGLE_FLIGHT_TIMEOUT"]
+        app.extensions["single_flight"] = self
+        register_metrics(app, "single_flight", self.stats)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight.
+
+        Raises:
+            SingleFlightTimeout: If the in-flight call does not finish within
+                the configured timeout.
+        """
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return self._wait(key, call)
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._executed += 1
+
+            call.done.set()
+
+        return call.result
+
+    def _wait(self, key: Hashable, call: _Call) -> Any:
+        """Wait for the leader of a call and return its outcome."""
+        if not call.done.wait(self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise SingleFlightTimeout(f"Timed out waiting for in-flight call {key!r}")
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+    def stats(self) -> dict[str, int]:
+        """Return counters of executed, coalesced and timed out calls."""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "timeouts": self._timeouts,
+                "in_flight": len(self._calls),
+            }
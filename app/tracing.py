@@ -0,0 +1,388 @@
+import json
+import random
+import re
+import sys
+import time
+from contextvars import ContextVar, Token
+from typing import IO, Any, Protocol
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import Engine, event
+
+try:
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import ReadableSpan
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.util.instrumentation import InstrumentationScope
+    from opentelemetry.trace import (
+        SpanContext,
+        SpanKind,
+        Status,
+        StatusCode,
+        TraceFlags,
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    ReadableSpan = None
+
+# W3C Trace Context header: version-trace_id-parent_id-flags.
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+SAMPLED = 0x01
+DB_STATEMENT_MAX_LENGTH = 500
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Exporter(Protocol):
+    """Destination of finished spans."""
+
+    def export(self, span: "Span") -> None:
+        """Receive a span when it ends."""
+
+
+class Span:
+    """
+    Timed operation within a trace.
+
+    Used as a context manager, the span becomes the parent of spans started
+    inside the block and is exported when the block exits.
+    """
+
+    __slots__ = (
+        "exporter",
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        exporter: Exporter,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.exporter = exporter
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64) or 1:016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = self.end_ns = 0
+        self.error: str | None = None
+        self._token: Token | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Record an attribute, using OpenTelemetry semantic names where they exist."""
+        self.attributes[key] = value
+
+    def child(self, name: str, attributes: dict[str, Any]) -> "Span":
+        """Create a span in the same trace with this span as its parent."""
+        return Span(self.exporter, name, self.trace_id, self.span_id, attributes)
+
+    @property
+    def traceparent(self) -> str:
+        """``traceparent`` header that continues the trace from this span."""
+        return f"00-{self.trace_id}-{self.span_id}-{SAMPLED:02x}"
+
+    @property
+    def duration_ms(self) -> float:
+        """Time between the start and the end of the span."""
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def start(self) -> "Span":
+        """Make this the current span."""
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self, error: BaseException | None = None) -> None:
+        """Restore the parent as the current span and export this one."""
+        self.end_ns = time.time_ns()
+
+        if error is not None:
+            self.error = f"{error.__class__.__name__}: {error}"
+
+        _current_span.reset(self._token)
+        self.exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        self.end(exc)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serializable form, close to OpenTelemetry's JSON span format."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {},
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while no trace is recorded; every method does nothing."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, for tests."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        """Forget the spans recorded so far."""
+        self.spans.clear()
+
+
+class ConsoleExporter:
+    """Writes each finished span as a JSON line."""
+
+    def __init__(self, stream: IO[str] | None = None) -> None:
+        self.stream = stream
+
+    def export(self, span: Span) -> None:
+        stream = self.stream or sys.stderr
+        stream.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OpenTelemetryExporter:
+    """
+    Hands spans to an OpenTelemetry SDK span exporter, such as OTLP.
+
+    Spans keep their trace and span IDs and are sent in batches from the SDK's
+    background thread, attributed to ``service_name``. Needs the
+    ``opentelemetry-sdk`` package.
+    """
+
+    def __init__(self, span_exporter: Any, service_name: str) -> None:
+        if ReadableSpan is None:
+            raise RuntimeError("OpenTelemetry export requires opentelemetry-sdk")
+
+        self.processor = BatchSpanProcessor(span_exporter)
+        self.resource = Resource.create({SERVICE_NAME: service_name})
+        self.scope = InstrumentationScope(__name__)
+
+    @staticmethod
+    def _context(trace_id: str, span_id: str) -> "SpanContext":
+        return SpanContext(
+            int(trace_id, 16),
+            int(span_id, 16),
+            is_remote=False,
+            trace_flags=TraceFlags(SAMPLED),
+        )
+
+    def export(self, span: Span) -> None:
+        server = "http.request.method" in span.attributes
+        self.processor.on_end(
+            ReadableSpan(
+                name=span.name,
+                context=self._context(span.trace_id, span.span_id),
+                parent=(
+                    self._context(span.trace_id, span.parent_id)
+                    if span.parent_id is not None
+                    else None
+                ),
+                resource=self.resource,
+                attributes=span.attributes,
+                instrumentation_scope=self.scope,
+                kind=SpanKind.SERVER if server else SpanKind.INTERNAL,
+                status=Status(StatusCode.ERROR, span.error) if span.error else Status(),
+                start_time=span.start_ns,
+                end_time=span.end_ns,
+            )
+        )
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """
+    Time a block as a child of the current span.
+
+    Outside of a traced request this returns a shared no-op object, so
+    instrumented code costs one context variable lookup when tracing is off.
+    """
+    parent = _current_span.get()
+
+    if parent is None:
+        return NOOP_SPAN
+
+    return parent.child(name, attributes)
+
+
+def current_span() -> Span | None:
+    """Span of the current block, or None when no trace is recorded."""
+    return _current_span.get()
+
+
+def _make_exporter(name: str, service_name: str) -> Exporter:
+    """Exporter for the ``TRACING_EXPORTER`` setting."""
+    if name == "memory":
+        return InMemoryExporter()
+
+    if name == "console":
+        return ConsoleExporter()
+
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            raise RuntimeError(
+                "OTLP export requires opentelemetry-exporter-otlp-proto-http"
+            ) from None
+
+        return OpenTelemetryExporter(OTLPSpanExporter(), service_name)
+
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+class Tracing:
+    """
+    Optional request tracing with spans for each stage of a request.
+
+    Every traced request gets a server span that continues the trace of an
+    incoming W3C ``traceparent`` header, or starts a new one for a
+    ``TRACING_SAMPLE_RATE`` share of requests. Code marks its stages with
+    ``span()`` and every SQL statement gets a span of its own. Finished spans
+    go to the ``TRACING_EXPORTER``.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Trace the app's requests when ``TRACING_ENABLED`` is set."""
+        if not app.config["TRACING_ENABLED"]:
+            return
+
+        app.extensions["tracing"] = _make_exporter(
+            app.config["TRACING_EXPORTER"], app.config["TRACING_SERVICE_NAME"]
+        )
+        app.before_request(_start_request_span)
+        app.after_request(_record_response)
+        app.teardown_request(_end_request_span)
+
+        if not event.contains(Engine, "before_cursor_execute", _start_query_span):
+            event.listen(Engine, "before_cursor_execute", _start_query_span)
+            event.listen(Engine, "after_cursor_execute", _end_query_span)
+            event.listen(Engine, "handle_error", _fail_query_span)
+
+
+def _incoming_context() -> tuple[str | None, str | None, bool]:
+    """Trace ID, parent span ID and sampling decision of the ``traceparent``."""
+    match = TRACEPARENT.match(request.headers.get("traceparent", ""))
+
+    if match is None or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None, None, random.random() < current_app.config["TRACING_SAMPLE_RATE"]
+
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & SAMPLED)
+
+
+def _start_request_span() -> None:
+    """Open the server span of the request."""
+    trace_id, parent_id, sampled = _incoming_context()
+
+    if not sampled:
+        return
+
+    route = request.url_rule.rule if request.url_rule else request.path
+    Span(
+        current_app.extensions["tracing"],
+        f"{request.method} {route}",
+        trace_id or f"{random.getrandbits(128) or 1:032x}",
+        parent_id,
+        {
+            "http.request.method": request.method,
+            "http.route": route,
+            "url.path": request.path,
+        },
+    ).start()
+
+
+def _record_response(response: Response) -> Response:
+    """Record the status code and return the trace context to the client."""
+    current = _current_span.get()
+
+    if current is not None:
+        current.set_attribute("http.response.status_code", response.status_code)
+        response.headers["traceresponse"] = current.traceparent
+
+    return response
+
+
+def _end_request_span(error: BaseException | None) -> None:
+    """Close the server span, along with any span a failed view left open."""
+    current = _current_span.get()
+
+    while current is not None:
+        current.end(error)
+        current = _current_span.get()
+
+
+def _start_query_span(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    """Open a span for a SQL statement sent during a traced request."""
+    parent = _current_span.get()
+
+    if parent is None or context is None:
+        return
+
+    context._trace_span = parent.child(
+        "db.query",
+        {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:DB_STATEMENT_MAX_LENGTH],
+        },
+    ).start()
+
+
+def _end_query_span(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    """Close the span of a SQL statement."""
+    query_span = getattr(context, "_trace_span", None)
+
+    if query_span is not None:
+        context._trace_span = None
+        query_span.end()
+
+
+def _fail_query_span(exception_context: Any) -> None:
+    """Close the span of a failed SQL statement with its error."""
+    context = exception_context.execution_context
+    query_span = getattr(context, "_trace_span", None)
+
+    if query_span is not None:
+        context._trace_span = None
+        query_span.end(exception_context.original_exception)
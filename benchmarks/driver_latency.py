@@ -0,0 +1,135 @@
+"""
+Compare per-query latency of the PostgreSQL drivers on the hot lookup paths.
+
+Runs ``User.get_by_id`` and ``User.get_by_email`` against a real PostgreSQL
+database with psycopg2 and with psycopg 3 (with and without server-side
+prepared statements) and reports latency percentiles. Synthetic users are
+inserted before and removed after the run. Point it at a scratch database:
+
+    python benchmarks/driver_latency.py --url postgresql://localhost/bench
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, insert, select  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from app.app import create_app, db  # noqa: E402
+from app.models import User, UserChange  # noqa: E402
+
+EMAIL_PREFIX = "driver-latency-"
+
+# (label, driver, engine options)
+PROFILES = (
+    ("psycopg2", "psycopg2", {}),
+    ("psycopg", "psycopg", {"connect_args": {"prepare_threshold": None}}),
+    ("psycopg+prepared", "psycopg", {"connect_args": {"prepare_threshold": 0}}),
+)
+
+
+def populate(users: int) -> list[tuple[int, str]]:
+    """Insert synthetic users and return their IDs and emails."""
+    password_hash = "$2b$12$" + "x" * 53
+    db.session.execute(
+        insert(User),
+        [
+            {
+                "name": f"User {i}",
+                "email": f"{EMAIL_PREFIX}{i}@example.com",
+                "_password": password_hash,
+            }
+            for i in range(users)
+        ],
+    )
+    db.session.commit()
+    return list(
+        db.session.execute(
+            select(User.id, User.email).where(User.email.startswith(EMAIL_PREFIX))
+        )
+    )
+
+
+def cleanup() -> None:
+    """Remove the synthetic users and their change log entries."""
+    ids = select(User.id).where(User.email.startswith(EMAIL_PREFIX))
+    db.session.execute(delete(UserChange).where(UserChange.user_id.in_(ids)))
+    db.session.execute(delete(User).where(User.email.startswith(EMAIL_PREFIX)))
+    db.session.commit()
+
+
+def measure(lookup: Callable[[], object], queries: int) -> list[float]:
+    """Time ``queries`` lookups, each against an empty identity map."""
+    timings = []
+
+    for _ in range(queries):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        assert lookup() is not None
+        timings.append(time.perf_counter() - started)
+
+    return timings
+
+
+def report(label: str, query: str, timings: list[float]) -> None:
+    """Print latency percentiles in microseconds."""
+    cuts = statistics.quantiles(timings, n=100)
+    print(
+        f"{label:<18} {query:<13} p50 {cuts[49] * 1e6:>8.1f} us "
+        f"p95 {cuts[94] * 1e6:>8.1f} us p99 {cuts[98] * 1e6:>8.1f} us"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", required=True, help="PostgreSQL database URL.")
+    parser.add_argument("--users", type=int, default=1000, help="Users to insert.")
+    parser.add_argument("--queries", type=int, default=2000, help="Lookups per case.")
+    args = parser.parse_args()
+
+    url = make_url(args.url)
+    rng = random.Random(0)
+
+    for label, driver, engine_options in PROFILES:
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": url.set(
+                    drivername=f"postgresql+{driver}"
+                ).render_as_string(hide_password=False),
+                "SQLALCHEMY_ENGINE_OPTIONS": engine_options,
+                "EMAIL_BLOOM_ENABLED": False,
+            }
+        )
+
+        with app.app_context():
+            db.create_all()
+            cleanup()
+            users = populate(args.users)
+
+            try:
+                report(
+                    label,
+                    "get_by_id",
+                    measure(lambda: User.get_by_id(rng.choice(users)[0]), args.queries),
+                )
+                report(
+                    label,
+                    "get_by_email",
+                    measure(
+                        lambda: User.get_by_email(rng.choice(users)[1]), args.queries
+                    ),
+                )
+            finally:
+                cleanup()
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare listing users through ORM instances with the read-only row model.
+
+Loads the users table with synthetic rows in an in-memory SQLite database and
+measures rows per second and memory per row for both paths, including
+serialization with ``UserSchema``:
+
+    python benchmarks/list_read_model.py --rows 50000 --repeat 3
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["TESTING"] = "true"
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.app import create_app, db  # noqa: E402
+from app.models import User  # noqa: E402
+from app.read_models import get_user_rows  # noqa: E402
+from app.schemas import users_schema  # noqa: E402
+
+
+def populate(rows: int) -> None:
+    """Insert synthetic users sharing one password hash."""
+    password_hash = "$2b$12$" + "x" * 53
+    created_at = datetime.now(UTC)
+    db.session.execute(
+        insert(User),
+        [
+            {
+                "name": f"User {i}",
+                "email": f"user{i}@example.com",
+                "_password": password_hash,
+                "created_at": created_at,
+            }
+            for i in range(rows)
+        ],
+    )
+    db.session.commit()
+
+
+def orm_listing() -> list[dict]:
+    """List users the way the endpoint used to: ORM instances, then dump."""
+    return users_schema.dump(User.get_all())
+
+
+def row_listing() -> list[dict]:
+    """List users through the read-only row model, then dump."""
+    return users_schema.dump(get_user_rows())
+
+
+def measure(name: str, listing: Callable[[], list[dict]], rows: int, repeat: int):
+    """Print the best throughput and the peak memory per row of a listing."""
+    timings = []
+
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = listing()
+        timings.append(time.perf_counter() - started)
+        assert len(result) == rows
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    listing()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    print(
+        f"{name:<10} {rows / best:>12,.0f} rows/s {best * 1000:>10.1f} ms "
+        f"{peak / rows:>10,.0f} B/row peak"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000, help="Users to list.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per path.")
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        populate(args.rows)
+
+        measure("orm", orm_listing, args.rows, args.repeat)
+        measure("read model", row_listing, args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the cost of serving and consuming user listings as JSON and MessagePack.
+
+Dumps synthetic users with ``UserSchema`` the way the list endpoint does, then
+times encoding on the server and decoding on a client, including turning
+``created_at`` back into a datetime. Requires the ``msgpack`` package:
+
+    python benchmarks/msgpack_encoding.py --users 10000
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+import msgpack
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.read_models import UserRow  # noqa: E402
+from app.schemas import native_datetimes, users_schema  # noqa: E402
+
+
+def make_rows(count: int) -> list[UserRow]:
+    """Build synthetic rows shaped like the list endpoint's read model."""
+    started = datetime(2025, 1, 1, tzinfo=UTC)
+    return [
+        UserRow(i, f"User {i}", f"user{i}@example.com", started + timedelta(seconds=i))
+        for i in range(count)
+    ]
+
+
+def json_encode(rows: list[UserRow]) -> bytes:
+    """Serialize for JSON: ISO 8601 strings for timestamps."""
+    return json.dumps(users_schema.dump(rows)).encode("utf-8")
+
+
+def json_decode(body: bytes) -> list[dict]:
+    """Parse JSON and restore datetimes, as a typed client would."""
+    users = json.loads(body)
+
+    for user in users:
+        user["created_at"] = datetime.fromisoformat(user["created_at"])
+
+    return users
+
+
+def msgpack_encode(rows: list[UserRow]) -> bytes:
+    """Serialize for MessagePack: native timestamp extension types."""
+    with native_datetimes():
+        return msgpack.packb(users_schema.dump(rows), datetime=True)
+
+
+def msgpack_decode(body: bytes) -> list[dict]:
+    """Unpack MessagePack, getting datetimes directly."""
+    return msgpack.unpackb(body, timestamp=3)
+
+
+def best_of(repeat: int, fn: Callable, arg) -> tuple[float, object]:
+    """Return the fastest run of ``fn(arg)`` and its result."""
+    timings, result = [], None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(arg)
+        timings.append(time.perf_counter() - started)
+
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000, help="Users to encode.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case.")
+    args = parser.parse_args()
+
+    rows = make_rows(args.users)
+
+    for name, encode, decode in (
+        ("json", json_encode, json_decode),
+        ("msgpack", msgpack_encode, msgpack_decode),
+    ):
+        encode_time, body = best_of(args.repeat, encode, rows)
+        decode_time, users = best_of(args.repeat, decode, body)
+        assert len(users) == args.users
+
+        print(
+            f"{name:<8} encode {encode_time * 1000:>8.1f} ms "
+            f"decode {decode_time * 1000:>8.1f} ms "
+            f"size {len(body) / args.users:>6.1f} B/user"
+        )
+
+
+if __name__ == "__main__":
+    main()
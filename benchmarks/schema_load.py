@@ -0,0 +1,77 @@
+"""
+Measure the throughput of validating user updates with ``UserUpdateSchema``.
+
+Compares building a schema for every request with reusing the shared
+``user_update_schema`` instance, and times the name and password validators on
+their own. The payload keeps the user's email, so no database is needed:
+
+    python benchmarks/schema_load.py --loads 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models import User  # noqa: E402
+from app.schemas import UserUpdateSchema, user_update_schema  # noqa: E402
+
+PAYLOAD = {
+    "name": "Benchmark User O'Neil-Smith",
+    "email": "benchmark@example.com",
+    "password": "CorrectHorseBattery9",
+}
+
+
+def per_request_schema(user: User) -> dict:
+    """Build a fresh schema for the load, as the update views used to."""
+    return UserUpdateSchema().load(PAYLOAD, user=user)
+
+
+def shared_schema(user: User) -> dict:
+    """Load through the shared schema instance."""
+    return user_update_schema.load(PAYLOAD, user=user)
+
+
+def validators(user: User) -> None:
+    """Run only the name and password validators."""
+    user_update_schema.validate_name(PAYLOAD["name"])
+    user_update_schema.validate_password(PAYLOAD["password"])
+
+
+def measure(name: str, load: Callable[[User], object], loads: int, repeat: int):
+    """Print the best throughput of a load function."""
+    user = User(id=1, name="Benchmark", email=PAYLOAD["email"])
+    timings = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+
+        for _ in range(loads):
+            load(user)
+
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(
+        f"{name:<20} {loads / best:>12,.0f} loads/s "
+        f"{best / loads * 1_000_000:>8.1f} us/load"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loads", type=int, default=20_000, help="Loads per run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    args = parser.parse_args()
+
+    measure("schema per request", per_request_schema, args.loads, args.repeat)
+    measure("shared schema", shared_schema, args.loads, args.repeat)
+    measure("validators only", validators, args.loads, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Measure worker cold start: import cost of the app and time to first request.
+
+Every sample runs in a fresh interpreter, the way a new worker starts:
+
+    python benchmarks/startup.py --runs 10 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_REQUEST = """
+import time
+started = time.perf_counter()
+from app.app import create_app
+app = create_app()
+response = app.test_client().get("/metrics")
+assert response.status_code == 200, response.status_code
+print(time.perf_counter() - started)
+"""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter in the project root."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_report(top: int) -> None:
+    """Print the modules with the highest cumulative import time."""
+    result = run_python("-X", "importtime", "-c", FIRST_REQUEST)
+    rows = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.strip()))
+
+    total = sum(self_us for _, self_us, _ in rows)
+    print(f"Total import time: {total / 1000:.1f} ms ({len(rows)} modules)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+
+def first_request(runs: int) -> None:
+    """Print the time from interpreter start to the first served request."""
+    samples = []
+
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = run_python("-c", FIRST_REQUEST)
+        process_time = time.perf_counter() - started
+        samples.append((process_time, float(result.stdout.strip())))
+
+    process = [sample[0] * 1000 for sample in samples]
+    in_process = [sample[1] * 1000 for sample in samples]
+    print(
+        f"Time to first request over {runs} runs: "
+        f"median {statistics.median(process):.1f} ms "
+        f"(min {min(process):.1f} ms) including interpreter start, "
+        f"median {statistics.median(in_process):.1f} ms from first app import"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts to time.")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list.")
+    args = parser.parse_args()
+
+    import_report(args.top)
+    print()
+    first_request(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,10 @@ set -e
 
 # Script to initialize and start the Flask application
 
-# Print waiting message and connection details
-echo "Waiting for postgres..."
-echo "Host: $POSTGRES_HOST"
-echo "Port: $POSTGRES_PORT"
-
-# Wait for PostgreSQL to be ready by checking connection
-while ! nc -z $POSTGRES_HOST $POSTGRES_PORT; do
-  sleep 0.1
-done
-
-# Notify that PostgreSQL is available
-echo "PostgreSQL started"
-
-# Run database migrations
+# Wait for PostgreSQL and run migrations. Replicas starting together take
+# turns through an advisory lock; the ones that find the schema at head skip it.
 echo "Running migrations..."
-flask db upgrade
+flask db upgrade-locked
 
 # Execute the main command passed to the container
 echo "Starting Flask application..."
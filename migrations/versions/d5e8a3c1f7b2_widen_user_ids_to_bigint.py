@@ -0,0 +1,47 @@
+"""Widen user ids to bigint
+
+Revision ID: d5e8a3c1f7b2
+Revises: c47d1a9e2b58
+Create Date: 2026-10-19 15:02:37.518204
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.online_migrations import widen_to_bigint
+
+# revision identifiers, used by Alembic.
+revision = "d5e8a3c1f7b2"
+down_revision = "c47d1a9e2b58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Snowflake ids of sharded deployments need 63 bits. SQLite integers
+    # already have 64 bits and its columns cannot be altered in place.
+    if op.get_context().dialect.name == "sqlite":
+        return
+
+    # Copied into new columns and swapped in, as changing the type in place
+    # rewrites both tables under an exclusive lock.
+    widen_to_bigint("users", "id", primary_key="users_pkey", sequence="users_id_seq")
+    widen_to_bigint("user_changes", "user_id", key="seq")
+
+
+def downgrade():
+    if op.get_context().dialect.name == "sqlite":
+        return
+
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("ALTER SEQUENCE IF EXISTS users_id_seq AS integer")
+
+    op.alter_column(
+        "user_changes",
+        "user_id",
+        existing_type=sa.BigInteger(),
+        type_=sa.Integer(),
+        existing_nullable=False,
+    )
+    op.alter_column("users", "id", existing_type=sa.BigInteger(), type_=sa.Integer())
@@ -0,0 +1,24 @@
+"""Index users created_at
+
+Revision ID: e2b7c4d9f1a6
+Revises: d5e8a3c1f7b2
+Create Date: 2026-10-19 18:41:09.204113
+
+"""
+
+from app.online_migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = "e2b7c4d9f1a6"
+down_revision = "d5e8a3c1f7b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Deletes by creation time otherwise scan the whole table.
+    create_index_concurrently("ix_users_created_at", "users", ["created_at"])
+
+
+def downgrade():
+    drop_index_concurrently("ix_users_created_at", "users")
@@ -1,30 +1,157 @@
 import os
-from typing import Generator
+from contextlib import ExitStack
+from typing import Any, Callable, Generator
 
 import pytest
 from flask import Flask
 from flask.testing import FlaskClient
+from sqlalchemy import Engine, create_engine, event, text
+from sqlalchemy.engine import Connection, make_url
 from sqlalchemy.orm import Session
 
 from app.app import create_app, db
 from app.models import User
+from tests.factories import create_users
+
+
+def _test_database_uri() -> str | None:
+    """
+    Database for this test process from ``TEST_DATABASE_URI``, if set.
+
+    A ``{worker}`` placeholder is replaced by the pytest-xdist worker ID, so
+    parallel workers never share a database.
+    """
+    uri = os.getenv("TEST_DATABASE_URI")
+
+    if uri is None:
+        return None
+
+    return uri.format(worker=os.getenv("PYTEST_XDIST_WORKER", "main"))
+
+
+def _ensure_database(uri: str) -> None:
+    """Create a missing PostgreSQL test database."""
+    url = make_url(uri)
+
+    if url.get_backend_name() != "postgresql":
+        return
+
+    engine = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+
+    with engine.connect() as connection:
+        exists = connection.scalar(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"),
+            {"name": url.database},
+        )
+
+        if not exists:
+            connection.execute(text(f'CREATE DATABASE "{url.database}"'))
+
+    engine.dispose()
+
+
+def _enable_sqlite_savepoints(engine: Engine) -> None:
+    """
+    Let pysqlite nest SAVEPOINTs inside an outer transaction.
+
+    The driver otherwise starts and ends transactions on its own, which breaks
+    nested transactions; SQLAlchemy then emits ``BEGIN`` itself.
+    """
+
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection: Connection) -> None:
+        connection.exec_driver_sql("BEGIN")
 
 
 @pytest.fixture(scope="session")
 def app() -> Generator[Flask, None, None]:
     """Create a Flask app for testing."""
-    app = create_app()
+    uri = _test_database_uri()
+
+    if uri is not None:
+        _ensure_database(uri)
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": uri} if uri else None)
     app.config["TESTING"] = True
 
     with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            _enable_sqlite_savepoints(db.engine)
+
         db.create_all()
         yield app
         db.session.remove()
 
+        if uri is not None:
+            db.drop_all()
+
     if "TESTING" in os.environ:
         del os.environ["TESTING"]
 
 
+@pytest.fixture(scope="function")
+def make_app() -> Generator[Callable[..., Flask], None, None]:
+    """
+    Return a factory of apps with their own config and database.
+
+    Each app made stays in an app context with its tables created, on every
+    shard when sharded, until the test ends and its tables are dropped.
+    """
+    with ExitStack() as stack:
+
+        def make(config: dict[str, Any] | None = None) -> Flask:
+            app = create_app(config)
+            router = app.extensions.get("sharding")
+            stack.enter_context(app.app_context())
+
+            if router is not None:
+                router.create_all(db)
+                stack.callback(router.drop_all, db)
+            else:
+                db.create_all()
+                stack.callback(db.drop_all)
+
+            stack.callback(db.session.remove)
+            return app
+
+        yield make
+
+
+@pytest.fixture(scope="function", autouse=True)
+def transaction(request: pytest.FixtureRequest) -> Generator[None, None, None]:
+    """
+    Roll back everything a test writes through the shared app.
+
+    The session joins an outer transaction on its own connection and turns its
+    commits and rollbacks into SAVEPOINTs, so tests see committed data while
+    nothing outlives them and no table has to be emptied between tests.
+    """
+    if "app" not in request.fixturenames:
+        yield
+        return
+
+    app = request.getfixturevalue("app")
+
+    with app.app_context():
+        connection = db.engine.connect()
+        outer = connection.begin()
+        db.session.configure(bind=connection, join_transaction_mode="create_savepoint")
+
+        try:
+            yield
+        finally:
+            db.session.remove()
+            db.session.configure(
+                bind=None, join_transaction_mode="conditional_savepoint"
+            )
+            outer.rollback()
+            connection.close()
+
+
 @pytest.fixture(scope="function")
 def client(app: Flask) -> Generator[FlaskClient, None, None]:
     """Create a test client for the app."""
@@ -33,23 +160,25 @@ def client(app: Flask) -> Generator[FlaskClient, None, None]:
 
 
 @pytest.fixture(scope="function")
-def db_session(app: Flask) -> Generator[Session, None, None]:
-    """Create a clean database session for a test."""
-    with app.app_context():
-        for table in reversed(db.metadata.sorted_tables):
-            db.session.execute(table.delete())
+def db_session(app: Flask) -> Session:
+    """Return the session of the test's rolled-back transaction."""
+    return db.session()
 
-        db.session.commit()
 
-        connection = db.engine.connect()
-        transaction = connection.begin()
-        session = db.session
+@pytest.fixture(scope="function")
+def sql_statements(app: Flask) -> Generator[list[str], None, None]:
+    """Record the SQL statements sent to the database during a test."""
+    statements = []
 
-        yield session
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
 
-        session.close()
-        transaction.rollback()
-        connection.close()
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
 
 
 @pytest.fixture(scope="function")
@@ -73,14 +202,4 @@ def user(db_session, user_data) -> User:
 @pytest.fixture(scope="function")
 def user_list(db_session) -> list[User]:
     """Create multiple test users."""
-    users = []
-
-    for i in range(3):
-        user = User.create(
-            name=f"User {i}", email=f"user{i}@example.com", password=f"Password{i}123"
-        )
-        users.append(user)
-        db_session.add(user)
-
-    db_session.commit()
-    return users
+    return create_users(3)
@@ -0,0 +1,67 @@
+import json
+from functools import lru_cache
+
+from flask.testing import FlaskClient
+
+from app.app import bcrypt, db
+from app.models import User
+
+TEST_PASSWORD = "Password123"
+USERS_URL = "/api/v1/users/"
+
+
+@lru_cache
+def password_hash(password: str = TEST_PASSWORD) -> str:
+    """Hash a password once per test run and reuse it for every user."""
+    return bcrypt.generate_password_hash(password).decode("utf-8")
+
+
+def build_user(index: int, password: str = TEST_PASSWORD, **overrides) -> User:
+    """Build an unsaved user with a precomputed password hash."""
+    attributes = {"name": f"User {index}", "email": f"user{index}@example.com"}
+    attributes.update(overrides)
+    return User(_password=password_hash(password), **attributes)
+
+
+def create_users(count: int, password: str = TEST_PASSWORD, **overrides) -> list[User]:
+    """
+    Create and commit ``count`` users named ``User {i}`` / ``user{i}@example.com``.
+
+    Users share one password hash and are inserted in a single flush.
+    """
+    users = [build_user(i, password, **overrides) for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def user_payload(index: int, password: str = TEST_PASSWORD, **overrides) -> dict:
+    """Request body creating the user ``build_user`` would build."""
+    payload = {
+        "name": f"User {index}",
+        "email": f"user{index}@example.com",
+        "password": password,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def post_users(client: FlaskClient, count: int, **overrides) -> list[dict]:
+    """Create ``count`` users through the API and return their representations."""
+    users = []
+
+    for i in range(count):
+        response = client.post(
+            USERS_URL,
+            data=json.dumps(user_payload(i, **overrides)),
+            content_type="application/json",
+        )
+        assert response.status_code == 201, response.data
+        users.append(json.loads(response.data))
+
+    return users
+
+
+def post_user(client: FlaskClient, **overrides) -> dict:
+    """Create one user through the API and return its representation."""
+    return post_users(client, 1, **overrides)[0]
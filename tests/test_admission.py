@@ -0,0 +1,96 @@
+import json
+import threading
+
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+
+from app.admission import ConcurrencyLimiter
+from app.models import User
+
+
+def test_limiter_rejects_when_full() -> None:
+    """Test that requests over the limit are rejected after the queue timeout."""
+    limiter = ConcurrencyLimiter(max_limit=1, queue_timeout=0.01)
+
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    assert limiter.stats() == {
+        "limit": 1,
+        "in_flight": 1,
+        "admitted": 1,
+        "rejected": 1,
+    }
+
+
+def test_limiter_admits_queued_request_on_release() -> None:
+    """Test that a queued request gets the slot as soon as it is released."""
+    limiter = ConcurrencyLimiter(max_limit=1, queue_timeout=1)
+    admitted = []
+
+    assert limiter.acquire()
+    waiter = threading.Thread(target=lambda: admitted.append(limiter.acquire()))
+    waiter.start()
+    limiter.release(latency=0.0)
+    waiter.join()
+
+    assert admitted == [True]
+
+
+def test_adaptive_limit_follows_latency() -> None:
+    """Test that slow requests shrink the limit and fast ones grow it back."""
+    limiter = ConcurrencyLimiter(
+        max_limit=10, queue_timeout=0, adaptive=True, target_latency=0.1
+    )
+
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(latency=1.0)
+
+    shrunk = limiter.limit
+    assert shrunk < 10
+
+    for _ in range(200):
+        limiter.acquire()
+        limiter.release(latency=0.01)
+
+    assert shrunk < limiter.limit <= 10
+
+
+def test_overloaded_endpoint_returns_503(
+    client: FlaskClient, user: User, app: Flask
+) -> None:
+    """Test that requests are shed with 503 and Retry-After when saturated."""
+    limiter = app.extensions["admission"].limiters["lookup"]
+
+    with app.app_context():
+        url = url_for("users.get_user", user_id=user.id)
+
+    held = limiter.limit
+    for _ in range(held):
+        assert limiter.acquire()
+
+    try:
+        response = client.get(url)
+        docs_response = client.get(f"/api/docs/api/v1/users/{user.id}")
+    finally:
+        for _ in range(held):
+            limiter.release(latency=0.0)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "busy" in json.loads(response.data)["message"]
+    assert docs_response.status_code == 503
+
+
+def test_admitted_requests_release_their_slot(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test that slots are returned once requests finish."""
+    with app.app_context():
+        url = url_for("users.get_users")
+
+    assert client.get(url).status_code == 200
+
+    stats = app.extensions["admission"].stats()
+    assert stats["list"]["in_flight"] == 0
+    assert stats["list"]["admitted"] >= 1
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.app import create_app, create_spec_app
+
+
+def test_spec_is_served_with_cache_headers(client: FlaskClient) -> None:
+    """Test that the OpenAPI spec can be cached and revalidated."""
+    response = client.get("/api/docs/swagger.json")
+    assert response.status_code == 200
+    assert "public" in response.headers["Cache-Control"]
+    assert "max-age=86400" in response.headers["Cache-Control"]
+
+    etag = response.headers["ETag"]
+    revalidated = client.get("/api/docs/swagger.json", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+
+def test_export_spec_command(app: Flask, tmp_path: Path) -> None:
+    """Test rendering the OpenAPI spec to a static file."""
+    output = tmp_path / "openapi.json"
+
+    result = app.test_cli_runner().invoke(
+        args=["docs", "export-spec", "--output", str(output)]
+    )
+
+    assert f"OpenAPI spec written to {output}" in result.output
+    spec = json.loads(output.read_text())
+    assert spec["info"]["title"] == "User Management API"
+    assert "/api/v1/users/" in spec["paths"]
+
+
+def test_docs_can_be_disabled() -> None:
+    """Test that the docs blueprint is not registered when docs are disabled."""
+    app = create_app({"API_DOCS_ENABLED": False})
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()}
+    assert "users.get_users" in endpoints
+    assert not [endpoint for endpoint in endpoints if endpoint.startswith("api_docs")]
+
+
+def test_prerendered_spec_is_served_from_its_file(tmp_path: Path) -> None:
+    """Test that a spec rendered at build time is served and used by the UI."""
+    spec_path = tmp_path / "openapi.json"
+    spec_path.write_text(json.dumps({"swagger": "2.0", "prerendered": True}))
+    client = create_app({"API_SPEC_PATH": str(spec_path)}).test_client()
+
+    response = client.get("/api/docs/openapi.json")
+    assert response.status_code == 200
+    assert json.loads(response.data)["prerendered"] is True
+    assert "max-age=86400" in response.headers["Cache-Control"]
+
+    etag = response.headers["ETag"]
+    revalidated = client.get("/api/docs/openapi.json", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert b"/api/docs/openapi.json" in client.get("/api/docs/").data
+
+
+def test_spec_app_needs_no_database_settings() -> None:
+    """Test that the app used to export the spec ignores the configured database."""
+    app = create_spec_app()
+
+    assert app.config["SQLALCHEMY_DATABASE_URI"] == "sqlite://"
+    assert "/api/docs/swagger.json" in {rule.rule for rule in app.url_map.iter_rules()}
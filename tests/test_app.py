@@ -0,0 +1,58 @@
+import json
+
+import click
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import text
+
+from app.app import create_app, db
+from app.schema_migrations import migration_heads, migrations_directory
+
+
+def test_migrations_are_not_loaded_for_web_workers(app: Flask) -> None:
+    """Test that Flask-Migrate is skipped outside of the flask CLI."""
+    assert "migrate" not in app.extensions
+
+
+def test_migrations_are_loaded_for_cli() -> None:
+    """Test that Flask-Migrate is set up when the app is loaded by the CLI."""
+    with click.Context(click.Command("db")):
+        cli_app = create_app()
+
+    assert "migrate" in cli_app.extensions
+
+
+def test_healthz_reports_process_alive(client: FlaskClient) -> None:
+    """Test that the liveness probe answers without checking dependencies."""
+    response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == {"status": "ok"}
+
+
+def test_readyz_waits_for_migrations_at_head(app: Flask, client: FlaskClient) -> None:
+    """Test that the readiness probe fails until the schema is at head."""
+    app.extensions.pop("migrations_at_head", None)
+
+    response = client.get("/readyz")
+    body = json.loads(response.data)
+    assert response.status_code == 503
+    assert body["status"] == "unavailable"
+    assert body["checks"]["database"] == "ok"
+    assert body["checks"]["migrations"].startswith("database is at no revision")
+
+    db.session.execute(
+        text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+    )
+    for head in migration_heads(migrations_directory()):
+        db.session.execute(
+            text("INSERT INTO alembic_version VALUES (:head)"), {"head": head}
+        )
+
+    response = client.get("/readyz")
+    body = json.loads(response.data)
+    assert response.status_code == 200
+    assert body == {
+        "status": "ready",
+        "checks": {"database": "ok", "migrations": "ok"},
+    }
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from flask import Flask
+from sqlalchemy import select
+
+from app.app import db
+from app.audit import _AuditQueue, audit_log
+from app.models import User, UserAudit
+from tests.factories import USERS_URL, post_user
+
+
+@pytest.fixture(scope="function")
+def audited_app(make_app: Callable[..., Flask], tmp_path: Path) -> Flask:
+    """Create an app on a SQLite file whose audit log goes to the table."""
+    return make_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'audit.db'}",
+            "AUDIT_ENABLED": True,
+            "AUDIT_FLUSH_INTERVAL": 0.01,
+        }
+    )
+
+
+def test_committed_writes_are_audited_in_the_table(audited_app: Flask) -> None:
+    """Test that creates, updates and deletes end up in the audit table."""
+    client = audited_app.test_client()
+    user = post_user(client, name="Audited", email="audited@example.com")
+    client.put(
+        f"{USERS_URL}{user['id']}",
+        data=json.dumps(
+            {
+                "name": "Renamed",
+                "email": "audited@example.com",
+                "password": "Password123",
+            }
+        ),
+        content_type="application/json",
+    )
+    client.delete(f"{USERS_URL}{user['id']}")
+
+    assert audit_log.flush()
+
+    entries = db.session.scalars(select(UserAudit).order_by(UserAudit.id)).all()
+    assert [(entry.user_id, entry.action) for entry in entries] == [
+        (user["id"], "insert"),
+        (user["id"], "update"),
+        (user["id"], "delete"),
+    ]
+    assert "name" in entries[1].fields
+    assert entries[0].remote_addr == "127.0.0.1"
+    assert audited_app.extensions["audit"].stats()["written"] == 3
+
+
+def test_rolled_back_writes_are_not_audited(audited_app: Flask) -> None:
+    """Test that writes undone by a rollback or a savepoint rollback leave no entry."""
+    db.session.add(User.create("Rolled back", "rolled@example.com", "Password123"))
+    db.session.flush()
+    db.session.rollback()
+
+    savepoint = db.session.begin_nested()
+    db.session.add(User.create("Savepoint", "savepoint@example.com", "Password123"))
+    db.session.flush()
+    savepoint.rollback()
+
+    kept = User.create("Kept", "kept@example.com", "Password123")
+    db.session.add(kept)
+    db.session.commit()
+
+    assert audit_log.flush()
+
+    entries = db.session.execute(select(UserAudit.user_id, UserAudit.action)).all()
+    assert entries == [(kept.id, "insert")]
+
+
+def test_full_queue_drops_events_with_drop_policy(
+    app: Flask, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a full queue drops events instead of blocking with ``drop``."""
+    gate = threading.Event()
+    written = []
+
+    class SlowSink:
+        def write(self, events: list[dict]) -> None:
+            gate.wait(5)
+            written.extend(events)
+
+    monkeypatch.setitem(app.config, "AUDIT_QUEUE_SIZE", 1)
+    monkeypatch.setitem(app.config, "AUDIT_OVERFLOW", "drop")
+    monkeypatch.setitem(app.config, "AUDIT_FLUSH_INTERVAL", 0)
+    audit_queue = _AuditQueue(app, SlowSink())
+
+    audit_queue.enqueue([{"user_id": user_id} for user_id in range(10)])
+    stats = audit_queue.stats()
+    gate.set()
+
+    assert audit_queue.flush(5)
+    assert stats["dropped"] > 0
+    assert stats["enqueued"] + stats["dropped"] == 10
+    assert len(written) == stats["enqueued"]
+
+
+def test_full_queue_blocks_once_per_enqueue_with_block_policy(
+    app: Flask, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that ``block`` waits one timeout per commit, not one per event."""
+    gate = threading.Event()
+    written = []
+
+    class StalledSink:
+        def write(self, events: list[dict]) -> None:
+            gate.wait(5)
+            written.extend(events)
+
+    monkeypatch.setitem(app.config, "AUDIT_QUEUE_SIZE", 1)
+    monkeypatch.setitem(app.config, "AUDIT_OVERFLOW", "block")
+    monkeypatch.setitem(app.config, "AUDIT_ENQUEUE_TIMEOUT", 0.2)
+    monkeypatch.setitem(app.config, "AUDIT_FLUSH_INTERVAL", 0)
+    audit_queue = _AuditQueue(app, StalledSink())
+
+    started = time.monotonic()
+    audit_queue.enqueue([{"user_id": user_id} for user_id in range(10)])
+    elapsed = time.monotonic() - started
+    stats = audit_queue.stats()
+    gate.set()
+
+    assert audit_queue.flush(5)
+    assert 0.2 <= elapsed < 1.0
+    assert stats["dropped"] > 0
+    assert stats["enqueued"] + stats["dropped"] == 10
+    assert len(written) == stats["enqueued"]
@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Generator
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, insert
+
+from app.app import db
+from app.bloom import BloomFilter, email_filter
+from app.models import User, UserChange
+
+
+@pytest.fixture(scope="function")
+def bloom_app(
+    make_app: Callable[..., Flask], tmp_path: Path
+) -> Generator[Flask, None, None]:
+    """
+    Create an app on a SQLite file with a built email filter.
+
+    The database is a file, as the refresher thread needs its own connection.
+    """
+    app = make_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'bloom.db'}",
+            "EMAIL_BLOOM_ENABLED": True,
+            "EMAIL_BLOOM_MIN_CAPACITY": 1000,
+            "CHANGE_LOG_GAP_TIMEOUT": 60.0,
+        }
+    )
+
+    db.session.add(
+        User.create(name="Taken", email="taken@example.com", password="Pass1234")
+    )
+    db.session.commit()
+
+    index = app.extensions["email_filter"]
+    index.refresh()
+    yield app
+    index.stop()
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    """Test that added items are always found and others rarely are."""
+    bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+    emails = [f"user{i}@example.com" for i in range(1000)]
+
+    for email in emails:
+        bloom.add(email)
+
+    assert all(email in bloom for email in emails)
+
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_available_email_is_answered_without_query(bloom_app: Flask) -> None:
+    """Test that emails missing from the filter never reach the database."""
+    client = bloom_app.test_client()
+    url = "/api/v1/users/email-availability"
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    taken = client.get(url, query_string={"email": "taken@example.com"})
+    assert json.loads(taken.data) == {"email": "taken@example.com", "available": False}
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        free = client.get(url, query_string={"email": "free@example.com"})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert json.loads(free.data)["available"] is True
+    assert statements == []
+    assert bloom_app.extensions["email_filter"].stats()["negatives"] == 1
+
+    invalid = client.get(url, query_string={"email": "not-an-email"})
+    assert invalid.status_code == 400
+
+
+def test_filter_picks_up_writes(bloom_app: Flask) -> None:
+    """Test that local writes and writes of other workers reach the filter."""
+    assert not email_filter.might_exist("local@example.com")
+
+    db.session.add(
+        User.create(name="Local", email="local@example.com", password="Pass1234")
+    )
+    db.session.commit()
+    assert email_filter.might_exist("local@example.com")
+
+    # Another worker writes a user; this worker only sees it in the change log.
+    user_id = db.session.execute(
+        insert(User).values(name="Remote", email="remote@example.com", _password="x")
+    ).inserted_primary_key[0]
+    UserChange.record_many([user_id], UserChange.INSERT)
+    db.session.commit()
+
+    index = bloom_app.extensions["email_filter"]
+    index.synced_at = 0.0
+    index.refresh()
+    assert email_filter.might_exist("remote@example.com")
+
+
+def test_sync_picks_up_changes_committed_out_of_order(bloom_app: Flask) -> None:
+    """Test that a change numbered before one already synced is not skipped."""
+    index = bloom_app.extensions["email_filter"]
+    assert not email_filter.might_exist("late@example.com")
+
+    def write(email: str, seq: int) -> None:
+        user_id = db.session.execute(
+            insert(User).values(name="Remote", email=email, _password="x")
+        ).inserted_primary_key[0]
+        db.session.execute(
+            insert(UserChange).values(seq=seq, user_id=user_id, op=UserChange.INSERT)
+        )
+        db.session.commit()
+
+    # The change numbered next commits after the one numbered after it.
+    write("early@example.com", index.last_seq + 2)
+    index.synced_at = 0.0
+    index.refresh()
+    assert email_filter.might_exist("early@example.com")
+    assert index.stats()["pending_gaps"] == 1
+
+    write("late@example.com", index.last_seq - 1)
+    index.synced_at = 0.0
+    index.refresh()
+    assert email_filter.might_exist("late@example.com")
+    assert index.stats()["pending_gaps"] == 0
+
+
+def test_requests_never_refresh_the_filter(bloom_app: Flask) -> None:
+    """Test that a due rebuild is left to the refresher thread."""
+    index = bloom_app.extensions["email_filter"]
+    index.built_at = index.synced_at = 0.0
+    caller = threading.get_ident()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if threading.get_ident() == caller:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        assert not email_filter.might_exist("free@example.com")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert statements == []
+
+
+def test_refresher_builds_the_filter_in_the_background(
+    make_app: Callable[..., Flask], tmp_path: Path
+) -> None:
+    """Test that the first check starts the build instead of running it."""
+    app = make_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'refresher.db'}",
+            "EMAIL_BLOOM_ENABLED": True,
+        }
+    )
+    index = app.extensions["email_filter"]
+    caller = threading.get_ident()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if threading.get_ident() == caller:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        email_filter.might_exist("free@example.com")
+        deadline = time.monotonic() + 5
+
+        while index.warm() is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+        index.stop()
+
+    assert statements == []
+    assert index.stats()["builds"] == 1
+    assert not email_filter.might_exist("free@example.com")
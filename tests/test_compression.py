@@ -0,0 +1,97 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response, url_for
+from flask.testing import FlaskClient
+
+from app.app import create_app
+from app.models import User
+
+
+@pytest.fixture(scope="function")
+def stream_app() -> Flask:
+    """Create an app with a streamed listing to compress."""
+    app = create_app({"COMPRESSION_MIN_SIZE": 64})
+
+    @app.route("/stream")
+    def stream():
+        def rows():
+            for i in range(2000):
+                yield json.dumps({"id": i, "name": f"User {i}"}) + "\n"
+
+        return Response(rows(), mimetype="application/x-ndjson")
+
+    return app
+
+
+def test_large_listing_is_gzipped(
+    client: FlaskClient,
+    app: Flask,
+    db_session,
+    user_list: list[User],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a listing above the threshold is gzipped for clients that accept it."""
+    with app.app_context():
+        url = url_for("users.get_users")
+
+    monkeypatch.setattr(app.extensions["compression"], "min_size", 100)
+    response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) == len(response.data)
+
+    users = json.loads(gzip.decompress(response.data))
+    assert [user["id"] for user in users] == [user.id for user in user_list]
+
+
+def test_small_or_unaccepted_responses_are_not_compressed(
+    client: FlaskClient, app: Flask, user: User
+) -> None:
+    """Test that small bodies and clients without gzip get identity responses."""
+    with app.app_context():
+        url = url_for("users.get_user", user_id=user.id)
+        list_url = url_for("users.get_users")
+
+    small = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert json.loads(small.data)["id"] == user.id
+
+    refused = client.get(list_url, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused.headers
+
+
+def test_streamed_response_is_compressed_chunk_wise(stream_app: Flask) -> None:
+    """Test that generator responses are compressed without buffering."""
+    with stream_app.test_client() as client:
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.is_streamed
+        chunks = list(response.response)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert len(chunks) > 2
+
+    lines = gzip.decompress(b"".join(chunks)).decode().splitlines()
+    assert len(lines) == 2000
+    assert json.loads(lines[-1]) == {"id": 1999, "name": "User 1999"}
+
+    stats = stream_app.extensions["compression"].stats()
+    assert stats["responses"]["gzip"] == 1
+    assert stats["bytes_out"] * 5 < stats["bytes_in"]
+
+
+def test_compressed_spec_uses_weak_etag(client: FlaskClient) -> None:
+    """Test that the gzipped spec keeps a weak validator that still revalidates."""
+    response = client.get("/api/docs/swagger.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].startswith("W/")
+
+    revalidated = client.get(
+        "/api/docs/swagger.json",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]},
+    )
+    assert revalidated.status_code == 304
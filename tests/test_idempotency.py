@@ -0,0 +1,120 @@
+import json
+from datetime import UTC, datetime, timedelta
+
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+from sqlalchemy.orm import Session
+
+from app.models import IdempotencyKey, User
+
+
+def _post_user(client: FlaskClient, app: Flask, payload: dict, key: str):
+    with app.app_context():
+        url = url_for("users.create_user")
+
+    return client.post(
+        url,
+        data=json.dumps(payload),
+        content_type="application/json",
+        headers={"Idempotency-Key": key},
+    )
+
+
+def test_replay_returns_stored_response(
+    client: FlaskClient, app: Flask, db_session: Session, user_data: dict[str, str]
+) -> None:
+    """Test that a retried request returns the original response."""
+    first = _post_user(client, app, user_data, "create-1")
+    second = _post_user(client, app, user_data, "create-1")
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert json.loads(second.data) == json.loads(first.data)
+    assert len(User.get_all()) == 1
+
+
+def test_key_reused_with_different_payload(
+    client: FlaskClient, app: Flask, db_session: Session, user_data: dict[str, str]
+) -> None:
+    """Test that a key cannot be reused for a different request."""
+    _post_user(client, app, user_data, "create-2")
+    response = _post_user(
+        client, app, {**user_data, "email": "other@example.com"}, "create-2"
+    )
+
+    assert response.status_code == 422
+    assert "different request" in json.loads(response.data)["message"]
+
+
+def test_concurrent_duplicate_is_rejected(
+    client: FlaskClient, app: Flask, db_session: Session, user_data: dict[str, str]
+) -> None:
+    """Test that a replay of an unfinished request is rejected."""
+    first = _post_user(client, app, user_data, "create-3")
+    db_session.query(IdempotencyKey).filter_by(key="create-3").update(
+        {"response_status": None, "response_body": None}
+    )
+    db_session.commit()
+
+    response = _post_user(client, app, user_data, "create-3")
+
+    assert first.status_code == 201
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_abandoned_claim_is_taken_over(
+    client: FlaskClient, app: Flask, db_session: Session, user_data: dict[str, str]
+) -> None:
+    """Test that a key left unfinished by a dead worker can be retried."""
+    db_session.add(
+        IdempotencyKey(
+            key="create-5",
+            fingerprint="x",
+            created_at=datetime.now(UTC)
+            - timedelta(seconds=app.config["IDEMPOTENCY_LOCK_TIMEOUT"] + 1),
+        )
+    )
+    db_session.commit()
+
+    first = _post_user(client, app, user_data, "create-5")
+    second = _post_user(client, app, user_data, "create-5")
+
+    assert first.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(User.get_all()) == 1
+
+
+def test_validation_errors_are_replayed(
+    client: FlaskClient, app: Flask, db_session: Session
+) -> None:
+    """Test that client errors are stored and replayed as well."""
+    invalid_data = {"name": "I", "email": "invalid", "password": "short"}
+
+    first = _post_user(client, app, invalid_data, "create-4")
+    second = _post_user(client, app, invalid_data, "create-4")
+
+    assert first.status_code == second.status_code == 400
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+
+def test_purge_command_removes_expired_keys(app: Flask, db_session: Session) -> None:
+    """Test that the purge command only deletes expired keys."""
+    db_session.add_all(
+        [
+            IdempotencyKey(
+                key="old",
+                fingerprint="x",
+                created_at=datetime.now(UTC) - timedelta(days=2),
+            ),
+            IdempotencyKey(key="fresh", fingerprint="y"),
+        ]
+    )
+    db_session.commit()
+
+    result = app.test_cli_runner().invoke(args=["idempotency", "purge"])
+
+    assert "Removed 1 expired idempotency keys" in result.output
+    assert db_session.get(IdempotencyKey, "old") is None
+    assert db_session.get(IdempotencyKey, "fresh") is not None
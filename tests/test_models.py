@@ -1,8 +1,16 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
 import pytest
+from flask import Flask
+from marshmallow import validate
+from sqlalchemy import func, insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.models import User
+from app.models import User, UserChange
+from app.schemas import user_schema
+from app.seed import generate_users
 
 
 def test_create_user(db_session: Session, user_data: dict[str, str]) -> None:
@@ -66,6 +74,20 @@ def test_get_user_by_id(user: User, db_session: Session) -> None:
     assert User.get_by_id(999) is None
 
 
+def test_get_user_by_id_uses_identity_map(
+    user: User, db_session: Session, sql_statements: list[str]
+) -> None:
+    """Test that repeated lookups of a loaded user do not query again."""
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    first = User.get_by_id(user.id)
+    second = User.get_by_id(user.id)
+
+    assert first is second
+    assert len([stmt for stmt in sql_statements if stmt.startswith("SELECT")]) == 1
+
+
 def test_get_user_by_email(user: User, db_session: Session) -> None:
     """Test getting a user by email."""
     found_user = User.get_by_email(user.email)
@@ -87,3 +109,171 @@ def test_unique_email_constraint(user: User, db_session: Session) -> None:
 
     with pytest.raises(IntegrityError):
         db_session.commit()
+
+
+def test_bulk_delete_in_chunks(user_list: list[User], db_session: Session) -> None:
+    """Test that bulk delete works through the users chunk by chunk."""
+    reported = []
+
+    deleted = User.bulk_delete(
+        created_before=datetime.now(UTC) + timedelta(days=1),
+        chunk_size=2,
+        progress=reported.append,
+    )
+
+    assert deleted == len(user_list)
+    assert reported == [2, 3]
+    assert User.get_all() == []
+
+
+def test_bulk_delete_requires_a_filter(
+    user_list: list[User], db_session: Session
+) -> None:
+    """Test that bulk delete refuses to delete every user."""
+    with pytest.raises(ValueError):
+        User.bulk_delete()
+
+    assert len(User.get_all()) == len(user_list)
+
+
+def test_bulk_delete_command_rejects_empty_created_before(
+    app: Flask, user_list: list[User]
+) -> None:
+    """Test that ``--created-before ""`` is a usage error, not a full delete."""
+    result = app.test_cli_runner().invoke(
+        args=["users", "delete", "--created-before", ""]
+    )
+
+    assert result.exit_code == 2
+    assert "Invalid ISO 8601 timestamp" in result.output
+    assert len(User.get_all()) == len(user_list)
+
+
+def test_bulk_delete_command(app: Flask, user_list: list[User]) -> None:
+    """Test the bulk delete CLI command."""
+    ids = ",".join(str(user.id) for user in user_list[:2])
+    result = app.test_cli_runner().invoke(
+        args=["users", "delete", "--ids", ids, "--chunk-size", "1"]
+    )
+
+    assert "Deleted 1 users so far..." in result.output
+    assert "Deleted 2 users" in result.output
+    assert len(User.get_all()) == 1
+
+
+def test_soft_delete_hides_user(user: User, db_session: Session) -> None:
+    """Test that soft-deleted users are hidden from lookups but kept in the table."""
+    user.soft_delete()
+    db_session.commit()
+
+    assert user.is_deleted
+    assert User.get_by_id(user.id) is None
+    assert User.get_by_email(user.email) is None
+    assert User.get_all() == []
+    assert db_session.get(User, user.id) is not None
+
+
+def test_email_can_be_reused_after_soft_delete(user: User, db_session: Session) -> None:
+    """Test that the unique email index only covers live users."""
+    user.soft_delete()
+    db_session.commit()
+
+    new_user = User.create(name="New Owner", email=user.email, password="Password456")
+    db_session.add(new_user)
+    db_session.commit()
+
+    assert User.get_by_email(user.email).id == new_user.id
+
+
+def test_purge_deleted_users(user_list: list[User], db_session: Session) -> None:
+    """Test that purging only removes tombstones older than the cutoff."""
+    purged_id, kept_id = user_list[0].id, user_list[1].id
+    user_list[0].deleted_at = datetime.now(UTC) - timedelta(days=60)
+    user_list[1].soft_delete()
+    db_session.commit()
+
+    purged = User.purge_deleted(
+        deleted_before=datetime.now(UTC) - timedelta(days=30), batch_size=1
+    )
+
+    assert purged == 1
+
+    db_session.expunge_all()
+    assert db_session.get(User, purged_id) is None
+    assert db_session.get(User, kept_id) is not None
+    assert len(User.get_all()) == 1
+
+
+def test_purge_deleted_command(app: Flask, user_list: list[User]) -> None:
+    """Test the purge CLI command."""
+    User.bulk_delete(user_ids=[user.id for user in user_list])
+
+    result = app.test_cli_runner().invoke(
+        args=["users", "purge-deleted", "--older-than-days", "0"]
+    )
+
+    assert f"Purged {len(user_list)} deleted users" in result.output
+
+
+def test_export_command_requires_psycopg(app: Flask, tmp_path: Path) -> None:
+    """Test that binary COPY is refused on databases other than psycopg 3."""
+    result = app.test_cli_runner().invoke(
+        args=["users", "export", str(tmp_path / "users.bin")]
+    )
+
+    assert result.exit_code == 2
+    assert "POSTGRES_DRIVER=psycopg" in result.output
+
+
+def test_seed_command_creates_valid_users(app: Flask, db_session: Session) -> None:
+    """Test that seeded users pass validation and share the given password."""
+    result = app.test_cli_runner().invoke(
+        args=["users", "seed", "--count", "25", "--chunk-size", "10"]
+    )
+
+    assert "Created 20 users so far..." in result.output
+    assert "Created 25 users" in result.output
+
+    users = User.get_all()
+    assert len(users) == 25
+    assert len({user.email for user in users}) == 25
+
+    for user in users:
+        user_schema.validate_name(user.name)
+        validate.Email()(user.email)
+
+    assert users[0].check_password("Password123")
+    assert users[0].created_at < users[-1].created_at
+
+
+def test_generated_users_are_deterministic() -> None:
+    """Test that the same seed and range always produce the same rows."""
+    until = datetime(2025, 6, 1, tzinfo=UTC)
+
+    first = list(generate_users(50, "hash", until, start=100, seed=7))
+    again = list(generate_users(50, "hash", until, start=100, seed=7))
+    other = list(generate_users(50, "hash", until, start=100, seed=8))
+
+    assert first == again
+    assert first != other
+    assert ".100@" in first[0]["email"]
+    assert all(row["created_at"] <= until for row in first)
+
+
+def test_change_feed_stops_before_recent_gaps(db_session: Session) -> None:
+    """Test that a page ends before a sequence gap a late commit may still fill."""
+    base = db_session.scalar(select(func.max(UserChange.seq))) or 0
+    db_session.execute(
+        insert(UserChange),
+        [
+            {"seq": base + offset, "user_id": 1, "op": UserChange.UPDATE}
+            for offset in (1, 2, 4)
+        ],
+    )
+    db_session.commit()
+
+    recent = UserChange.get_since(base, 10, gap_timeout=60)
+    settled = UserChange.get_since(base, 10, gap_timeout=0)
+
+    assert [change.seq - base for change in recent] == [1, 2]
+    assert [change.seq - base for change in settled] == [1, 2, 4]
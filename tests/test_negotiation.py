@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+
+import msgpack
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+
+from app.models import User
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def test_list_users_as_msgpack(
+    client: FlaskClient, app: Flask, user_list: list[User]
+) -> None:
+    """Test that the listing is served as MessagePack with native timestamps."""
+    with app.app_context():
+        url = url_for("users.get_users")
+
+    response = client.get(url, headers=MSGPACK)
+    assert response.status_code == 200
+    assert response.mimetype == "application/msgpack"
+    assert "Accept" in response.headers["Vary"]
+
+    users = msgpack.unpackb(response.data, timestamp=3)
+    expected = json.loads(client.get(url).data)
+
+    assert [set(user) for user in users] == [set(user) for user in expected]
+    assert [user["email"] for user in users] == [user.email for user in user_list]
+    assert all(isinstance(user["created_at"], datetime) for user in users)
+    assert users[0]["created_at"].utcoffset().total_seconds() == 0
+
+
+def test_get_user_as_msgpack(client: FlaskClient, app: Flask, user: User) -> None:
+    """Test that a single user is served in the format the client asks for."""
+    with app.app_context():
+        url = url_for("users.get_user", user_id=user.id)
+
+    packed = client.get(url, headers=MSGPACK)
+    plain = client.get(url, headers={"Accept": "*/*"})
+
+    assert packed.mimetype == "application/msgpack"
+    assert msgpack.unpackb(packed.data)["email"] == user.email
+    assert plain.mimetype == "application/json"
+    assert isinstance(json.loads(plain.data)["created_at"], str)
+
+
+def test_batch_results_as_msgpack(
+    client: FlaskClient, app: Flask, user_list: list[User]
+) -> None:
+    """Test that per-operation results of a batch honour the Accept header."""
+    with app.app_context():
+        url = url_for("users.batch_users")
+
+    response = client.post(
+        url,
+        data=json.dumps(
+            {
+                "operations": [
+                    {
+                        "op": "update",
+                        "id": user_list[0].id,
+                        "data": {
+                            "name": "Packed",
+                            "email": user_list[0].email,
+                            "password": "Password123",
+                        },
+                    }
+                ]
+            }
+        ),
+        content_type="application/json",
+        headers=MSGPACK,
+    )
+
+    assert response.status_code == 200
+    result = msgpack.unpackb(response.data, timestamp=3)
+    assert result["committed"] is True
+    assert result["results"][0]["user"]["name"] == "Packed"
+    assert isinstance(result["results"][0]["user"]["created_at"], datetime)
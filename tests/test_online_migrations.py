@@ -0,0 +1,118 @@
+import io
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+
+from app.online_migrations import (
+    add_column_with_backfill,
+    create_index_concurrently,
+    widen_to_bigint,
+)
+from app.schema_migrations import classify_statements
+
+
+def test_add_column_with_backfill_fills_rows_in_batches(tmp_path: Path) -> None:
+    """Test that existing rows get the new column's value over several batches."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+
+    with engine.begin() as connection:
+        connection.execute(sa.text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        connection.execute(
+            sa.text("INSERT INTO users (id) VALUES (:id)"),
+            [{"id": user_id} for user_id in range(1, 26)],
+        )
+
+    statements = []
+    sa.event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+
+        with Operations.context(context), context.begin_transaction():
+            add_column_with_backfill(
+                "users", sa.Column("tier", sa.String(16)), "basic", 10, pause=0
+            )
+            create_index_concurrently("ix_users_tier", "users", ["tier"])
+
+        connection.commit()
+
+    with engine.connect() as connection:
+        tiers = connection.scalars(sa.text("SELECT tier FROM users")).all()
+        indexes = sa.inspect(connection).get_indexes("users")
+
+    assert tiers == ["basic"] * 25
+    assert [index["name"] for index in indexes] == ["ix_users_tier"]
+    assert len([sql for sql in statements if sql.startswith("UPDATE")]) == 3
+
+
+def test_classify_statements_estimates_postgresql_locks() -> None:
+    """Test that blocking statements that scan a table are reported as high risk."""
+    sql = """
+-- Running upgrade a -> b
+
+ALTER TABLE users ALTER COLUMN id TYPE BIGINT;
+
+UPDATE alembic_version SET version_num='b' WHERE alembic_version.version_num = 'a';
+
+-- Running upgrade b -> c
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at
+    ON users (created_at);
+
+BEGIN;
+
+ALTER TABLE users ADD CONSTRAINT users_tier_not_null
+    CHECK (tier IS NOT NULL) NOT VALID;
+
+ALTER TABLE users ALTER COLUMN tier SET NOT NULL;
+
+CREATE INDEX ix_users_name ON users (name);
+"""
+    impacts = classify_statements(sql)
+
+    assert [(impact.revision, impact.risk) for impact in impacts] == [
+        ("b", "high"),
+        ("c", "none"),
+        ("c", "low"),
+        ("c", "low"),
+        ("c", "high"),
+    ]
+    assert {impact.table for impact in impacts} == {"users"}
+    assert impacts[1].lock == "SHARE UPDATE EXCLUSIVE"
+    assert impacts[4].blocks == "writes"
+
+
+def test_widen_to_bigint_swaps_in_a_copy_on_postgresql() -> None:
+    """Test that a primary key is widened without a rewrite under lock."""
+    output = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name="postgresql", opts={"as_sql": True, "output_buffer": output}
+    )
+
+    with Operations.context(context):
+        widen_to_bigint(
+            "users", "id", primary_key="users_pkey", sequence="users_id_seq", pause=0
+        )
+
+    impacts = classify_statements(output.getvalue())
+    statements = [impact.statement for impact in impacts]
+
+    assert not [statement for statement in statements if " TYPE " in statement]
+    assert [
+        impact.statement
+        for impact in impacts
+        if impact.risk == "high" and not impact.statement.startswith("UPDATE")
+    ] == []
+    assert (
+        "ALTER TABLE users ADD CONSTRAINT users_pkey "
+        "PRIMARY KEY USING INDEX users_id_bigint_key"
+    ) in statements
+    assert statements[-1] == "ALTER TABLE users RENAME id_bigint TO id"
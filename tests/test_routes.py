@@ -1,9 +1,12 @@
 import json
 
+import pytest
 from flask import Flask, url_for
 from flask.testing import FlaskClient
 
+from app.app import bcrypt
 from app.models import User
+from tests.factories import user_payload
 
 
 def test_get_users(client: FlaskClient, user_list: list[User], app: Flask) -> None:
@@ -73,6 +76,26 @@ def test_create_user(client: FlaskClient, app: Flask) -> None:
         assert user.name == new_user_data["name"]
 
 
+@pytest.mark.parametrize("url", ["/api/v1/users/", "/api/docs/api/v1/users/"])
+def test_created_at_is_formatted_alike_after_write_and_read(
+    client: FlaskClient, db_session, url: str
+) -> None:
+    """Test that a new user's timestamp reads back exactly as it was returned."""
+    response = client.post(
+        url,
+        data=json.dumps(
+            {"name": "Timed", "email": "timed@example.com", "password": "Password123"}
+        ),
+        content_type="application/json",
+    )
+    created = json.loads(response.data)
+
+    db_session.expunge_all()
+    fetched = json.loads(client.get(f"{url}{created['id']}").data)
+
+    assert fetched["created_at"] == created["created_at"]
+
+
 def test_create_user_with_duplicate_email(
     client: FlaskClient, user: User, app: Flask
 ) -> None:
@@ -216,3 +239,450 @@ def test_delete_nonexistent_user(client: FlaskClient, app: Flask) -> None:
     data = json.loads(response.data)
     assert "message" in data
     assert "not found" in data["message"].lower()
+
+
+def test_batch_operations(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test applying mixed operations in one batch."""
+    with app.app_context():
+        url = url_for("users.batch_users")
+
+    operations = [
+        {
+            "op": "create",
+            "data": {
+                "name": "Batch User",
+                "email": "batch@example.com",
+                "password": "BatchPass123",
+            },
+        },
+        {
+            "op": "update",
+            "id": user_list[0].id,
+            "data": {
+                "name": "Batch Updated",
+                "email": user_list[0].email,
+                "password": "UpdatedPass123",
+            },
+        },
+        {"op": "delete", "id": user_list[1].id},
+    ]
+
+    response = client.post(
+        url,
+        data=json.dumps({"operations": operations}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert data["committed"] is True
+    assert [result["status"] for result in data["results"]] == [201, 200, 204]
+
+    with app.app_context():
+        assert User.get_by_email("batch@example.com") is not None
+        assert User.get_by_id(user_list[0].id).name == "Batch Updated"
+        assert User.get_by_id(user_list[1].id) is None
+
+
+def test_atomic_batch_rolls_back(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test that a failing operation rolls back an atomic batch."""
+    with app.app_context():
+        url = url_for("users.batch_users")
+
+    operations = [
+        {"op": "delete", "id": user_list[0].id},
+        {"op": "delete", "id": 999},
+    ]
+
+    response = client.post(
+        url,
+        data=json.dumps({"operations": operations}),
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+
+    data = json.loads(response.data)
+    assert data["committed"] is False
+    assert data["results"][-1]["status"] == 404
+
+    with app.app_context():
+        assert User.get_by_id(user_list[0].id) is not None
+
+
+def test_non_atomic_batch_keeps_successful_operations(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test that a non-atomic batch only rolls back failing operations."""
+    with app.app_context():
+        url = url_for("users.batch_users")
+
+    operations = [
+        {"op": "delete", "id": user_list[0].id},
+        {
+            "op": "create",
+            "data": {"name": "X", "email": "invalid", "password": "short"},
+        },
+        {"op": "delete", "id": user_list[1].id},
+    ]
+
+    response = client.post(
+        url,
+        data=json.dumps({"operations": operations, "atomic": False}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert [result["status"] for result in data["results"]] == [204, 400, 204]
+
+    with app.app_context():
+        assert User.get_by_id(user_list[0].id) is None
+        assert User.get_by_id(user_list[1].id) is None
+
+
+def test_batch_creates_hash_each_password_once(
+    client: FlaskClient, app: Flask, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that validating a create does not hash its password as well."""
+    hashed = []
+    generate_password_hash = bcrypt.generate_password_hash
+
+    def record(password: str) -> bytes:
+        hashed.append(password)
+        return generate_password_hash(password)
+
+    monkeypatch.setattr(bcrypt, "generate_password_hash", record)
+    operations = [
+        {"op": "create", "data": user_payload(i, password=f"Password{i}A")}
+        for i in range(5)
+    ]
+
+    response = client.post(
+        "/api/v1/users/batch",
+        data=json.dumps({"operations": operations}),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+    assert hashed == [f"Password{i}A" for i in range(5)]
+
+
+def test_batch_with_invalid_operations(client: FlaskClient, app: Flask) -> None:
+    """Test that a malformed batch is rejected before touching the database."""
+    with app.app_context():
+        url = url_for("users.batch_users")
+
+    response = client.post(
+        url,
+        data=json.dumps(
+            {
+                "operations": [
+                    {"op": "upsert"},
+                    {"op": "delete"},
+                    {"op": "delete", "id": 2**70},
+                    {"op": "delete", "id": 0},
+                    {"op": "delete", "id": 1},
+                ]
+            }
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+
+    data = json.loads(response.data)
+    assert data["message"] == "Invalid operations"
+    assert set(data["errors"]) == {"0", "1", "2", "3"}
+
+
+def test_bulk_delete_users_by_ids(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test deleting several users by ID in one request."""
+    with app.app_context():
+        url = url_for(
+            "users.delete_users", ids=f"{user_list[0].id},{user_list[1].id},999"
+        )
+
+    response = client.delete(url)
+    assert response.status_code == 200
+    assert json.loads(response.data) == {"deleted": 2}
+
+    with app.app_context():
+        assert [user.id for user in User.get_all()] == [user_list[2].id]
+
+
+def test_bulk_delete_users_created_before(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test deleting users created before a timestamp."""
+    with app.app_context():
+        url = url_for("users.delete_users", created_before="2999-01-01T00:00:00")
+
+    response = client.delete(url)
+    assert response.status_code == 200
+    assert json.loads(response.data) == {"deleted": len(user_list)}
+
+
+def test_bulk_delete_users_requires_filter(client: FlaskClient, app: Flask) -> None:
+    """Test that bulk delete refuses to run without a filter."""
+    with app.app_context():
+        url = url_for("users.delete_users")
+
+    assert client.delete(url).status_code == 400
+    assert client.delete(f"{url}?ids=1,abc").status_code == 400
+    assert client.delete(f"{url}?ids=1,99999999999999999999").status_code == 400
+    assert client.delete(f"{url}?created_before=yesterday").status_code == 400
+
+
+@pytest.mark.parametrize("url", ["/api/v1/users/", "/api/docs/api/v1/users/"])
+@pytest.mark.parametrize("value", ["", " "])
+def test_bulk_delete_users_rejects_empty_created_before(
+    client: FlaskClient, user_list: list[User], url: str, value: str
+) -> None:
+    """Test that an empty ``created_before`` is rejected, not treated as no filter."""
+    response = client.delete(url, query_string={"created_before": value})
+
+    assert response.status_code == 400
+    assert len(User.get_all()) == len(user_list)
+
+
+def test_get_user_changes(client: FlaskClient, user: User, app: Flask) -> None:
+    """Test that the change feed returns inserts, updates and deletes in order."""
+    with app.app_context():
+        update_url = url_for("users.update_user", user_id=user.id)
+        delete_url = url_for("users.delete_user", user_id=user.id)
+        changes_url = url_for("users.get_user_changes")
+
+    client.put(
+        update_url,
+        data=json.dumps(
+            {"name": "Changed", "email": user.email, "password": "ChangedPass123"}
+        ),
+        content_type="application/json",
+    )
+    client.delete(delete_url)
+
+    response = client.get(changes_url)
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    changes = data["changes"]
+    assert [change["op"] for change in changes] == ["insert", "update", "delete"]
+    assert all(change["user_id"] == user.id for change in changes)
+    assert [change["seq"] for change in changes] == sorted(
+        change["seq"] for change in changes
+    )
+    assert changes[-1]["user"] is None
+    assert data["next_cursor"] == changes[-1]["seq"]
+
+
+def test_get_user_changes_with_cursor(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test paging through the change feed with a cursor."""
+    with app.app_context():
+        url = url_for("users.get_user_changes")
+
+    first_page = json.loads(client.get(f"{url}?limit=2").data)
+    assert len(first_page["changes"]) == 2
+    assert first_page["has_more"] is True
+    assert first_page["changes"][0]["user"]["email"] == user_list[0].email
+
+    cursor = first_page["next_cursor"]
+    second_page = json.loads(client.get(f"{url}?since={cursor}&limit=2").data)
+    assert [change["user_id"] for change in second_page["changes"]] == [user_list[2].id]
+    assert second_page["has_more"] is False
+
+    assert client.get(f"{url}?since=-1").status_code == 400
+    assert client.get(f"{url}?since={2**63}").status_code == 400
+    assert client.get(f"/api/v1/users/?after={2**63}").status_code == 400
+
+
+def test_bulk_delete_is_recorded_in_changes(
+    client: FlaskClient, user_list: list[User], app: Flask
+) -> None:
+    """Test that set-based deletes show up in the change feed."""
+    with app.app_context():
+        delete_url = url_for("users.delete_users", ids=str(user_list[0].id))
+        changes_url = url_for("users.get_user_changes")
+
+    client.delete(delete_url)
+
+    changes = json.loads(client.get(changes_url).data)["changes"]
+    assert changes[-1]["op"] == "delete"
+    assert changes[-1]["user_id"] == user_list[0].id
+
+
+def _statements_after(statements: list[str], prefix: str) -> list[str]:
+    """Return the statements that follow the single statement with the prefix."""
+    matches = [i for i, stmt in enumerate(statements) if stmt.startswith(prefix)]
+    assert len(matches) == 1
+    (index,) = matches
+    following = index + 1
+    return statements[following:]
+
+
+def test_create_user_does_not_reload_row(
+    client: FlaskClient, app: Flask, db_session, sql_statements: list[str]
+) -> None:
+    """Test that creating a user writes the row once and never reads it back."""
+    with app.app_context():
+        url = url_for("users.create_user")
+
+    sql_statements.clear()
+    response = client.post(
+        url,
+        data=json.dumps(
+            {"name": "Counted", "email": "counted@example.com", "password": "Pass1234"}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 201
+    assert json.loads(response.data)["id"] is not None
+
+    following = _statements_after(sql_statements, "INSERT INTO users")
+    assert not [stmt for stmt in following if stmt.startswith("SELECT")]
+
+
+def test_update_user_does_not_reload_row(
+    client: FlaskClient, user: User, app: Flask, sql_statements: list[str]
+) -> None:
+    """Test that updating a user writes the row once and never reads it back."""
+    with app.app_context():
+        url = url_for("users.update_user", user_id=user.id)
+
+    sql_statements.clear()
+    response = client.put(
+        url,
+        data=json.dumps(
+            {"name": "Counted", "email": "counted@example.com", "password": "Pass1234"}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert json.loads(response.data)["name"] == "Counted"
+
+    following = _statements_after(sql_statements, "UPDATE users")
+    assert not [stmt for stmt in following if stmt.startswith("SELECT")]
+
+
+@pytest.mark.parametrize(
+    ("email", "selects"),
+    [("test@example.com", 1), ("changed@example.com", 2)],
+)
+def test_update_user_query_count(
+    client: FlaskClient,
+    user: User,
+    app: Flask,
+    db_session,
+    sql_statements: list[str],
+    email: str,
+    selects: int,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that an update loads the user once and checks only a changed email."""
+    with app.app_context():
+        url = url_for("users.update_user", user_id=user.id)
+
+    # Check the email against the database rather than the Bloom filter.
+    monkeypatch.delitem(app.extensions, "email_filter", raising=False)
+
+    db_session.expunge_all()
+    sql_statements.clear()
+    response = client.put(
+        url,
+        data=json.dumps({"name": "Counted", "email": email, "password": "Pass1234"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+    queries = [stmt for stmt in sql_statements if stmt.startswith("SELECT")]
+    assert len(queries) == selects
+
+
+def test_get_users_by_ids(
+    client: FlaskClient, app: Flask, user_list: list[User], sql_statements: list[str]
+) -> None:
+    """Test fetching several users by ID in request order with one query."""
+    ids = [user_list[2].id, 999, user_list[0].id, user_list[2].id]
+
+    with app.app_context():
+        url = url_for("users.get_users", ids=",".join(map(str, ids)))
+
+    sql_statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert [user["id"] for user in data["users"]] == [
+        user_list[2].id,
+        user_list[0].id,
+    ]
+    assert data["missing"] == {"ids": [999], "emails": []}
+    assert len([stmt for stmt in sql_statements if stmt.startswith("SELECT")]) == 1
+
+
+def test_lookup_users_by_ids_and_emails(
+    client: FlaskClient, app: Flask, db_session, user_list: list[User]
+) -> None:
+    """Test resolving users by IDs and emails, reporting keys that are missing."""
+    user_list[1].soft_delete()
+    db_session.commit()
+
+    with app.app_context():
+        url = url_for("users.lookup_users")
+
+    response = client.post(
+        url,
+        data=json.dumps(
+            {
+                "ids": [user_list[1].id, user_list[0].id],
+                "emails": [
+                    user_list[2].email,
+                    "nobody@example.com",
+                    user_list[0].email,
+                ],
+            }
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert [user["id"] for user in data["users"]] == [
+        user_list[0].id,
+        user_list[2].id,
+    ]
+    assert data["missing"] == {
+        "ids": [user_list[1].id],
+        "emails": ["nobody@example.com"],
+    }
+
+
+def test_lookup_users_rejects_invalid_keys(
+    client: FlaskClient, app: Flask, db_session
+) -> None:
+    """Test that malformed, empty and oversized lookups are rejected."""
+    with app.app_context():
+        url = url_for("users.lookup_users")
+        list_url = url_for("users.get_users", ids="1,x")
+
+    max_keys = app.config["LOOKUP_MAX_KEYS"]
+
+    for payload in (
+        {},
+        {"ids": ["1"]},
+        {"ids": [2**70]},
+        {"emails": [""]},
+        {"ids": list(range(1, max_keys + 2))},
+    ):
+        response = client.post(
+            url, data=json.dumps(payload), content_type="application/json"
+        )
+        assert response.status_code == 400
+
+    assert client.get(list_url).status_code == 400
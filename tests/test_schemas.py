@@ -3,7 +3,13 @@ from marshmallow import ValidationError
 from sqlalchemy.orm import Session
 
 from app.models import User
-from app.schemas import UserUpdateSchema, user_create_schema, user_schema, users_schema
+from app.read_models import UserRow, get_user_rows
+from app.schemas import (
+    user_create_schema,
+    user_schema,
+    user_update_schema,
+    users_schema,
+)
 
 
 def test_user_schema_serialization(user: User) -> None:
@@ -38,9 +44,7 @@ def test_user_create_schema_validation(db_session: Session) -> None:
     }
     result = user_create_schema.load(valid_data, session=db_session)
 
-    assert isinstance(result, User)
-    assert result.name == valid_data["name"]
-    assert result.email == valid_data["email"]
+    assert result == valid_data
 
     with pytest.raises(ValidationError) as error:
         user_create_schema.load(
@@ -112,6 +116,25 @@ def test_user_create_schema_validation(db_session: Session) -> None:
     assert "digit" in str(error.value)
 
 
+@pytest.mark.parametrize(
+    ("name", "valid"),
+    [
+        ("Zoë O'Brien-Smith", True),
+        ("Анна 2", True),
+        ("Snake_Case", False),
+        ("Tab\tName", False),
+        ("Name!", False),
+    ],
+)
+def test_name_validation_characters(name: str, valid: bool) -> None:
+    """Test that names accept letters, digits, spaces, hyphens and apostrophes."""
+    if valid:
+        user_schema.validate_name(name)
+    else:
+        with pytest.raises(ValidationError, match="Name can only contain"):
+            user_schema.validate_name(name)
+
+
 def test_user_create_schema_unique_email(user: User, db_session: Session) -> None:
     """Test that email must be unique when creating users."""
     with pytest.raises(ValidationError) as error:
@@ -129,42 +152,59 @@ def test_user_create_schema_unique_email(user: User, db_session: Session) -> Non
 
 def test_user_update_schema_validation(user: User, db_session: Session) -> None:
     """Test validation for user update."""
-    schema = UserUpdateSchema(context={"user": user})
     valid_data = {
         "name": "Updated Name",
         "email": "updated@example.com",
         "password": "UpdatedPass123",
     }
-    result = schema.load(valid_data, session=db_session)
+    result = user_update_schema.load(valid_data, user=user)
 
-    assert result.name == valid_data["name"]
-    assert result.email == valid_data["email"]
+    assert result["name"] == valid_data["name"]
+    assert result["email"] == valid_data["email"]
 
     valid_data = {
         "name": "Same Email",
         "email": user.email,
         "password": "SameEmailPass123",
     }
-    result = schema.load(valid_data, session=db_session)
+    result = user_update_schema.load(valid_data, user=user)
 
-    assert result.name == valid_data["name"]
-    assert result.email == valid_data["email"]
+    assert result["name"] == valid_data["name"]
+    assert result["email"] == valid_data["email"]
 
 
 def test_user_update_schema_email_conflict(
     user: User, user_list: list[User], db_session: Session
 ) -> None:
     """Test email uniqueness validation during update."""
-    schema = UserUpdateSchema(context={"user": user})
+    data = {
+        "name": "Conflict User",
+        "email": user_list[0].email,
+        "password": "ConflictPass123",
+    }
 
     with pytest.raises(ValidationError) as error:
-        schema.load(
-            {
-                "name": "Conflict User",
-                "email": user_list[0].email,
-                "password": "ConflictPass123",
-            },
-            session=db_session,
-        )
+        user_update_schema.load(data, user=user)
 
     assert "Email already exists" in str(error.value)
+
+    # The user is passed per call, so the shared schema does not remember it.
+    assert user_update_schema.load(data, user=user_list[0])["email"] == data["email"]
+
+    with pytest.raises(ValidationError):
+        user_update_schema.load({**data, "email": user.email})
+
+
+def test_user_rows_serialize_like_models(
+    user_list: list[User], db_session: Session
+) -> None:
+    """Test that read-only rows serialize exactly like ORM instances."""
+    user_list[1].soft_delete()
+    db_session.commit()
+    db_session.expunge_all()
+
+    rows = get_user_rows()
+
+    assert all(isinstance(row, UserRow) for row in rows)
+    assert users_schema.dump(rows) == users_schema.dump(User.get_all())
+    assert [row.id for row in rows] == [user_list[0].id, user_list[2].id]
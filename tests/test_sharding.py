@@ -0,0 +1,207 @@
+import json
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, select
+
+from app.app import _init_migrations, create_app, db
+from app.models import User
+from app.schema_migrations import pending_migrations, upgrade_locked
+from app.sharding import SnowflakeIds, shard_for_email, shard_for_id
+from tests.factories import USERS_URL, post_user, post_users
+
+SHARD_COUNT = 3
+
+
+@pytest.fixture(scope="function")
+def sharded_app(make_app: Callable[..., Flask], tmp_path: Path) -> Flask:
+    """Create an app whose users are spread over SQLite files."""
+    uris = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(SHARD_COUNT)]
+    return make_app({"SHARD_DATABASE_URIS": uris, "SHARD_WORKER_ID": 1})
+
+
+def shard_emails(app: Flask) -> dict[int, set[str]]:
+    """Read the emails stored on each shard directly."""
+    engines = app.extensions["sharding"].engines(db)
+    emails = {}
+
+    for shard, engine in engines.items():
+        with engine.connect() as connection:
+            emails[shard] = set(connection.scalars(select(User.email)))
+
+    return emails
+
+
+def test_snowflake_ids_are_ordered_and_record_the_shard() -> None:
+    """Test that IDs increase per shard, never repeat and decode to their shard."""
+    ids = SnowflakeIds(worker_id=5)
+    generated = [ids.next_id(shard % 4) for shard in range(2000)]
+
+    for shard in range(4):
+        assert generated[shard::4] == sorted(generated[shard::4])
+
+    assert len(set(generated)) == len(generated)
+    assert [shard_for_id(user_id) for user_id in generated[:8]] == [0, 1, 2, 3] * 2
+    assert all(user_id < 2**63 for user_id in generated)
+
+
+def test_users_are_stored_on_their_email_shard(sharded_app: Flask) -> None:
+    """Test that writes and lookups go to the shard the email hashes to."""
+    client = sharded_app.test_client()
+    users = post_users(client, 12)
+
+    emails = shard_emails(sharded_app)
+    assert sum(len(stored) for stored in emails.values()) == 12
+    assert len([shard for shard, stored in emails.items() if stored]) > 1
+
+    for user in users:
+        shard = shard_for_email(user["email"], SHARD_COUNT)
+        assert user["email"] in emails[shard]
+        assert shard_for_id(user["id"]) == shard
+
+        response = client.get(f"{USERS_URL}{user['id']}")
+        assert json.loads(response.data)["email"] == user["email"]
+
+    queried = []
+    engines = sharded_app.extensions["sharding"].engines(db)
+
+    for shard, engine in engines.items():
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda *args, shard=shard: queried.append(shard),
+        )
+
+    db.session.expunge_all()
+    assert User.get_by_email("user0@example.com") is not None
+    assert queried == [shard_for_email("user0@example.com", SHARD_COUNT)]
+
+
+def test_paginated_list_merges_shards_in_id_order(sharded_app: Flask) -> None:
+    """Test that pages gathered from all shards come back in global ID order."""
+    client = sharded_app.test_client()
+    ids = sorted(user["id"] for user in post_users(client, 10))
+
+    pages, after = [], 0
+
+    while True:
+        response = client.get(USERS_URL, query_string={"limit": 4, "after": after})
+        page = json.loads(response.data)
+        pages.append([user["id"] for user in page["users"]])
+        after = page["next_cursor"]
+
+        if not page["has_more"]:
+            break
+
+    assert pages[0] == ids[:4]
+    assert [user_id for page in pages for user_id in page] == ids
+    assert [user["id"] for user in json.loads(client.get(USERS_URL).data)] == ids
+
+
+def test_email_change_moves_user_to_new_shard(sharded_app: Flask) -> None:
+    """Test that a user keeps its ID when a new email moves it to another shard."""
+    client = sharded_app.test_client()
+    user = post_user(client)
+    old_shard = shard_for_email(user["email"], SHARD_COUNT)
+    new_email = next(
+        email
+        for email in (f"moved{i}@example.com" for i in range(100))
+        if shard_for_email(email, SHARD_COUNT) != old_shard
+    )
+
+    response = client.put(
+        f"{USERS_URL}{user['id']}",
+        data=json.dumps(
+            {"name": "Moved", "email": new_email, "password": "Password123"}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+
+    emails = shard_emails(sharded_app)
+    assert emails[old_shard] == set()
+    assert new_email in emails[shard_for_email(new_email, SHARD_COUNT)]
+
+    db.session.expunge_all()
+    moved = json.loads(client.get(f"{USERS_URL}{user['id']}").data)
+    assert moved["email"] == new_email
+    assert moved["name"] == "Moved"
+
+
+def test_change_feed_has_one_sequence_across_shards(sharded_app: Flask) -> None:
+    """Test that changes of users on every shard share one gapless sequence."""
+    client = sharded_app.test_client()
+    users = post_users(client, 6)
+    user = users[0]
+    new_email = next(
+        email
+        for email in (f"moved{i}@example.com" for i in range(100))
+        if shard_for_email(email, SHARD_COUNT)
+        != shard_for_email(user["email"], SHARD_COUNT)
+    )
+    client.put(
+        f"{USERS_URL}{user['id']}",
+        data=json.dumps(
+            {"name": "Moved", "email": new_email, "password": "Password123"}
+        ),
+        content_type="application/json",
+    )
+    client.delete(USERS_URL, query_string={"ids": f"{users[1]['id']},{users[2]['id']}"})
+
+    changes, since = [], 0
+
+    while True:
+        response = client.get(
+            f"{USERS_URL}changes", query_string={"since": since, "limit": 3}
+        )
+        page = json.loads(response.data)
+        assert len(page["changes"]) <= 3
+        changes += page["changes"]
+        since = page["next_cursor"]
+
+        if not page["has_more"]:
+            break
+
+    assert [change["seq"] for change in changes] == list(range(1, 10))
+    assert [change["op"] for change in changes] == ["insert"] * 6 + [
+        "update",
+        "delete",
+        "delete",
+    ]
+    assert [change["user_id"] for change in changes[:6]] == [u["id"] for u in users]
+    assert changes[0]["user"]["email"] == new_email
+    assert changes[6]["user_id"] == user["id"]
+    assert changes[7]["user"] is None
+
+
+def test_sharding_requires_a_worker_id(tmp_path: Path) -> None:
+    """Test that a sharded app refuses to start without an explicit worker ID."""
+    uris = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(SHARD_COUNT)]
+
+    with pytest.raises(ValueError, match="SHARD_WORKER_ID"):
+        create_app({"SHARD_DATABASE_URIS": uris, "SHARD_WORKER_ID": None})
+
+
+def test_upgrade_locked_migrates_every_shard(tmp_path: Path) -> None:
+    """Test that the migration command brings every shard to head."""
+    uris = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(SHARD_COUNT)]
+    app = create_app({"SHARD_DATABASE_URIS": uris, "SHARD_WORKER_ID": 1})
+    _init_migrations(app)
+    runner = app.test_cli_runner()
+
+    with app.app_context():
+        result = runner.invoke(upgrade_locked, ["--timeout", "5"])
+        assert result.exit_code == 0, result.output
+        assert "Upgrading shard 2" in result.output
+
+        for engine in app.extensions["sharding"].engines(db).values():
+            with engine.connect() as connection:
+                assert pending_migrations(connection) is None
+
+        response = app.test_client().get("/readyz")
+        assert json.loads(response.data)["checks"]["migrations"] == "ok"
+
+        again = runner.invoke(upgrade_locked, ["--timeout", "5"])
+        assert again.output.count("is already at head") == SHARD_COUNT
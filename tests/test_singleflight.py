@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def _run_concurrently(target, count: int) -> list[threading.Thread]:
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    """Test that concurrent calls for the same key run the function once."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    executions = []
+    results = []
+
+    def fetch() -> dict:
+        executions.append(1)
+        started.set()
+        release.wait(1)
+        return {"id": 1}
+
+    leader = _run_concurrently(lambda: results.append(flight.do("user:1", fetch)), 1)
+    started.wait(1)
+    followers = _run_concurrently(lambda: results.append(flight.do("user:1", fetch)), 4)
+
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in leader + followers:
+        thread.join()
+
+    assert len(executions) == 1
+    assert results == [{"id": 1}] * 5
+    assert flight.stats() == {
+        "executed": 1,
+        "coalesced": 4,
+        "timeouts": 0,
+        "in_flight": 0,
+    }
+
+
+def test_errors_are_propagated_to_waiting_calls() -> None:
+    """Test that followers receive the exception raised by the leader."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing_fetch() -> None:
+        started.set()
+        release.wait(1)
+        raise RuntimeError("database unavailable")
+
+    def call() -> None:
+        try:
+            flight.do("user:1", failing_fetch)
+        except RuntimeError as error:
+            errors.append(str(error))
+
+    leader = _run_concurrently(call, 1)
+    started.wait(1)
+    followers = _run_concurrently(call, 2)
+
+    while flight.stats()["coalesced"] < 2:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in leader + followers:
+        thread.join()
+
+    assert errors == ["database unavailable"] * 3
+
+
+def test_waiting_call_times_out() -> None:
+    """Test that followers give up after the configured timeout."""
+    flight = SingleFlight()
+    flight.timeout = 0.01
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_fetch() -> int:
+        started.set()
+        release.wait(1)
+        return 1
+
+    leader = _run_concurrently(lambda: flight.do("user:1", slow_fetch), 1)
+    started.wait(1)
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("user:1", slow_fetch)
+
+    release.set()
+    leader[0].join()
+    assert flight.stats()["timeouts"] == 1
+
+
+def test_sequential_calls_are_not_cached() -> None:
+    """Test that a finished call does not serve later calls."""
+    flight = SingleFlight()
+    values = iter([1, 2])
+
+    assert flight.do("key", lambda: next(values)) == 1
+    assert flight.do("key", lambda: next(values)) == 2
+
+
+def test_metrics_expose_single_flight_counters(client: FlaskClient, app: Flask) -> None:
+    """Test that the coalescing counters are exposed on the metrics endpoint."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert {"executed", "coalesced", "timeouts", "in_flight"} <= set(
+        data["single_flight"]
+    )
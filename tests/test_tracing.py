@@ -0,0 +1,131 @@
+import json
+from typing import Callable
+
+import pytest
+from flask import Flask
+
+from app.app import create_app
+from app.tracing import NOOP_SPAN, OpenTelemetryExporter, span
+from tests.factories import user_payload
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture(scope="function")
+def traced_app(make_app: Callable[..., Flask]) -> Flask:
+    """Create an app that records the spans of its requests in memory."""
+    return make_app({"TRACING_ENABLED": True, "TRACING_EXPORTER": "memory"})
+
+
+@pytest.mark.parametrize("url", ["/api/v1/users/", "/api/docs/api/v1/users/"])
+def test_create_user_spans_continue_incoming_trace(traced_app: Flask, url: str) -> None:
+    """Test that each stage of a create gets a span in the caller's trace."""
+    response = traced_app.test_client().post(
+        url,
+        data=json.dumps(user_payload(0, name="Traced", email="traced@example.com")),
+        content_type="application/json",
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+    assert response.status_code == 201
+
+    spans = traced_app.extensions["tracing"].spans
+    by_name = {}
+
+    for finished in spans:
+        by_name.setdefault(finished.name, []).append(finished)
+
+    root = by_name[f"POST {url}"][0]
+    assert root.parent_id == PARENT_ID
+    assert root.attributes["http.response.status_code"] == 201
+    assert response.headers["traceresponse"] == f"00-{TRACE_ID}-{root.span_id}-01"
+    assert {finished.trace_id for finished in spans} == {TRACE_ID}
+
+    stages = [
+        finished.name
+        for finished in sorted(spans, key=lambda finished: finished.start_ns)
+        if finished.parent_id == root.span_id and finished.name != "db.query"
+    ]
+    assert stages == [
+        "parse_json",
+        "validate",
+        "hash_password",
+        "insert",
+        "commit",
+        "serialize",
+    ]
+
+    (insert,) = by_name["insert"]
+    queries = [
+        query for query in by_name["db.query"] if query.parent_id == insert.span_id
+    ]
+    assert queries[0].attributes["db.statement"].startswith("INSERT INTO users")
+    assert all(finished.end_ns >= finished.start_ns for finished in spans)
+
+
+def test_unsampled_requests_record_no_spans(traced_app: Flask) -> None:
+    """Test that a caller that did not sample the trace gets no spans recorded."""
+    response = traced_app.test_client().get(
+        "/api/v1/users/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+    )
+
+    assert response.status_code == 200
+    assert "traceresponse" not in response.headers
+    assert traced_app.extensions["tracing"].spans == []
+
+
+def test_spans_are_noops_when_tracing_is_disabled(app: Flask) -> None:
+    """Test that instrumented code gets a shared no-op span without tracing."""
+    assert "tracing" not in app.extensions
+
+    with span("validate", field="email") as current:
+        current.set_attribute("ignored", True)
+
+    assert current is NOOP_SPAN
+
+
+def test_opentelemetry_export_names_service_and_scope(
+    traced_app: Flask, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that spans reach an OpenTelemetry SDK exporter with their resource."""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    span_exporter = InMemorySpanExporter()
+    exporter = OpenTelemetryExporter(span_exporter, "users-under-test")
+    monkeypatch.setitem(traced_app.extensions, "tracing", exporter)
+
+    response = traced_app.test_client().get(
+        "/api/v1/users/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    )
+    assert response.status_code == 200
+    assert exporter.processor.force_flush()
+
+    spans = {finished.name: finished for finished in span_exporter.get_finished_spans()}
+    root = spans["GET /api/v1/users/"]
+    assert root.resource.attributes["service.name"] == "users-under-test"
+    assert root.instrumentation_scope.name == "app.tracing"
+    assert root.context.trace_id == int(TRACE_ID, 16)
+    assert root.parent.span_id == int(PARENT_ID, 16)
+    assert all(
+        finished.parent.span_id == root.context.span_id
+        for finished in spans.values()
+        if finished is not root
+    )
+
+
+def test_service_name_comes_from_config() -> None:
+    """Test that the OTLP exporter is attributed to ``TRACING_SERVICE_NAME``."""
+    pytest.importorskip("opentelemetry.exporter.otlp.proto.http")
+    app = create_app(
+        {
+            "TRACING_ENABLED": True,
+            "TRACING_EXPORTER": "otlp",
+            "TRACING_SERVICE_NAME": "users-from-config",
+        }
+    )
+
+    resource = app.extensions["tracing"].resource
+    assert resource.attributes["service.name"] == "users-from-config"